@@ -1,15 +1,33 @@
-from typing import Dict
-from fastapi import APIRouter, Depends, status
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+from fastapi import APIRouter, Depends, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.services.audit_services import handle_contract_events
 from app.api.services.contract_services import (
+    handle_contract_count,
     handle_contract_creation,
     handle_contract_deletion,
+    handle_contract_listing,
     handle_contract_retrieval,
 )
-from app.api.services.timeline_services import get_contract_timeline
-from app.db.session import get_async_session
-from app.dto.contract import ContractPayload, ContractResponse
+from app.api.services.timeline_history import get_contract_timeline_as_of
+from app.api.services.timeline_services import (
+    get_contract_timeline,
+    open_timeline_stream,
+    read_timeline_document,
+)
+from app.db.session import ShardSessions, get_contract_session, get_shard_sessions
+from app.domain.enums import ComponentType
+from app.dto.contract import (
+    ContractCountResponse,
+    ContractListResponse,
+    ContractPayload,
+    ContractResponse,
+    ContractSortKey,
+)
+from app.dto.event import EventAuditListResponse
 from app.dto.timeline import TimelineResponse
 
 from app.api.schemas.error import ErrorResponse
@@ -30,9 +48,41 @@ router = APIRouter(
 )
 async def create_contract_endpoint(
     payload: ContractPayload,
-    db: AsyncSession = Depends(get_async_session),
+    sessions: ShardSessions = Depends(get_shard_sessions),
 ) -> ContractResponse:
-    return await handle_contract_creation(db, payload)
+    return await handle_contract_creation(sessions.for_contract(payload.contract_number), payload)
+
+
+@router.get(
+    "",
+    response_model=Union[ContractListResponse, ContractCountResponse],
+    status_code=status.HTTP_200_OK,
+    responses={400: {"model": ErrorResponse}},
+)
+async def list_contracts_endpoint(
+    order_by: ContractSortKey = Query(ContractSortKey.contract_number, description="Keyset pagination order"),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    component: List[ComponentType] = Query([], description="Only contracts having all of these components"),
+    created_from: Optional[datetime] = Query(None, description="Created at or after (inclusive)"),
+    created_to: Optional[datetime] = Query(None, description="Created before (exclusive)"),
+    count_only: bool = Query(False, description="Return only the number of matching contracts"),
+    sessions: ShardSessions = Depends(get_shard_sessions),
+) -> Union[ContractListResponse, ContractCountResponse]:
+    if count_only:
+        return await handle_contract_count(
+            sessions, components=component, created_from=created_from, created_to=created_to
+        )
+    return await handle_contract_listing(
+        sessions,
+        order_by=order_by,
+        cursor=cursor,
+        limit=limit,
+        components=component,
+        created_from=created_from,
+        created_to=created_to,
+    )
+
 
 @router.get(
     "/{contract_number}",
@@ -42,7 +92,7 @@ async def create_contract_endpoint(
 )
 async def get_contract_endpoint(
     contract_number: str,
-    db: AsyncSession = Depends(get_async_session),
+    db: AsyncSession = Depends(get_contract_session),
 ) -> ContractResponse:
     return await handle_contract_retrieval(db, contract_number)
 
@@ -54,7 +104,7 @@ async def get_contract_endpoint(
 )
 async def delete_contract_endpoint(
     contract_number: str,
-    db: AsyncSession = Depends(get_async_session),
+    db: AsyncSession = Depends(get_contract_session),
 ) -> Dict[str, str]:
     return await handle_contract_deletion(db, contract_number)
 
@@ -63,10 +113,55 @@ async def delete_contract_endpoint(
     "/{contract_number}/contract_timeline",
     response_model=TimelineResponse,
     status_code=status.HTTP_200_OK,
-    responses={404: {"model": ErrorResponse}},
+    responses={400: {"model": ErrorResponse}, 404: {"model": ErrorResponse}},
 )
 async def get_contract_timeline_endpoint(
     contract_number: str,
-    db: AsyncSession = Depends(get_async_session),
+    as_of: Optional[datetime] = Query(
+        None, description="Timeline as of this event created_at, replayed from the event audit"
+    ),
+    db: AsyncSession = Depends(get_contract_session),
 ) -> TimelineResponse:
+    if as_of is not None:
+        return await get_contract_timeline_as_of(db, contract_number, as_of)
+    document = await read_timeline_document(db, contract_number)
+    if document is not None:
+        # Materialized timeline: one primary-key read, bytes returned as stored
+        return Response(content=document, media_type="application/json")
     return await get_contract_timeline(db, contract_number)
+
+
+@router.get(
+    "/{contract_number}/events",
+    response_model=EventAuditListResponse,
+    status_code=status.HTTP_200_OK,
+    responses={400: {"model": ErrorResponse}, 404: {"model": ErrorResponse}},
+)
+async def list_contract_events_endpoint(
+    contract_number: str,
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_contract_session),
+) -> EventAuditListResponse:
+    """The contract's event audit, oldest first."""
+    return await handle_contract_events(db, contract_number, cursor=cursor, limit=limit)
+
+
+@router.get(
+    "/{contract_number}/timeline/stream",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={
+        200: {"description": "Server-Sent Events, one `timeline` event per change", "content": {"text/event-stream": {}}},
+        404: {"model": ErrorResponse},
+    },
+)
+async def stream_contract_timeline_endpoint(
+    contract_number: str,
+    db: AsyncSession = Depends(get_contract_session),
+) -> StreamingResponse:
+    return StreamingResponse(
+        await open_timeline_stream(db, contract_number),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Optional
 
-from app.api.services.event_services import process_event
-from app.db.session import get_async_session
-from app.dto.event import EventPayload, EventResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.api.services.audit_services import handle_rejection_stats
+from app.api.services.event_services import event_admission, event_reorder, process_event, submit_event
+from app.db.session import ShardSessions, get_shard_sessions
+from app.dto.event import EventPayload, EventResponse, RejectionStatsResponse
 from app.api.schemas.error import ErrorResponse
+from app.infra.admission import Overloaded
 
 
 router = APIRouter(tags=["Events"])
@@ -16,11 +20,36 @@ router = APIRouter(tags=["Events"])
     status_code=status.HTTP_200_OK,
     responses={
         422: {"description": "Validation Error"},
+        503: {"description": "Overloaded; retry after the Retry-After header", "model": ErrorResponse},
     },
 )
 async def post_event(
-    payload: EventPayload, db: AsyncSession = Depends(get_async_session)
+    payload: EventPayload, sessions: ShardSessions = Depends(get_shard_sessions)
 ) -> EventResponse:
-    return await process_event(db, payload)
+    # Sessions only check out a connection on first use, i.e. after admission
+    try:
+        async with event_admission.admit():
+            if event_reorder.enabled:
+                return await submit_event(payload)
+            return await process_event(sessions.for_contract(payload.contract_number), payload)
+    except Overloaded as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=ErrorResponse(code="overloaded", message="Too many events in flight, retry later.").model_dump(),
+            headers={"Retry-After": str(exc.retry_after)},
+        )
 
 
+@router.get(
+    "/events/rejections",
+    response_model=RejectionStatsResponse,
+    status_code=status.HTTP_200_OK,
+    responses={400: {"model": ErrorResponse}},
+)
+async def rejection_stats_endpoint(
+    since: Optional[datetime] = Query(None, description="Events created at or after (inclusive)"),
+    until: Optional[datetime] = Query(None, description="Events created before (exclusive)"),
+    sessions: ShardSessions = Depends(get_shard_sessions),
+) -> RejectionStatsResponse:
+    """Rejected events per reason code, across all shards."""
+    return await handle_rejection_stats(sessions, since=since, until=until)
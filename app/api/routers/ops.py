@@ -0,0 +1,41 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from app.api.services.event_services import event_admission, event_reorder
+from app.api.services.purge_services import contract_purger
+from app.api.services.registry_services import contract_registry
+from app.api.services.timeline_history import timeline_checkpointer
+from app.api.services.timeline_services import timeline_hub
+from app.api.services.warmup_services import readiness
+from app.db.session import pool_stats
+
+router = APIRouter(tags=["Ops"])
+
+
+@router.get("/metrics", status_code=status.HTTP_200_OK)
+async def metrics_endpoint() -> Dict[str, Any]:
+    return {
+        "event_admission": event_admission.stats(),
+        "event_reorder": event_reorder.stats(),
+        "timeline_streams": {
+            "subscribers": timeline_hub.subscriber_count,
+            "evictions": timeline_hub.evictions,
+        },
+        "db_pools": pool_stats(),
+        "contract_purge": contract_purger.stats(),
+        "timeline_checkpoints": timeline_checkpointer.stats(),
+        "contract_registry": {"enabled": contract_registry.opened, **contract_registry.stats()},
+    }
+
+
+@router.get(
+    "/health/ready",
+    status_code=status.HTTP_200_OK,
+    responses={503: {"description": "Warmup still running"}},
+)
+async def readiness_endpoint() -> JSONResponse:
+    if not readiness.ready:
+        return JSONResponse({"status": "warming_up"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return JSONResponse({"status": "ready", "warmup_ms": readiness.warmup_ms, **readiness.stats})
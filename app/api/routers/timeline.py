@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.api.services.timeline_services import get_timeline_changes, open_timeline_stream
+from app.db.session import ShardSessions, get_shard_sessions
+from app.dto.timeline import TimelineChangesResponse
+from app.api.schemas.error import ErrorResponse
+
+router = APIRouter(prefix="/timelines", tags=["Timeline"])
+
+
+@router.get(
+    "/stream",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={
+        200: {"description": "Server-Sent Events for every contract's timeline changes", "content": {"text/event-stream": {}}},
+    },
+)
+async def stream_timelines_endpoint() -> StreamingResponse:
+    return StreamingResponse(
+        await open_timeline_stream(None),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@router.get(
+    "/changes",
+    response_model=TimelineChangesResponse,
+    status_code=status.HTTP_200_OK,
+    responses={400: {"model": ErrorResponse}, 422: {"description": "Validation Error"}},
+)
+async def get_timeline_changes_endpoint(
+    since: str = Query("0", description="Return changes after this cursor (the previous `next_cursor`)"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of state changes to scan per shard"),
+    sessions: ShardSessions = Depends(get_shard_sessions),
+) -> TimelineChangesResponse:
+    return await get_timeline_changes(sessions, since, limit)
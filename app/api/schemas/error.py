@@ -17,6 +17,7 @@ class ErrorResponse(BaseModel):
         "forbidden",
         "unauthorized",
         "bad_request",
+        "overloaded",
     ] = Field(..., description="Stable machine-readable error code")
     message: str = Field(..., description="Human-readable description of the error")
     details: Optional[Any] = Field(default=None, description="Optional structured details")
@@ -0,0 +1,105 @@
+"""
+Read side of the event audit: a contract's audit history and rejection counts.
+Rows store only a reason code; status and message are derived from it here.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.schemas.error import ErrorResponse
+from app.config import settings
+from app.db.crud.event import count_rejections, list_contract_events
+from app.db.models.models import Event
+from app.db.repository import get_repository
+from app.db.session import ShardSessions
+from app.db.types import utc_naive
+from app.domain.audit import AuditReason, audit_message, audit_status
+from app.dto.event import EventAuditEntry, EventAuditListResponse, RejectionCount, RejectionStatsResponse
+
+
+def _require_audit() -> None:
+    if not settings.ENABLE_EVENT_AUDIT:
+        raise HTTPException(
+            status_code=400,
+            detail=ErrorResponse(
+                code="bad_request", message="Audit history needs the event audit (ENABLE_EVENT_AUDIT)."
+            ).model_dump(),
+        )
+
+
+def _label_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Stored timestamps are UTC; responses carry the offset
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _encode_cursor(event: Event) -> str:
+    raw = json.dumps([_label_utc(event.event_created_at).isoformat(), event.id.hex], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, event_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), uuid.UUID(hex=event_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=400,
+            detail=ErrorResponse(code="bad_request", message=f"Invalid audit cursor {cursor!r}.").model_dump(),
+        )
+
+
+def _entry(event: Event, contract_number: str) -> EventAuditEntry:
+    return EventAuditEntry(
+        event_type=event.raw_type,
+        event_date=event.event_date,
+        event_created_at=_label_utc(event.event_created_at),
+        processed_at=_label_utc(event.processed_at),
+        status=audit_status(event.reason),
+        reason=event.reason.name,
+        message=audit_message(
+            event.reason, contract_number=contract_number, component_type=event.component_type
+        ),
+    )
+
+
+async def handle_contract_events(
+    db: AsyncSession, contract_number: str, *, cursor: Optional[str], limit: int
+) -> EventAuditListResponse:
+    _require_audit()
+    after = _decode_cursor(cursor) if cursor else None
+    contract = await get_repository().get_contract(db, contract_number)
+    if contract is None:
+        raise HTTPException(status_code=404, detail=f"Contract {contract_number} not found")
+    rows = await list_contract_events(db, contract.id, after=after, limit=limit + 1)
+    page = rows[:limit]
+    return EventAuditListResponse(
+        items=[_entry(event, contract_number) for event in page],
+        next_cursor=_encode_cursor(page[-1]) if len(rows) > limit else None,
+    )
+
+
+async def handle_rejection_stats(
+    sessions: ShardSessions, *, since: Optional[datetime], until: Optional[datetime]
+) -> RejectionStatsResponse:
+    _require_audit()
+    counts: Counter = Counter()
+    for shard_counts in await asyncio.gather(*(
+        count_rejections(db, since=utc_naive(since), until=utc_naive(until)) for db in sessions.all()
+    )):
+        counts.update(shard_counts)
+    reasons = [
+        RejectionCount(reason=AuditReason(reason).name, count=count)
+        for reason, count in counts.most_common()
+    ]
+    return RejectionStatsResponse(total=sum(counts.values()), reasons=reasons)
@@ -1,14 +1,41 @@
-from typing import Dict, Optional
+import asyncio
+import base64
+import heapq
+import json
+import uuid
+from datetime import datetime
+from itertools import islice
+from typing import Dict, List, Optional, Sequence
 
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from app.api.schemas.error import ErrorResponse
+from app.api.services.purge_services import contract_purger
+from app.api.services.registry_services import contract_registry, register_contract, unregister_contract
+from app.api.services.timeline_services import invalidate_timeline, materialize_timeline
+from app.config import settings
 
-from app.db.crud.contract import create_contract, delete_contract, get_contract
+from app.db.crud.contract import (
+    count_contracts,
+    create_contract,
+    delete_contract,
+    list_contracts_by_created_at,
+    list_contracts_by_number,
+)
 from app.db.models.models import Contract
-from app.dto.contract import ContractPayload, ContractResponse
+from app.db.repository import get_repository
+from app.db.session import ShardSessions
+from app.db.types import utc_naive
+from app.domain.enums import ComponentType
+from app.dto.contract import (
+    ContractCountResponse,
+    ContractListResponse,
+    ContractPayload,
+    ContractResponse,
+    ContractSortKey,
+)
 from app.infra.logging import log_context
 
 
@@ -20,8 +47,13 @@ async def handle_contract_creation(
     """
     log = log_context(contract_number=payload.contract_number)
     log.info("Handling contract creation")
+    generation = contract_registry.generation
     try:
         result: Contract = await create_contract(db, payload)
+        if settings.ENABLE_MATERIALIZED_TIMELINES:
+            await materialize_timeline(db, result.contract_number, result.id)
+            await db.commit()
+        register_contract(result.contract_number, result.id, result.components, generation)
         result_product = ContractResponse.model_validate(result)
         log.info("Contract created")
         return result_product
@@ -42,14 +74,15 @@ async def handle_contract_deletion(db: AsyncSession, contract_number: str) -> Di
     """
     log = log_context(contract_number=contract_number)
     log.info("Handling contract deletion")
-    contract = await get_contract(db, contract_number)
-    if contract is None:
+    if not await delete_contract(db, contract_number):
         raise HTTPException(
             status_code=404,
             detail=ErrorResponse(code="not_found", message=f"Contract {contract_number} not found.").model_dump(),
         )
-    await delete_contract(db, contract_number)
-    log.info("Contract deleted")
+    invalidate_timeline(contract_number)
+    unregister_contract(contract_number)
+    contract_purger.notify()
+    log.info("Contract marked deleted; dependents are purged in the background")
     return {"detail": f"Contract {contract_number} deleted successfully"}
 
 
@@ -59,7 +92,7 @@ async def handle_contract_retrieval(db: AsyncSession, contract_number: str) -> C
     """
     log = log_context(contract_number=contract_number)
     log.info("Handling contract retrieval")
-    result: Optional[Contract] = await get_contract(db, contract_number)
+    result = await get_repository().get_contract(db, contract_number)
     if result is None:
         raise HTTPException(
             status_code=404,
@@ -68,3 +101,83 @@ async def handle_contract_retrieval(db: AsyncSession, contract_number: str) -> C
     result_contract = ContractResponse.model_validate(result)
     log.info("Contract retrieved")
     return result_contract
+
+
+def _sort_key(order_by: ContractSortKey, contract: Contract) -> tuple:
+    if order_by is ContractSortKey.contract_number:
+        return (contract.contract_number,)
+    return (utc_naive(contract.created_at), contract.id)
+
+
+def _encode_cursor(order_by: ContractSortKey, contract: Contract) -> str:
+    if order_by is ContractSortKey.contract_number:
+        key = [contract.contract_number]
+    else:
+        key = [utc_naive(contract.created_at).isoformat(), contract.id.hex]
+    raw = json.dumps({"o": order_by.value, "k": key}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(order_by: ContractSortKey, cursor: str):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if data["o"] != order_by.value:
+            raise ValueError("cursor was issued for a different order")
+        key = data["k"]
+        if order_by is ContractSortKey.contract_number:
+            return str(key[0])
+        return datetime.fromisoformat(key[0]), uuid.UUID(hex=key[1])
+    except (ValueError, KeyError, IndexError, TypeError):
+        raise HTTPException(
+            status_code=400,
+            detail=ErrorResponse(code="bad_request", message=f"Invalid contract cursor {cursor!r}.").model_dump(),
+        )
+
+
+async def handle_contract_listing(
+    sessions: ShardSessions,
+    *,
+    order_by: ContractSortKey,
+    cursor: Optional[str],
+    limit: int,
+    components: Sequence[ComponentType] = (),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> ContractListResponse:
+    """
+    One keyset page of contracts. Each shard returns its next `limit + 1` rows
+    in index order and the pages are merged, so no shard ever scans past the page.
+    """
+    after = _decode_cursor(order_by, cursor) if cursor else None
+    list_page = (
+        list_contracts_by_number if order_by is ContractSortKey.contract_number else list_contracts_by_created_at
+    )
+    pages: List[List[Contract]] = await asyncio.gather(*(
+        list_page(
+            db, after=after, limit=limit + 1, components=components,
+            created_from=utc_naive(created_from), created_to=utc_naive(created_to),
+        )
+        for db in sessions.all()
+    ))
+    merged = list(islice(heapq.merge(*pages, key=lambda c: _sort_key(order_by, c)), limit + 1))
+    page = merged[:limit]
+    return ContractListResponse(
+        items=[ContractResponse.model_validate(contract) for contract in page],
+        next_cursor=_encode_cursor(order_by, page[-1]) if len(merged) > limit else None,
+    )
+
+
+async def handle_contract_count(
+    sessions: ShardSessions,
+    *,
+    components: Sequence[ComponentType] = (),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> ContractCountResponse:
+    counts = await asyncio.gather(*(
+        count_contracts(
+            db, components=components, created_from=utc_naive(created_from), created_to=utc_naive(created_to)
+        )
+        for db in sessions.all()
+    ))
+    return ContractCountResponse(count=sum(counts))
@@ -1,19 +1,65 @@
 from __future__ import annotations
 
-from datetime import date, datetime, timezone
-from typing import Tuple
+from datetime import datetime
+from typing import List, Optional, Union
 
-from fastapi import HTTPException
 from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.domain.enums import ComponentType, EventAction, EventType, resolve_component_action
-from app.db.crud.component_state import get_component_state, upsert_component_state
-from app.db.crud.contract import get_contract
+from app.api.services.registry_services import lookup_contract
+from app.api.services.timeline_services import (
+    invalidate_timeline,
+    materialize_timeline,
+    publish_timeline_change,
+)
+from app.domain.audit import AuditReason, audit_message, audit_status
+from app.domain.enums import ComponentType, EventAction
+from app.domain.rules import (
+    ACTIONS,
+    COMPONENT_TYPES,
+    Action,
+    ComponentWindow,
+    Outcome,
+    RuleEvent,
+    apply_event,
+    from_epoch_us,
+    to_epoch_us,
+)
+from app.db.repository import ComponentStateRow, get_repository
+from app.db.models.models import ComponentState
 from app.dto.event import EventPayload, EventResponse
-from app.infra.logging import log_context
+from app.infra.logging import should_log
 from app.config import settings
-from app.db.crud.event import record_event
+from app.db.crud.timeline_checkpoint import delete_checkpoints_from
+from app.db.session import pool_capacity, session_maker_for
+from app.infra.admission import AdmissionController
+from app.infra.reorder import ReorderBuffer
+
+# Used when EVENT_CONCURRENCY_LIMIT is unset and the pool has no fixed size
+_DEFAULT_CONCURRENCY = 32
+
+
+def event_concurrency_limit() -> int:
+    """
+    EVENT_CONCURRENCY_LIMIT, else the database pool's capacity: admitting more
+    requests than there are connections only moves the queue into the pool,
+    where waiters time out instead of getting a 503 with Retry-After.
+    """
+    capacity = pool_capacity()
+    limit = settings.EVENT_CONCURRENCY_LIMIT
+    if limit is None:
+        return capacity if capacity is not None else _DEFAULT_CONCURRENCY
+    if capacity is not None and limit > capacity:
+        logger.warning(
+            "EVENT_CONCURRENCY_LIMIT={} exceeds the {} pooled database connections; "
+            "excess requests wait on the pool instead of the admission queue", limit, capacity,
+        )
+    return limit
+
+
+# Bounds concurrent /event processing so a slow database sheds load early
+event_admission = AdmissionController(event_concurrency_limit(), settings.EVENT_QUEUE_LIMIT)
 
 
 async def process_event(db: AsyncSession, payload: EventPayload) -> EventResponse:
@@ -21,174 +67,240 @@ async def process_event(db: AsyncSession, payload: EventPayload) -> EventRespons
     Process a single event according to domain rules and persist the component state.
     Returns an accepted/rejected response; does NOT raise for domain rejections.
     """
-    comp, act = _parse_event(payload)
-    log = log_context(
-        contract_number=payload.contract_number,
-        component=str(comp.value),
-        action=str(act.value),
-        created_at=str(payload.created_at),
-    )
-    log.info(f"Processing event: {payload.event_type} for contract {payload.contract_number}")
+    event = RuleEvent.from_type(payload.event_type, payload.event_date, payload.created_at)
+    # Audit rows store created_at normalized to UTC so point-in-time replays compare correctly
+    created_at = from_epoch_us(event.created_us)
+    component_type = COMPONENT_TYPES[event.component]
+    action = ACTIONS[event.action]
+    # Sampled, and formatted by loguru only if INFO is enabled; keyword
+    # arguments land in the record's extra like a log_context binding.
+    if should_log("event.processing"):
+        logger.info(
+            "Processing event: {} for contract {}",
+            payload.event_type,
+            payload.contract_number,
+            contract_number=payload.contract_number,
+            component=component_type.value,
+            action=action.value,
+            created_at=payload.created_at,
+        )
 
-    contract = await get_contract(db, payload.contract_number)
+    repo = get_repository()
+    contract = await lookup_contract(db, payload.contract_number)
     if contract is None:
-        resp = EventResponse(status="rejected", message=f"Contract {payload.contract_number} not found.")
-        if getattr(settings, "ENABLE_EVENT_AUDIT", False):
-            comp, act = _parse_event(payload)
-            await record_event(
-                db,
-                contract_id=None,
-                raw_type=payload.event_type,
-                component_type=comp,
-                action=act,
-                event_date=payload.event_date,
-                event_created_at=payload.created_at,
-                status=resp.status,
-                message=resp.message,
-            )
-        return resp
+        return await _reject(
+            db, payload, AuditReason.contract_not_found, None, component_type, action, created_at
+        )
 
-    component_type, action = _parse_event(payload)
     if component_type.value not in contract.components:
-        resp = EventResponse(
-            status="rejected",
-            message=f"Component {component_type.value} is not configured for contract {payload.contract_number}.",
+        return await _reject(
+            db, payload, AuditReason.component_not_configured, contract.id, component_type, action, created_at
         )
-        if getattr(settings, "ENABLE_EVENT_AUDIT", False):
-            await record_event(
-                db,
-                contract_id=contract.id,
-                raw_type=payload.event_type,
-                component_type=component_type,
-                action=action,
-                event_date=payload.event_date,
-                event_created_at=payload.created_at,
-                status=resp.status,
-                message=resp.message,
-            )
-        return resp
 
-    state = await get_component_state(db, contract.id, component_type)
+    state = await repo.get_component_state(db, contract.id, component_type)
 
     # Apply rules
-    if action == EventAction.start:
-        result = await _handle_start_event(db, contract.id, component_type, state, payload.event_date, payload.created_at)
-    else:
-        result = await _handle_end_event(db, contract.id, component_type, state, payload.event_date, payload.created_at)
-    if getattr(settings, "ENABLE_EVENT_AUDIT", False):
-        await record_event(
-            db,
-            contract_id=contract.id,
-            raw_type=payload.event_type,
-            component_type=component_type,
-            action=action,
-            event_date=payload.event_date,
-            event_created_at=payload.created_at,
-            status=result.status,
-            message=result.message,
-        )
-    return result
-
+    window = _window_from_state(state)
+    outcome = apply_event(window, event)
+    accepted = outcome is Outcome.accepted
+    reason = AuditReason(outcome)
+    audit = getattr(settings, "ENABLE_EVENT_AUDIT", False)
+    if accepted or audit:
+        # State, materialized timeline, checkpoint invalidation and audit row commit
+        # together, so readers never see them diverge
+        try:
+            if accepted:
+                await _persist_window(db, contract.id, component_type, event.action, window, commit=False)
+                if settings.ENABLE_MATERIALIZED_TIMELINES:
+                    await materialize_timeline(db, payload.contract_number, contract.id)
+            if audit:
+                if accepted:
+                    # A late event changes history from its created_at on
+                    await delete_checkpoints_from(db, contract.id, created_at)
+                await repo.record_event(
+                    db,
+                    contract_id=contract.id,
+                    raw_type=payload.event_type,
+                    component_type=component_type,
+                    action=action,
+                    event_date=payload.event_date,
+                    event_created_at=created_at,
+                    reason=reason,
+                    commit=False,
+                )
+            await db.commit()
+        except SQLAlchemyError:
+            await db.rollback()
+            raise
+    if accepted:
+        invalidate_timeline(payload.contract_number)
+        await publish_timeline_change(db, payload.contract_number)
+    return _response(reason, payload, component_type)
 
-def _parse_event(payload: EventPayload) -> Tuple[ComponentType, EventAction]:
-    component_type, action = resolve_component_action(payload.event_type)
-    return component_type, action
 
+async def process_events(db: AsyncSession, payloads: List[EventPayload]) -> List[EventResponse]:
+    """
+    Process events of one contract and component in the given order (the reorder
+    buffer passes them sorted by created_at) and return one response per event.
+    The contract and state are read once, the rules run over the window in memory,
+    each touched half of the state is written once and everything commits together.
+    """
+    if len(payloads) == 1:
+        return [await process_event(db, payloads[0])]
+    first = payloads[0]
+    events = [RuleEvent.from_type(p.event_type, p.event_date, p.created_at) for p in payloads]
+    component_type = COMPONENT_TYPES[events[0].component]
+    if should_log("event.processing"):
+        logger.info(
+            "Processing {} events for contract {}",
+            len(payloads),
+            first.contract_number,
+            contract_number=first.contract_number,
+            component=component_type.value,
+        )
 
-async def _handle_start_event(
-    db: AsyncSession,
-    contract_id,
-    component_type: ComponentType,
-    state,
-    start_date: date,
-    created_at,
-) -> EventResponse:
-    # Normalize to timezone-aware UTC to avoid naive/aware comparison issues
-    created_at_aware = _to_aware_utc(created_at)
-    # Reject restart attempts: start after a recorded end
-    if state and state.end_event_created_at is not None:
-        existing_end_ca = _to_aware_utc(state.end_event_created_at)
-        if created_at_aware > existing_end_ca:
-            return EventResponse(
-                status="rejected",
-                message="Start event that comes after the end event should be rejected.",
+    repo = get_repository()
+    contract = await lookup_contract(db, first.contract_number)
+    if contract is None or component_type.value not in contract.components:
+        reason = AuditReason.contract_not_found if contract is None else AuditReason.component_not_configured
+        return [
+            await _reject(
+                db, payload, reason, None if contract is None else contract.id,
+                component_type, ACTIONS[event.action], from_epoch_us(event.created_us),
             )
-        # If created_at < existing end created_at, this is an earlier start; allowed.
-
-    # Duplicate or older start events should not overwrite
-    if state and state.start_event_created_at is not None:
-        existing_start_ca = _to_aware_utc(state.start_event_created_at)
-        if created_at_aware <= existing_start_ca:
-            return EventResponse(
-                status="rejected",
-                message="Start event ignored: older or equal to existing start event.",
+            for payload, event in zip(payloads, events)
+        ]
+
+    state = await repo.get_component_state(db, contract.id, component_type)
+    window = _window_from_state(state)
+    outcomes = [apply_event(window, event) for event in events]
+    accepted = [event for event, outcome in zip(events, outcomes) if outcome is Outcome.accepted]
+    try:
+        # Each touched half once, both in a single upsert when the batch changed both
+        touched = {event.action for event in accepted}
+        halves = {}
+        if Action.start in touched:
+            halves.update(start_date=window.start_date, start_event_created_at=from_epoch_us(window.start_us))
+        if Action.end in touched:
+            halves.update(end_date=window.end_date, end_event_created_at=from_epoch_us(window.end_us))
+        if halves:
+            await repo.upsert_component_state(
+                db, contract_id=contract.id, component_type=component_type, commit=False, **halves
             )
+        if accepted and settings.ENABLE_MATERIALIZED_TIMELINES:
+            await materialize_timeline(db, first.contract_number, contract.id)
+        if getattr(settings, "ENABLE_EVENT_AUDIT", False):
+            if accepted:
+                earliest = from_epoch_us(min(event.created_us for event in accepted))
+                await delete_checkpoints_from(db, contract.id, earliest)
+            for payload, event, outcome in zip(payloads, events, outcomes):
+                await repo.record_event(
+                    db,
+                    contract_id=contract.id,
+                    raw_type=payload.event_type,
+                    component_type=component_type,
+                    action=ACTIONS[event.action],
+                    event_date=payload.event_date,
+                    event_created_at=from_epoch_us(event.created_us),
+                    reason=AuditReason(outcome),
+                    commit=False,
+                )
+        await db.commit()
+    except SQLAlchemyError:
+        await db.rollback()
+        raise
+    if accepted:
+        invalidate_timeline(first.contract_number)
+        await publish_timeline_change(db, first.contract_number)
+    return [_response(AuditReason(outcome), payload, component_type) for payload, outcome in zip(payloads, outcomes)]
+
+
+async def _flush_reordered(key, payloads: List[EventPayload]) -> List[EventResponse]:
+    contract_number, _component = key
+    async with session_maker_for(contract_number)() as db:
+        return await process_events(db, payloads)
+
+
+# Optional reordering window per (contract, component); 0 ms processes each event at once
+event_reorder = ReorderBuffer(
+    settings.EVENT_REORDER_WINDOW_MS / 1000, settings.EVENT_REORDER_MAX_PENDING, _flush_reordered
+)
+
+
+async def submit_event(payload: EventPayload) -> EventResponse:
+    """Process the event through the reorder window, on its own session."""
+    event = RuleEvent.from_type(payload.event_type, payload.event_date, payload.created_at)
+    return await event_reorder.submit((payload.contract_number, event.component), event.created_us, payload)
 
-    await upsert_component_state(
-        db,
-        contract_id=contract_id,
-        component_type=component_type,
-        start_date=start_date,
-        start_event_created_at=created_at_aware,
+
+def _response(reason: AuditReason, payload: EventPayload, component_type: ComponentType) -> EventResponse:
+    return EventResponse(
+        status=audit_status(reason),
+        message=audit_message(reason, contract_number=payload.contract_number, component_type=component_type),
     )
-    return EventResponse(status="accepted", message="Event processed successfully.")
 
 
-async def _handle_end_event(
+async def _reject(
     db: AsyncSession,
+    payload: EventPayload,
+    reason: AuditReason,
     contract_id,
     component_type: ComponentType,
-    state,
-    end_date: date,
-    created_at,
+    action: EventAction,
+    created_at: datetime,
 ) -> EventResponse:
-    # Normalize to timezone-aware UTC
-    created_at_aware = _to_aware_utc(created_at)
-    # Must have a start recorded before this end
-    if state is None or state.start_event_created_at is None:
-        return EventResponse(
-            status="rejected",
-            message="End event without a start event should be rejected.",
-        )
-
-    # Created_at ordering: end must come after start
-    existing_start_ca = _to_aware_utc(state.start_event_created_at)
-    if created_at_aware <= existing_start_ca:
-        return EventResponse(
-            status="rejected",
-            message="End event cannot occur before start event.",
+    """Rejection decided before the rules run (unknown contract or component)."""
+    if getattr(settings, "ENABLE_EVENT_AUDIT", False):
+        await get_repository().record_event(
+            db,
+            contract_id=contract_id,
+            raw_type=payload.event_type,
+            component_type=component_type,
+            action=action,
+            event_date=payload.event_date,
+            event_created_at=created_at,
+            reason=reason,
+            # Without a contract row the number is the only record of who sent it
+            contract_number=payload.contract_number if contract_id is None else None,
         )
+    return _response(reason, payload, component_type)
 
-    # Duplicate or older end events should not overwrite
-    if state.end_event_created_at is not None:
-        existing_end_ca = _to_aware_utc(state.end_event_created_at)
-        if created_at_aware <= existing_end_ca:
-            return EventResponse(
-                status="rejected",
-                message="End event ignored: older or equal to existing end event.",
-            )
-
-    # Validate date ordering (end date must not be before start date)
-    if state.start_date is not None and end_date < state.start_date:
-        return EventResponse(
-            status="rejected",
-            message="End event cannot occur before start event.",
-        )
 
-    await upsert_component_state(
-        db,
-        contract_id=contract_id,
-        component_type=component_type,
-        end_date=end_date,
-        end_event_created_at=created_at_aware,
+def _window_from_state(state: Optional[Union[ComponentState, ComponentStateRow]]) -> ComponentWindow:
+    if state is None:
+        return ComponentWindow()
+    return ComponentWindow(
+        start_date=state.start_date,
+        start_us=None if state.start_event_created_at is None else to_epoch_us(state.start_event_created_at),
+        end_date=state.end_date,
+        end_us=None if state.end_event_created_at is None else to_epoch_us(state.end_event_created_at),
     )
-    return EventResponse(status="accepted", message="Event processed successfully.")
 
 
-def _to_aware_utc(dt: datetime | None) -> datetime | None:
-    if dt is None:
-        return None
-    if dt.tzinfo is None:
-        return dt.replace(tzinfo=timezone.utc)
-    return dt.astimezone(timezone.utc)
-
+async def _persist_window(
+    db: AsyncSession,
+    contract_id,
+    component_type: ComponentType,
+    action: Action,
+    window: ComponentWindow,
+    commit: bool = True,
+) -> None:
+    # Only the half of the window touched by the accepted event is written
+    if action is Action.start:
+        await get_repository().upsert_component_state(
+            db,
+            contract_id=contract_id,
+            component_type=component_type,
+            start_date=window.start_date,
+            start_event_created_at=from_epoch_us(window.start_us),
+            commit=commit,
+        )
+    else:
+        await get_repository().upsert_component_state(
+            db,
+            contract_id=contract_id,
+            component_type=component_type,
+            end_date=window.end_date,
+            end_event_created_at=from_epoch_us(window.end_us),
+            commit=commit,
+        )
@@ -0,0 +1,146 @@
+"""
+Background purge of deleted contracts.
+
+DELETE /contract/{n} only tombstones the contract (contract.deleted_at), so the
+request never holds the write lock for longer than one row update. This task
+then removes each tombstoned contract's audit rows, checkpoints and states in
+chunks of `chunk_rows`, one short transaction per chunk with a pause between
+chunks so event writes interleave, and finally the contract row itself.
+Progress is logged per contract and reported under "contract_purge" in /metrics.
+
+Every worker runs the task, but only the holder of a database's "contract_purge"
+lease purges it: the lease is taken at the start of a pass and renewed inside
+every chunk's transaction, so a chunk never commits once another worker took it.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.db.crud.contract import count_deleted_contracts, list_deleted_contracts, purge_contract_chunk
+from app.db.crud.lease import acquire_lease
+
+# Tombstones picked up per pass and database
+_BATCH_CONTRACTS = 100
+_LEASE = "contract_purge"
+
+
+def _session(engine: AsyncEngine) -> AsyncSession:
+    return AsyncSession(bind=engine, expire_on_commit=False, autoflush=False)
+
+
+class ContractPurger:
+    def __init__(self) -> None:
+        self.pending = 0
+        self.purged_contracts = 0
+        self.purged_rows = 0
+        self.current: Dict[str, Any] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending,
+            "purged_contracts": self.purged_contracts,
+            "purged_rows": self.purged_rows,
+            "current": dict(self.current) or None,
+        }
+
+    def notify(self) -> None:
+        """Start the next pass now instead of at the next interval."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _hold_lease(self, engine: AsyncEngine, lease_s: float) -> bool:
+        async with _session(engine) as db:
+            held = await acquire_lease(db, _LEASE, self.holder, ttl_s=lease_s)
+            await db.commit()
+        return held
+
+    async def purge_contract(
+        self, engine: AsyncEngine, contract_id, contract_number: str, *, chunk_rows: int, pause_s: float,
+        lease_s: float,
+    ) -> Optional[int]:
+        """Rows removed, or None when the lease went to another worker before the contract was gone."""
+        started = time.perf_counter()
+        rows = 0
+        self.current = {"contract_number": contract_number, "rows": 0}
+        while True:
+            async with _session(engine) as db:
+                if not await acquire_lease(db, _LEASE, self.holder, ttl_s=lease_s):
+                    self.current = {}
+                    logger.info("Contract purge lease lost after {} rows of {}", rows, contract_number)
+                    return None
+                deleted = await purge_contract_chunk(db, contract_id, contract_number, limit=chunk_rows)
+                await db.commit()
+            if not deleted:
+                break
+            rows += deleted
+            self.purged_rows += deleted
+            self.current["rows"] = rows
+            await asyncio.sleep(pause_s)
+        self.current = {}
+        self.purged_contracts += 1
+        self.pending = max(self.pending - 1, 0)
+        logger.info(
+            "Purged deleted contract {}: {} rows in {:.1f}s", contract_number, rows, time.perf_counter() - started
+        )
+        return rows
+
+    async def purge_once(
+        self, engines: List[AsyncEngine], *, chunk_rows: int, pause_s: float = 0.0, lease_s: float = 30.0
+    ) -> int:
+        """
+        Purge every contract tombstoned so far in the databases whose lease this
+        worker holds; returns the number of contracts removed.
+        """
+        purged = 0
+        for engine in engines:
+            if await self._hold_lease(engine, lease_s):
+                purged += await self._purge_database(engine, chunk_rows=chunk_rows, pause_s=pause_s, lease_s=lease_s)
+        return purged
+
+    async def _purge_database(self, engine: AsyncEngine, *, chunk_rows: int, pause_s: float, lease_s: float) -> int:
+        purged = 0
+        while True:
+            async with _session(engine) as db:
+                self.pending = await count_deleted_contracts(db)
+                batch = await list_deleted_contracts(db, _BATCH_CONTRACTS)
+            if not batch:
+                return purged
+            for contract_id, contract_number in batch:
+                rows = await self.purge_contract(
+                    engine, contract_id, contract_number, chunk_rows=chunk_rows, pause_s=pause_s, lease_s=lease_s
+                )
+                if rows is None:
+                    return purged
+                purged += 1
+
+    async def run(
+        self, engines: List[AsyncEngine], *, interval_s: float, chunk_rows: int, pause_s: float, lease_s: float
+    ) -> None:
+        """Lifespan background task: a pass on every notify() and at least every `interval_s`."""
+        # Bound to the running loop here, not at import
+        self._wakeup = asyncio.Event()
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.purge_once(engines, chunk_rows=chunk_rows, pause_s=pause_s, lease_s=lease_s)
+            except (SQLAlchemyError, OSError) as exc:
+                # Resumes where it stopped: every committed chunk is final
+                logger.warning("Contract purge pass failed, retrying later: {}", exc)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval_s)
+            except asyncio.TimeoutError:
+                pass
+
+
+contract_purger = ContractPurger()
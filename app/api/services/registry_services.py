@@ -0,0 +1,110 @@
+"""
+Contract lookups for event processing from the host-wide shared registry.
+
+With CONTRACT_REGISTRY_ENABLED every worker maps the same file, so a contract
+read from the database by one worker is a memory read for all of them, and a
+deletion removes it for all of them at once. The registry only holds contract
+id and components; anything else still comes from the database.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import uuid
+from typing import Iterable, Tuple
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.repository import get_repository
+from app.domain.enums import ComponentType
+from app.infra.registry import SharedRegistry
+
+contract_registry = SharedRegistry()
+
+_BIT = {component.value: 1 << index for index, component in enumerate(ComponentType)}
+# Component values per bitmask, built once so a hit allocates no list
+_COMPONENTS = [
+    tuple(value for value, bit in _BIT.items() if mask & bit) for mask in range(1 << len(_BIT))
+]
+
+
+class RegisteredContract:
+    """The part of a contract the event rules need, as read from the registry."""
+
+    __slots__ = ("id", "contract_number", "components")
+
+    def __init__(self, id: uuid.UUID, contract_number: str, components: Tuple[str, ...]):
+        self.id = id
+        self.contract_number = contract_number
+        self.components = components
+
+
+def _mask(components: Iterable) -> int:
+    return sum(_BIT[getattr(component, "value", component)] for component in set(components))
+
+
+def registry_path() -> str:
+    """CONTRACT_REGISTRY_PATH, else a file in /dev/shm (or the temp dir) named after the database."""
+    if settings.CONTRACT_REGISTRY_PATH:
+        return settings.CONTRACT_REGISTRY_PATH
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    digest = hashlib.sha1(f"{settings.ASYNC_DATABASE_URL}|{settings.DB_SHARD_COUNT}".encode()).hexdigest()[:12]
+    return os.path.join(directory, f"eo-contracts-{digest}.registry")
+
+
+def open_contract_registry() -> None:
+    """Map the registry at worker startup, keeping what the other workers stored."""
+    try:
+        contract_registry.open(registry_path(), settings.CONTRACT_REGISTRY_SLOTS)
+    except OSError as exc:
+        logger.warning("Contract registry unavailable, contracts are read from the database: {}", exc)
+        return
+    logger.info("Contract registry mapped at {} ({} slots)", contract_registry.path, contract_registry.capacity)
+
+
+def reset_contract_registry() -> None:
+    """
+    Empty the registry once per deployment, before any worker starts, so contract
+    changes made outside the API while the service was down are not served.
+    """
+    registry = SharedRegistry()
+    try:
+        registry.open(registry_path(), settings.CONTRACT_REGISTRY_SLOTS)
+    except OSError as exc:
+        logger.warning("Contract registry not reset: {}", exc)
+        return
+    try:
+        registry.clear()
+    finally:
+        registry.close()
+
+
+async def lookup_contract(db: AsyncSession, contract_number: str):
+    """The live contract (id and components at least) or None; registry first, then the database."""
+    if not contract_registry.opened:
+        return await get_repository().get_contract(db, contract_number)
+    hit = contract_registry.get(contract_number)
+    if hit is not None:
+        contract_id, mask = hit
+        return RegisteredContract(contract_id, contract_number, _COMPONENTS[mask])
+    # Read before the query: a deletion committed meanwhile must not be undone by the fill
+    generation = contract_registry.generation
+    contract = await get_repository().get_contract(db, contract_number)
+    if contract is not None:
+        contract_registry.put(contract_number, contract.id, _mask(contract.components), generation=generation)
+    return contract
+
+
+def register_contract(contract_number: str, contract_id: uuid.UUID, components: Iterable, generation: int) -> None:
+    """After a creation commits; `generation` as read before the insert."""
+    if contract_registry.opened:
+        contract_registry.put(contract_number, contract_id, _mask(components), generation=generation)
+
+
+def unregister_contract(contract_number: str) -> None:
+    """After a deletion commits, for every worker on the host."""
+    if contract_registry.opened:
+        contract_registry.remove(contract_number)
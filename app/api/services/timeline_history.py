@@ -0,0 +1,187 @@
+"""
+Point-in-time timelines: a contract's timeline as of an event created_at.
+
+The state as of T is folded from the contract's accepted audit rows with
+event_created_at <= T. Accepted starts (and ends) of a component always carry
+increasing created_at, so applying them in created_at order reproduces the
+recorded outcomes without re-running the rules. Checkpoints store the folded
+state every TIMELINE_CHECKPOINT_INTERVAL rows; a read replays only the rows
+after the nearest checkpoint, so reads cost at most one interval of rows
+whatever the history length. Reads never write: one that passes a due
+checkpoint hands the contract to `timeline_checkpointer`, which stores the
+checkpoints in the background, so GETs do not queue behind event writes for
+the database write lock.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.schemas.error import ErrorResponse
+from app.config import settings
+from app.db.crud.event import list_accepted_events
+from app.db.crud.timeline_checkpoint import add_checkpoints, get_checkpoint_before
+from app.db.models.models import utc_now
+from app.db.repository import get_repository
+from app.db.session import session_maker_for
+from app.domain.enums import EventAction
+from app.domain.rules import COMPONENT_TYPES, Component, ComponentWindow, ContractState, from_epoch_us, to_epoch_us
+from app.dto.timeline import TimelineComponentWindow, TimelineResponse
+
+
+def _windows_to_json(state: ContractState) -> list:
+    return [
+        None if w is None else [
+            None if w.start_date is None else w.start_date.isoformat(), w.start_us,
+            None if w.end_date is None else w.end_date.isoformat(), w.end_us,
+        ]
+        for w in state.windows
+    ]
+
+
+def _state_from_json(windows: Sequence) -> ContractState:
+    state = ContractState()
+    for code, w in enumerate(windows):
+        if w is not None:
+            start_date, start_us, end_date, end_us = w
+            state.windows[code] = ComponentWindow(
+                None if start_date is None else date.fromisoformat(start_date), start_us,
+                None if end_date is None else date.fromisoformat(end_date), end_us,
+            )
+    return state
+
+
+def fold_accepted_events(
+    state: ContractState, rows: Sequence[tuple], interval: int
+) -> List[Tuple[datetime, list, int]]:
+    """
+    Apply accepted audit rows (oldest first) to `state` in place. Returns the
+    (as_of, windows, rows folded so far) checkpoints due every `interval` rows;
+    a checkpoint is only placed after the last row sharing its created_at.
+    """
+    checkpoints: List[Tuple[datetime, list, int]] = []
+    pending = 0
+    for i, (component_type, action, event_date, created_at) in enumerate(rows):
+        window = state.window(Component[component_type.name])
+        if action is EventAction.start:
+            window.start_date, window.start_us = event_date, to_epoch_us(created_at)
+        else:
+            window.end_date, window.end_us = event_date, to_epoch_us(created_at)
+        pending += 1
+        if interval > 0 and pending >= interval and (i + 1 == len(rows) or rows[i + 1][3] != created_at):
+            checkpoints.append((created_at, _windows_to_json(state), i + 1))
+            pending = 0
+    return checkpoints
+
+
+async def replay_contract_state(
+    db: AsyncSession, contract_id, as_of: datetime, *, interval: Optional[int] = None
+) -> Tuple[ContractState, bool]:
+    """Contract state as of `as_of` (read only), and whether the replay passed a due checkpoint."""
+    interval = settings.TIMELINE_CHECKPOINT_INTERVAL if interval is None else interval
+    # Audit rows store UTC wall time; compare on the same basis
+    as_of = from_epoch_us(to_epoch_us(as_of))
+    checkpoint = await get_checkpoint_before(db, contract_id, as_of)
+    state = ContractState() if checkpoint is None else _state_from_json(checkpoint.windows)
+    rows = await list_accepted_events(
+        db, contract_id, after=None if checkpoint is None else checkpoint.as_of, until=as_of
+    )
+    return state, bool(fold_accepted_events(state, rows, interval))
+
+
+async def write_due_checkpoints(db: AsyncSession, contract_id, *, interval: Optional[int] = None) -> int:
+    """
+    Replay the contract's whole history from its latest checkpoint and store the
+    checkpoints due on the way; returns how many were due. The insert re-checks
+    what was replayed, so one made stale by a late event meanwhile is not stored.
+    """
+    interval = settings.TIMELINE_CHECKPOINT_INTERVAL if interval is None else interval
+    if interval <= 0:
+        return 0
+    now = from_epoch_us(to_epoch_us(utc_now()))
+    checkpoint = await get_checkpoint_before(db, contract_id, now)
+    base = None if checkpoint is None else checkpoint.as_of
+    state = ContractState() if checkpoint is None else _state_from_json(checkpoint.windows)
+    rows = await list_accepted_events(db, contract_id, after=base, until=now)
+    checkpoints = fold_accepted_events(state, rows, interval)
+    if checkpoints:
+        try:
+            await add_checkpoints(db, contract_id, checkpoints, base=base)
+            await db.commit()
+        except SQLAlchemyError:
+            await db.rollback()
+            raise
+    return len(checkpoints)
+
+
+class CheckpointWriter:
+    """
+    Background writes of the checkpoints `?as_of=` reads found due: one task per
+    contract at a time, at most `max_pending` at once (beyond that a read just
+    leaves the checkpoint to a later one).
+    """
+
+    def __init__(self, max_pending: int = 64) -> None:
+        self.max_pending = max_pending
+        self._tasks: Dict[Any, asyncio.Task] = {}
+        self.written = 0
+        self.dropped = 0
+
+    def schedule(self, contract_number: str, contract_id) -> None:
+        if contract_id in self._tasks:
+            return
+        if len(self._tasks) >= self.max_pending:
+            self.dropped += 1
+            return
+        task = asyncio.create_task(self._write(contract_number, contract_id))
+        self._tasks[contract_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(contract_id, None))
+
+    async def _write(self, contract_number: str, contract_id) -> None:
+        try:
+            async with session_maker_for(contract_number)() as db:
+                self.written += await write_due_checkpoints(db, contract_id)
+        except (SQLAlchemyError, OSError) as exc:
+            # Only an optimization; the next read schedules it again
+            logger.warning("Checkpoint write for contract {} failed: {}", contract_number, exc)
+
+    async def drain(self) -> None:
+        """Wait for the writes in flight; called on shutdown."""
+        await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending": len(self._tasks), "written": self.written, "dropped": self.dropped}
+
+
+timeline_checkpointer = CheckpointWriter()
+
+
+async def get_contract_timeline_as_of(
+    db: AsyncSession, contract_number: str, as_of: datetime
+) -> TimelineResponse:
+    if not settings.ENABLE_EVENT_AUDIT:
+        raise HTTPException(
+            status_code=400,
+            detail=ErrorResponse(
+                code="bad_request", message="Point-in-time timelines need the event audit (ENABLE_EVENT_AUDIT)."
+            ).model_dump(),
+        )
+    contract = await get_repository().get_contract(db, contract_number)
+    if contract is None:
+        raise HTTPException(status_code=404, detail=f"Contract {contract_number} not found")
+
+    state, checkpoint_due = await replay_contract_state(db, contract.id, as_of)
+    if checkpoint_due:
+        timeline_checkpointer.schedule(contract_number, contract.id)
+    components = {
+        COMPONENT_TYPES[code]: TimelineComponentWindow(start=w.start_date, end=w.end_date)
+        for code, w in enumerate(state.windows)
+        if w is not None
+    }
+    return TimelineResponse(contract_number=contract_number, components=components)
@@ -1,26 +1,65 @@
 from __future__ import annotations
 
-from typing import Dict
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 from fastapi import HTTPException
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.crud.component_state import list_component_states
-from app.db.crud.contract import get_contract
+from app.api.schemas.error import ErrorResponse
+from app.config import settings
+from app.db.crud.component_state import list_changes_since, list_component_states_for_contracts
+from app.db.crud.contract import get_contract_numbers, list_deletions_since
+from app.db.crud.timeline_document import get_timeline_document, put_timeline_document
+from app.db.repository import get_repository
+from app.db.session import ShardSessions
 from app.domain.enums import ComponentType
-from app.dto.timeline import TimelineComponentWindow, TimelineResponse
+from app.dto.timeline import (
+    TimelineChange,
+    TimelineChangesResponse,
+    TimelineComponentWindow,
+    TimelineResponse,
+)
+from app.infra.logging import should_log
+from app.infra.pubsub import FanoutHub, Subscription
+from app.infra.singleflight import SingleFlight
+
+# Concurrent reads of one contract's timeline share a single DB round trip
+_timeline_flights: SingleFlight[TimelineResponse] = SingleFlight(ttl=settings.TIMELINE_CACHE_TTL_MS / 1000)
+
+# Push channel for timeline changes; topics are contract numbers
+timeline_hub = FanoutHub(buffer_size=settings.TIMELINE_STREAM_BUFFER)
 
 
 async def get_contract_timeline(
     db: AsyncSession, contract_number: str
 ) -> TimelineResponse:
-    logger.info(f"Building timeline for contract {contract_number}")
-    contract = await get_contract(db, contract_number)
+    return await _timeline_flights.do(contract_number, lambda: _build_timeline(db, contract_number))
+
+
+def timeline_cache_enabled() -> bool:
+    return _timeline_flights.ttl > 0
+
+
+def invalidate_timeline(contract_number: str) -> None:
+    """Call whenever a contract's component states change or the contract goes away."""
+    _timeline_flights.invalidate(contract_number)
+
+
+async def _build_timeline(db: AsyncSession, contract_number: str) -> TimelineResponse:
+    if should_log("timeline.read"):
+        logger.info("Building timeline for contract {}", contract_number)
+    repo = get_repository()
+    contract = await repo.get_contract(db, contract_number)
     if contract is None:
         raise HTTPException(status_code=404, detail=f"Contract {contract_number} not found")
 
-    states = await list_component_states(db, contract.id)
+    states = await repo.list_component_states(db, contract.id)
+    return timeline_from_states(contract_number, states)
+
+
+def timeline_from_states(contract_number: str, states) -> TimelineResponse:
     components: Dict[ComponentType, TimelineComponentWindow] = {}
     for state in states:
         components[state.component_type] = TimelineComponentWindow(
@@ -30,3 +69,142 @@ async def get_contract_timeline(
     return TimelineResponse(contract_number=contract_number, components=components)
 
 
+def serialize_timeline(timeline: TimelineResponse) -> bytes:
+    """The exact bytes the timeline endpoint would send for this timeline."""
+    return timeline.model_dump_json().encode()
+
+
+async def materialize_timeline(db: AsyncSession, contract_number: str, contract_id) -> None:
+    """Rewrite the contract's stored timeline document; the caller commits."""
+    states = await get_repository().list_component_states(db, contract_id)
+    document = serialize_timeline(timeline_from_states(contract_number, states))
+    await put_timeline_document(
+        db, contract_number=contract_number, contract_id=contract_id, document=document
+    )
+
+
+async def read_timeline_document(db: AsyncSession, contract_number: str) -> Optional[bytes]:
+    """Stored timeline bytes, or None when materialization is off or the contract has no document yet."""
+    if not settings.ENABLE_MATERIALIZED_TIMELINES:
+        return None
+    return await get_timeline_document(db, contract_number)
+
+
+async def get_timeline_changes(
+    sessions: ShardSessions, cursor: str, limit: int
+) -> TimelineChangesResponse:
+    """
+    Timelines of contracts whose states changed after `cursor`. The cursor holds
+    one change sequence per shard ("12.40.7"; plain "0" starts from scratch)
+    and each shard returns at most `limit` changes.
+    """
+    since = _parse_cursor(cursor, sessions.shard_count)
+    pages = await asyncio.gather(
+        *(_shard_changes(db, seq, limit) for db, seq in zip(sessions.all(), since))
+    )
+    items = [item for page_items, _ in pages for item in page_items]
+    if len(pages) > 1:
+        items.sort(key=lambda item: item.seq)
+    return TimelineChangesResponse(
+        items=items, next_cursor=".".join(str(next_seq) for _, next_seq in pages)
+    )
+
+
+def _parse_cursor(cursor: str, shard_count: int) -> List[int]:
+    try:
+        since = [int(part) for part in cursor.split(".")]
+    except ValueError:
+        since = []
+    if since == [0]:
+        return [0] * shard_count
+    if len(since) != shard_count or min(since) < 0:
+        raise HTTPException(
+            status_code=400,
+            detail=ErrorResponse(code="bad_request", message=f"Invalid changes cursor {cursor!r}.").model_dump(),
+        )
+    return since
+
+
+async def _shard_changes(
+    db: AsyncSession, since: int, limit: int
+) -> Tuple[List[TimelineChange], int]:
+    # All queries are index scans: the sequence indexes for the page, then the
+    # contract index for the touched contracts' states.
+    changes = await list_changes_since(db, since, limit)
+    deletions = await list_deletions_since(db, since, limit)
+    # Both are in sequence order; the page is the first `limit` of the two together
+    page = sorted(
+        [(seq, contract_id, None) for contract_id, seq in changes]
+        + [(seq, None, number) for number, seq in deletions],
+        key=lambda entry: entry[0],
+    )[:limit]
+    if not page:
+        return [], since
+
+    latest_seq: Dict = {}
+    deleted_items = []
+    for seq, contract_id, number in page:
+        if contract_id is None:
+            deleted_items.append(TimelineChange(contract_number=number, components={}, seq=seq, deleted=True))
+        else:
+            latest_seq[contract_id] = seq
+    numbers = await get_contract_numbers(db, latest_seq)
+    components: Dict = {contract_id: {} for contract_id in latest_seq}
+    for state in await list_component_states_for_contracts(db, latest_seq):
+        components[state.contract_id][state.component_type] = TimelineComponentWindow(
+            start=state.start_date, end=state.end_date
+        )
+
+    items = [
+        TimelineChange(contract_number=numbers[contract_id], components=components[contract_id], seq=seq)
+        for contract_id, seq in latest_seq.items()
+        if contract_id in numbers
+    ]
+    items.extend(deleted_items)
+    items.sort(key=lambda item: item.seq)
+    return items, page[-1][0]
+
+
+def _sse_message(timeline: TimelineResponse) -> str:
+    return f"event: timeline\ndata: {timeline.model_dump_json()}\n\n"
+
+
+async def publish_timeline_change(db: AsyncSession, contract_number: str) -> None:
+    """Push the contract's current timeline to stream subscribers, if there are any."""
+    if not timeline_hub.has_subscribers(contract_number):
+        return
+    timeline = await get_contract_timeline(db, contract_number)
+    timeline_hub.publish(contract_number, _sse_message(timeline))
+
+
+async def open_timeline_stream(
+    db: Optional[AsyncSession], contract_number: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Subscribe to one contract's timeline (or to all contracts when None) and
+    return the SSE body. A single-contract stream starts with the current
+    timeline, so a missing contract is reported as 404 before streaming.
+    """
+    snapshot = None
+    if contract_number is not None:
+        snapshot = _sse_message(await get_contract_timeline(db, contract_number))
+    sub = timeline_hub.subscribe(contract_number)
+    return _stream(sub, snapshot)
+
+
+async def _stream(sub: Subscription, snapshot: Optional[str]) -> AsyncIterator[str]:
+    try:
+        if snapshot is not None:
+            yield snapshot
+        while True:
+            try:
+                message = await asyncio.wait_for(sub.queue.get(), settings.TIMELINE_STREAM_HEARTBEAT_S)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if message is None:
+                # Evicted as a slow consumer; the client reconnects and resyncs
+                return
+            yield message
+    finally:
+        timeline_hub.unsubscribe(sub)
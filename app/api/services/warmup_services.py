@@ -0,0 +1,136 @@
+"""
+Worker warmup: pre-open pooled connections, run each hot read once and compile
+the component-state upserts, so the first real requests do not pay for
+connecting and statement compilation. The upserts are only prepared (through
+EXPLAIN), never executed, so workers starting together do not queue on the
+write lock.
+`readiness` flips to ready when warmup finishes; GET /health/ready reports it.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import select, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.api.services.registry_services import contract_registry, lookup_contract
+from app.api.services.timeline_services import get_contract_timeline, timeline_cache_enabled
+from app.db.crud.change_seq import ADVANCE_CHANGE_SEQ
+from app.db.crud.contract import get_contract_numbers
+from app.db.models.models import ComponentState
+from app.db.repository import get_repository
+from app.domain.enums import ComponentType
+
+# Never matches a real contract; only used to execute the statements
+_PROBE_NUMBER = "__warmup__"
+_PROBE_AT = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class Readiness:
+    def __init__(self) -> None:
+        self.ready = False
+        self.warmup_ms: Optional[float] = None
+        self.stats: Dict[str, Any] = {}
+
+    def reset(self) -> None:
+        self.__init__()
+
+    def mark_ready(self, warmup_ms: float, stats: Dict[str, Any]) -> None:
+        self.ready = True
+        self.warmup_ms = round(warmup_ms, 1)
+        self.stats = stats
+
+
+readiness = Readiness()
+
+
+async def _open_connections(engine: AsyncEngine, count: int) -> int:
+    # Held concurrently so the pool really creates `count` connections; returned
+    # connections stay pooled up to the pool size.
+    size = getattr(engine.sync_engine.pool, "size", None)
+    if callable(size):
+        count = min(count, size())
+    conns = [await engine.connect() for _ in range(count)]
+    try:
+        await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in conns))
+    finally:
+        for conn in conns:
+            await conn.close()
+    return len(conns)
+
+
+async def _run_hot_statements(db: AsyncSession) -> None:
+    repo = get_repository()
+    probe_id = uuid.uuid4()
+    await repo.get_contract(db, _PROBE_NUMBER)
+    await repo.get_component_state(db, probe_id, ComponentType.energy_supply)
+    await repo.list_component_states(db, probe_id)
+
+
+async def _prepare_upserts(db: AsyncSession) -> int:
+    # Compiled for the dialect, then parsed and planned by SQLite under EXPLAIN,
+    # which reads nothing and takes no lock; parameter values do not matter
+    statements = [
+        ADVANCE_CHANGE_SEQ,
+        *get_repository().upsert_statements(uuid.uuid4(), ComponentType.energy_supply, _PROBE_AT),
+    ]
+    conn = await db.connection()
+    for stmt in statements:
+        compiled = stmt.compile(dialect=conn.dialect)
+        await conn.exec_driver_sql(f"EXPLAIN {compiled}", (None,) * len(compiled.positiontup or ()))
+    await db.rollback()
+    return len(statements)
+
+
+async def _preload_contracts(db: AsyncSession, limit: int) -> int:
+    # Only into something that keeps them: the shared registry and the timeline cache
+    cache_timelines = timeline_cache_enabled()
+    if not (contract_registry.opened or cache_timelines):
+        return 0
+    # Most recently changed contracts, newest first, from the change_seq index
+    recent = await db.scalars(
+        select(ComponentState.contract_id)
+        .where(ComponentState.change_seq.is_not(None))
+        .order_by(ComponentState.change_seq.desc())
+        .limit(limit * len(ComponentType))
+    )
+    contract_ids = list(dict.fromkeys(recent))[:limit]
+    numbers = await get_contract_numbers(db, contract_ids)
+    for number in numbers.values():
+        if contract_registry.opened:
+            await lookup_contract(db, number)
+        if cache_timelines:
+            await get_contract_timeline(db, number)
+    return len(numbers)
+
+
+async def warm_up(engines: List[AsyncEngine], *, connections: int, preload_contracts: int = 0) -> Dict[str, Any]:
+    stats = {"connections": 0, "prepared_upserts": 0, "preloaded_contracts": 0}
+    for engine in engines:
+        if connections > 0:
+            stats["connections"] += await _open_connections(engine, connections)
+        async with AsyncSession(bind=engine, expire_on_commit=False, autoflush=False) as db:
+            await _run_hot_statements(db)
+            stats["prepared_upserts"] += await _prepare_upserts(db)
+            if preload_contracts > 0:
+                stats["preloaded_contracts"] += await _preload_contracts(db, preload_contracts)
+    return stats
+
+
+async def run_warmup(engines: List[AsyncEngine], *, connections: int, preload_contracts: int = 0) -> None:
+    """Lifespan background task; a failed warmup is logged and the worker still becomes ready."""
+    started = time.perf_counter()
+    stats: Dict[str, Any] = {}
+    try:
+        stats = await warm_up(engines, connections=connections, preload_contracts=preload_contracts)
+    except (SQLAlchemyError, OSError) as exc:
+        logger.warning("Warmup failed, serving cold: {}", exc)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    readiness.mark_ready(elapsed_ms, stats)
+    logger.info("Warmup completed in {:.1f} ms: {}", elapsed_ms, stats)
@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from typing import Literal, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -26,5 +27,103 @@ class Settings(BaseSettings):
 
     DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
 
+    # Data access on the hot paths: "orm" (ORM objects) or "core" (prebuilt Core
+    # statements returning slotted rows)
+    DB_REPOSITORY: Literal["orm", "core"] = "orm"
+
+    # Split storage over this many SQLite databases, routed by a stable hash of
+    # contract_number; ASYNC_DATABASE_URL may contain "{shard}" to name the files
+    DB_SHARD_COUNT: int = 1
+
+    # Logging: background writer thread, JSON lines, and per-type "keep 1 in N" sampling
+    # e.g. LOG_SAMPLE_RATES='{"event.processing": 100}'
+    LOG_ENQUEUE: bool = False
+    LOG_JSON: bool = False
+    LOG_SAMPLE_RATES: dict[str, int] = {}
+
+    # Timeline reads: concurrent requests are always coalesced; a result may also be
+    # reused for this long (0 disables). Accepted events invalidate the entry.
+    TIMELINE_CACHE_TTL_MS: float = 0.0
+
+    # Admission control for POST /event: concurrent requests allowed (0 disables;
+    # unset, the database pool size plus overflow) and requests allowed to wait;
+    # beyond that the endpoint answers 503 with Retry-After
+    EVENT_CONCURRENCY_LIMIT: Optional[int] = None
+    EVENT_QUEUE_LIMIT: int = 128
+    # Hold POST /event requests up to this long per (contract, component) and apply
+    # them sorted by created_at, so an end delivered before its start is not
+    # rejected (0 disables); at most EVENT_REORDER_MAX_PENDING events are held
+    EVENT_REORDER_WINDOW_MS: float = 0.0
+    EVENT_REORDER_MAX_PENDING: int = 10000
+    # POST /event reads contracts from a registry shared by the workers on this host
+    # (a memory-mapped hash table of CONTRACT_REGISTRY_SLOTS slots, emptied by the
+    # launcher before workers start; misses fall back to the database). "" places
+    # the file in /dev/shm, named after the database URL
+    CONTRACT_REGISTRY_ENABLED: bool = False
+    CONTRACT_REGISTRY_PATH: str = ""
+    CONTRACT_REGISTRY_SLOTS: int = 65536
+
+    # Keep a pre-serialized timeline per contract, written with each accepted event,
+    # and serve the timeline endpoint from it
+    ENABLE_MATERIALIZED_TIMELINES: bool = False
+
+    # Point-in-time timelines (?as_of=) store a state checkpoint every this many
+    # replayed audit rows per contract (0 disables checkpoints)
+    TIMELINE_CHECKPOINT_INTERVAL: int = 256
+
+    # Timeline SSE streams: per-subscriber buffer (a full buffer evicts the subscriber)
+    # and the interval of keep-alive comments on idle streams
+    TIMELINE_STREAM_BUFFER: int = 16
+    TIMELINE_STREAM_HEARTBEAT_S: float = 15.0
+
+    # Store component_state start/end_event_created_at as integer epoch microseconds
+    # instead of DATETIME text; run `python -m app.tools.compact_timestamps` when switching
+    COMPACT_EVENT_TIMESTAMPS: bool = False
+
+    # HTTP compression: responses of at least COMPRESSION_MIN_SIZE bytes are sent
+    # zstd (with the `compression` extra) or gzip as the client accepts; gzip/zstd
+    # request bodies are decoded on POST /event up to COMPRESSION_MAX_REQUEST_BYTES
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    COMPRESSION_MAX_REQUEST_BYTES: int = 1024 * 1024
+
+    # `python -m app` server: worker processes (0 = one per CPU; SSE streams and
+    # in-process caches are per worker), event loop and HTTP parser ("auto" uses
+    # uvloop / httptools when installed), keep-alive, listen backlog and the time
+    # in-flight requests get to finish on shutdown
+    SERVER_HOST: str = "127.0.0.1"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 1
+    SERVER_LOOP: Literal["auto", "asyncio", "uvloop"] = "auto"
+    SERVER_HTTP: Literal["auto", "h11", "httptools"] = "auto"
+    SERVER_KEEP_ALIVE_S: int = 5
+    SERVER_BACKLOG: int = 2048
+    SERVER_GRACEFUL_SHUTDOWN_S: int = 30
+    SERVER_ACCESS_LOG: bool = False
+
+    # Startup: apply pending migrations at boot instead of failing (dev convenience only)
+    DB_AUTO_MIGRATE: bool = False
+    # Startup time above this is logged as a warning
+    STARTUP_BUDGET_MS: float = 500.0
+    # Deleted contracts are tombstoned at once and purged by a background task:
+    # this many dependent rows per transaction, with a pause between chunks so
+    # event writes interleave; a pass also runs every PURGE_INTERVAL_S seconds.
+    # One worker per database purges at a time, holding a lease renewed with
+    # every chunk; a crashed holder's lease is taken over after PURGE_LEASE_S
+    PURGE_ENABLED: bool = True
+    PURGE_CHUNK_ROWS: int = 1000
+    PURGE_PAUSE_MS: int = 10
+    PURGE_INTERVAL_S: float = 60.0
+    PURGE_LEASE_S: float = 30.0
+    # Warmup after startup (GET /health/ready reports 503 until done): pooled
+    # connections to pre-open per database, and how many of the most recently
+    # changed contracts to load into the contract registry and the timeline
+    # cache, where those are enabled (0 disables each)
+    WARMUP_ENABLED: bool = True
+    WARMUP_CONNECTIONS: int = 4
+    WARMUP_PRELOAD_CONTRACTS: int = 0
+
 
 settings = Settings()
@@ -0,0 +1,35 @@
+"""
+The per-database change counter: every component_state write and contract
+deletion advances it and stamps the new value, so the changes feed cursor only
+ever moves forward, also past purged rows.
+"""
+from __future__ import annotations
+
+from typing import Union
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.db.models.models import ChangeSequence
+
+_COUNTER = ChangeSequence.__table__
+_ADVANCE = sqlite_insert(_COUNTER).values(id=1, value=bindparam("count"))
+# Created on first use, so databases built with create_all need no seeding
+ADVANCE_CHANGE_SEQ = _ADVANCE.on_conflict_do_update(
+    index_elements=[_COUNTER.c.id], set_={"value": _COUNTER.c.value + _ADVANCE.excluded.value}
+)
+# The value the last advance reached, for use inside the writing statement
+CURRENT_CHANGE_SEQ = select(_COUNTER.c.value).where(_COUNTER.c.id == 1).scalar_subquery()
+
+
+async def advance_change_seq(db: Union[AsyncSession, AsyncConnection], count: int = 1) -> None:
+    """
+    Reserve the next `count` sequence numbers, up to CURRENT_CHANGE_SEQ; caller
+    commits. It takes the write lock, so sequences become visible in commit order.
+    """
+    await db.execute(ADVANCE_CHANGE_SEQ, {"count": count})
+
+
+async def current_change_seq(db: Union[AsyncSession, AsyncConnection]) -> int:
+    return await db.scalar(select(CURRENT_CHANGE_SEQ)) or 0
@@ -4,10 +4,12 @@ from datetime import date, datetime
 from typing import Optional
 
 from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.domain.enums import ComponentType
+from app.db.crud.change_seq import CURRENT_CHANGE_SEQ, advance_change_seq
 from app.db.models.models import ComponentState
 
 
@@ -22,6 +24,21 @@ async def get_component_state(
     )
 
 
+def upsert_statement(contract_id, component_type: ComponentType, **fields):
+    """
+    One INSERT .. ON CONFLICT DO UPDATE of the given window fields: two writers
+    creating the same row concurrently cannot both take the insert branch and hit
+    the unique constraint. Stamps the value `advance_change_seq` reserved.
+    """
+    stmt = sqlite_insert(ComponentState).values(
+        contract_id=contract_id, component_type=component_type, change_seq=CURRENT_CHANGE_SEQ, **fields
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[ComponentState.contract_id, ComponentState.component_type],
+        set_={**{key: stmt.excluded[key] for key in fields}, "change_seq": CURRENT_CHANGE_SEQ},
+    )
+
+
 async def upsert_component_state(
     db: AsyncSession,
     *,
@@ -31,31 +48,35 @@ async def upsert_component_state(
     start_event_created_at: Optional[datetime] = None,
     end_date: Optional[date] = None,
     end_event_created_at: Optional[datetime] = None,
+    commit: bool = True,
 ) -> ComponentState:
     """
     Basic upsert: create a row if missing; update any provided fields.
     Does NOT enforce domain rules; rule engine belongs to the service layer (P1).
+    With commit=False the change is left uncommitted, for callers that write more
+    rows in the same transaction.
     """
+    fields = {
+        key: value
+        for key, value in (
+            ("start_date", start_date),
+            ("start_event_created_at", start_event_created_at),
+            ("end_date", end_date),
+            ("end_event_created_at", end_event_created_at),
+        )
+        if value is not None
+    }
     try:
-        state = await get_component_state(db, contract_id, component_type)
-        if state is None:
-            state = ComponentState(
-                contract_id=contract_id, component_type=component_type
-            )
-            db.add(state)
-            await db.flush()
-
-        if start_date is not None:
-            state.start_date = start_date
-        if start_event_created_at is not None:
-            state.start_event_created_at = start_event_created_at
-        if end_date is not None:
-            state.end_date = end_date
-        if end_event_created_at is not None:
-            state.end_event_created_at = end_event_created_at
-
-        await db.commit()
-        await db.refresh(state)
+        await advance_change_seq(db)
+        await db.execute(upsert_statement(contract_id, component_type, **fields))
+        # populate_existing: a state loaded earlier in this session is refreshed, not stale
+        state = await db.scalar(
+            select(ComponentState)
+            .where(ComponentState.contract_id == contract_id, ComponentState.component_type == component_type)
+            .execution_options(populate_existing=True)
+        )
+        if commit:
+            await db.commit()
         return state
     except SQLAlchemyError:
         await db.rollback()
@@ -70,3 +91,25 @@ async def list_component_states(
     )
     return list(result)
 
+
+
+async def list_changes_since(
+    db: AsyncSession, since: int, limit: int
+) -> list[tuple]:
+    """(contract_id, change_seq) of states changed after `since`, in sequence order."""
+    result = await db.execute(
+        select(ComponentState.contract_id, ComponentState.change_seq)
+        .where(ComponentState.change_seq > since)
+        .order_by(ComponentState.change_seq)
+        .limit(limit)
+    )
+    return [(contract_id, seq) for contract_id, seq in result]
+
+
+async def list_component_states_for_contracts(
+    db: AsyncSession, contract_ids
+) -> list[ComponentState]:
+    result = await db.scalars(
+        select(ComponentState).where(ComponentState.contract_id.in_(list(contract_ids)))
+    )
+    return list(result)
@@ -1,10 +1,23 @@
-from typing import Optional
+import uuid
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import String, cast, delete, func, literal, literal_column, select, tuple_, update
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models.models import Contract
+from app.db.crud.change_seq import CURRENT_CHANGE_SEQ, advance_change_seq
+from app.db.crud.timeline_document import delete_timeline_document
+from app.db.models.models import (
+    ComponentState,
+    Contract,
+    ContractDeletion,
+    Event,
+    TimelineCheckpoint,
+    TimelineDocument,
+    utc_now,
+)
+from app.domain.enums import ComponentType
 from app.dto.contract import ContractPayload
 
 
@@ -25,22 +38,158 @@ async def create_contract(db: AsyncSession, payload: ContractPayload) -> Contrac
     return contract
 
 
-async def delete_contract(db: AsyncSession, contract_number: str) -> None:
+async def delete_contract(db: AsyncSession, contract_number: str) -> bool:
+    """
+    Tombstone the live contract: lookups stop seeing it at once, its dependent rows
+    are left to `purge_contract_chunk`, and the deletion gets its own entry in the
+    changes feed. False when there was no live contract.
+    """
     try:
-        contract = await db.scalar(
-            select(Contract).where(Contract.contract_number == contract_number)
+        result = await db.execute(
+            update(Contract)
+            .where(Contract.contract_number == contract_number, Contract.deleted_at.is_(None))
+            .values(deleted_at=utc_now())
         )
-
-        if not contract:
-            return
-
-        await db.delete(contract)
+        if result.rowcount:
+            # Keyed by number, so it must go now in case the number is reused
+            await delete_timeline_document(db, contract_number)
+            await advance_change_seq(db)
+            await db.execute(ContractDeletion.__table__.insert().values(
+                change_seq=CURRENT_CHANGE_SEQ, contract_number=contract_number, deleted_at=utc_now()
+            ))
         await db.commit()
-
+        return bool(result.rowcount)
     except SQLAlchemyError:
         await db.rollback()
         raise
 
 
+async def list_deleted_contracts(db: AsyncSession, limit: int) -> List[Tuple[uuid.UUID, str]]:
+    """(id, contract_number) of tombstoned contracts, oldest deletion first."""
+    result = await db.execute(
+        select(Contract.id, Contract.contract_number)
+        .where(Contract.deleted_at.is_not(None))
+        .order_by(Contract.deleted_at)
+        .limit(limit)
+    )
+    return [tuple(row) for row in result]
+
+
+async def count_deleted_contracts(db: AsyncSession) -> int:
+    return await db.scalar(select(func.count()).select_from(Contract).where(Contract.deleted_at.is_not(None)))
+
+
+async def purge_contract_chunk(db: AsyncSession, contract_id, contract_number: str, *, limit: int) -> int:
+    """
+    Delete up to `limit` rows belonging to a tombstoned contract, dependents first and
+    the contract row itself once none are left; caller commits. Returns the rows
+    deleted, 0 once the contract is gone.
+    """
+    for table, column in (
+        (Event, Event.contract_id),
+        (TimelineCheckpoint, TimelineCheckpoint.contract_id),
+        (ComponentState, ComponentState.contract_id),
+    ):
+        # Bounded by rowid so each statement is one short index range scan
+        rowids = select(literal_column("rowid")).select_from(table).where(column == contract_id).limit(limit)
+        deleted = (await db.execute(delete(table).where(literal_column("rowid").in_(rowids)))).rowcount
+        if deleted:
+            return deleted
+    # Written by an event that raced the deletion; matched on the primary key
+    await db.execute(delete(TimelineDocument).where(
+        TimelineDocument.contract_number == contract_number, TimelineDocument.contract_id == contract_id
+    ))
+    return (await db.execute(
+        delete(Contract).where(Contract.id == contract_id, Contract.deleted_at.is_not(None))
+    )).rowcount
+
+
 async def get_contract(db: AsyncSession, contract_number: str) -> Optional[Contract]:
-    return await db.scalar(select(Contract).where(Contract.contract_number == contract_number))
+    return await db.scalar(
+        select(Contract).where(Contract.contract_number == contract_number, Contract.deleted_at.is_(None))
+    )
+
+
+
+async def get_contract_numbers(db: AsyncSession, contract_ids) -> dict:
+    """Map contract id -> contract_number for the given ids; deleted contracts are left out."""
+    result = await db.execute(
+        select(Contract.id, Contract.contract_number).where(
+            Contract.id.in_(list(contract_ids)), Contract.deleted_at.is_(None)
+        )
+    )
+    return {contract_id: number for contract_id, number in result}
+
+
+async def list_deletions_since(db: AsyncSession, since: int, limit: int) -> List[Tuple[str, int]]:
+    """(contract_number, change_seq) of contracts deleted after `since`, in sequence order."""
+    result = await db.execute(
+        select(ContractDeletion.contract_number, ContractDeletion.change_seq)
+        .where(ContractDeletion.change_seq > since)
+        .order_by(ContractDeletion.change_seq)
+        .limit(limit)
+    )
+    return [(number, seq) for number, seq in result]
+
+
+def _contract_filters(
+    components: Sequence[ComponentType] = (),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> list:
+    clauses = [Contract.deleted_at.is_(None)]
+    for component in components:
+        # `components` is stored as JSON text; quoted names cannot match one another
+        clauses.append(cast(Contract.components, String).like(f'%"{component.value}"%'))
+    if created_from is not None:
+        clauses.append(Contract.created_at >= created_from)
+    if created_to is not None:
+        clauses.append(Contract.created_at < created_to)
+    return clauses
+
+
+async def list_contracts_by_number(
+    db: AsyncSession,
+    *,
+    after: Optional[str],
+    limit: int,
+    components: Sequence[ComponentType] = (),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> List[Contract]:
+    """Next page in contract_number order; walks the unique contract_number index."""
+    stmt = select(Contract).where(*_contract_filters(components, created_from, created_to))
+    if after is not None:
+        stmt = stmt.where(Contract.contract_number > after)
+    return list(await db.scalars(stmt.order_by(Contract.contract_number).limit(limit)))
+
+
+async def list_contracts_by_created_at(
+    db: AsyncSession,
+    *,
+    after: Optional[Tuple[datetime, uuid.UUID]],
+    limit: int,
+    components: Sequence[ComponentType] = (),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> List[Contract]:
+    """Next page in (created_at, id) order; walks ix_contract_created_at_id."""
+    stmt = select(Contract).where(*_contract_filters(components, created_from, created_to))
+    if after is not None:
+        created_at, contract_id = after
+        # Typed binds so the values are stored-format strings, as in the index
+        stmt = stmt.where(tuple_(Contract.created_at, Contract.id) > tuple_(
+            literal(created_at, Contract.created_at.type), literal(contract_id, Contract.id.type)
+        ))
+    return list(await db.scalars(stmt.order_by(Contract.created_at, Contract.id).limit(limit)))
+
+
+async def count_contracts(
+    db: AsyncSession,
+    *,
+    components: Sequence[ComponentType] = (),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> int:
+    stmt = select(func.count()).select_from(Contract).where(*_contract_filters(components, created_from, created_to))
+    return await db.scalar(stmt)
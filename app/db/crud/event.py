@@ -3,10 +3,12 @@ from __future__ import annotations
 from datetime import date, datetime
 from typing import Optional
 
+from sqlalchemy import func, literal, literal_column, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.db.models.models import Event
+from app.domain.audit import AuditReason
 from app.domain.enums import ComponentType, EventAction, EventType as EventTypeEnum
 
 
@@ -19,8 +21,9 @@ async def record_event(
     action: Optional[EventAction],
     event_date: Optional[date],
     event_created_at: Optional[datetime],
-    status: str,
-    message: Optional[str] = None,
+    reason: AuditReason,
+    contract_number: Optional[str] = None,
+    commit: bool = True,
 ) -> Event:
     evt = Event(
         contract_id=contract_id,
@@ -29,16 +32,65 @@ async def record_event(
         action=action,
         event_date=event_date,
         event_created_at=event_created_at,
-        status=status,
-        message=message,
+        reason=reason,
+        contract_number=contract_number,
     )
     db.add(evt)
     try:
-        await db.commit()
-        await db.refresh(evt)
+        if commit:
+            await db.commit()
+            await db.refresh(evt)
+        else:
+            await db.flush()
         return evt
     except SQLAlchemyError:
         await db.rollback()
         raise
 
 
+async def list_accepted_events(
+    db: AsyncSession, contract_id, *, after: Optional[datetime], until: datetime
+) -> list[tuple]:
+    """
+    (component_type, action, event_date, event_created_at) of the contract's accepted
+    events with after < event_created_at <= until, oldest first; a range scan of
+    ix_event_audit_contract_created_at.
+    """
+    stmt = select(Event.component_type, Event.action, Event.event_date, Event.event_created_at).where(
+        Event.contract_id == contract_id,
+        Event.event_created_at <= until,
+        Event.reason == AuditReason.accepted,
+    )
+    if after is not None:
+        stmt = stmt.where(Event.event_created_at > after)
+    result = await db.execute(stmt.order_by(Event.event_created_at))
+    return [tuple(row) for row in result]
+
+
+async def list_contract_events(
+    db: AsyncSession, contract_id, *, after: Optional[tuple], limit: int
+) -> list[Event]:
+    """Next page of the contract's audit rows in (event_created_at, id) order."""
+    stmt = select(Event).where(Event.contract_id == contract_id)
+    if after is not None:
+        created_at, event_id = after
+        # Typed binds so the values are stored-format strings, as in the index
+        stmt = stmt.where(tuple_(Event.event_created_at, Event.id) > tuple_(
+            literal(created_at, Event.event_created_at.type), literal(event_id, Event.id.type)
+        ))
+    result = await db.scalars(stmt.order_by(Event.event_created_at, Event.id).limit(limit))
+    return list(result)
+
+
+async def count_rejections(
+    db: AsyncSession, *, since: Optional[datetime] = None, until: Optional[datetime] = None
+) -> dict[AuditReason, int]:
+    """Rejected events per reason; served from the partial ix_event_audit_rejections index."""
+    # A literal 0 (not a bound parameter) lets SQLite match the index's WHERE reason <> 0
+    stmt = select(Event.reason, func.count()).where(Event.reason != literal_column("0"))
+    if since is not None:
+        stmt = stmt.where(Event.event_created_at >= since)
+    if until is not None:
+        stmt = stmt.where(Event.event_created_at < until)
+    result = await db.execute(stmt.group_by(Event.reason))
+    return {reason: count for reason, count in result}
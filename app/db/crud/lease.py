@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.models import WorkerLease, utc_now
+
+
+async def acquire_lease(db: AsyncSession, name: str, holder: str, *, ttl_s: float) -> bool:
+    """
+    Take or renew the lease `name` for `ttl_s` seconds; False while another holder's
+    lease is unexpired. Caller commits, so work done in the same transaction only
+    lands while the lease is held.
+    """
+    now = utc_now()
+    stmt = sqlite_insert(WorkerLease).values(name=name, holder=holder, expires_at=now + timedelta(seconds=ttl_s))
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[WorkerLease.name],
+        set_={"holder": stmt.excluded.holder, "expires_at": stmt.excluded.expires_at},
+        where=(WorkerLease.holder == stmt.excluded.holder) | (WorkerLease.expires_at < now),
+    ))
+    return await db.scalar(select(WorkerLease.holder).where(WorkerLease.name == name)) == holder
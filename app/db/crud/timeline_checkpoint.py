@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, delete, exists, func, literal, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.models import Event, TimelineCheckpoint
+from app.domain.audit import AuditReason
+
+
+async def get_checkpoint_before(
+    db: AsyncSession, contract_id, as_of: datetime
+) -> Optional[TimelineCheckpoint]:
+    """Latest checkpoint at or before `as_of` (a primary-key range seek)."""
+    return await db.scalar(
+        select(TimelineCheckpoint)
+        .where(TimelineCheckpoint.contract_id == contract_id, TimelineCheckpoint.as_of <= as_of)
+        .order_by(TimelineCheckpoint.as_of.desc())
+        .limit(1)
+    )
+
+
+async def add_checkpoints(
+    db: AsyncSession, contract_id, checkpoints: Iterable[tuple[datetime, list, int]], *, base: Optional[datetime]
+) -> None:
+    """
+    Insert (as_of, windows, folded) checkpoints replayed from the checkpoint at `base`
+    (None: from the start), `folded` being the accepted rows replayed up to as_of;
+    caller commits. Each is inserted only if that base still exists and the row count
+    still matches, checked by the INSERT itself under the write lock: a late event
+    committed since the rows were read makes the checkpoint stale, and it is skipped.
+    Ones a concurrent writer already stored are ignored.
+    """
+    as_of = bindparam("as_of", type_=TimelineCheckpoint.as_of.type)
+    folded = select(func.count()).select_from(Event).where(
+        Event.contract_id == contract_id,
+        Event.reason == AuditReason.accepted,
+        Event.event_created_at <= as_of,
+    )
+    guards = []
+    if base is not None:
+        folded = folded.where(Event.event_created_at > base)
+        guards.append(exists().where(TimelineCheckpoint.contract_id == contract_id, TimelineCheckpoint.as_of == base))
+    guards.append(folded.scalar_subquery() == bindparam("folded"))
+    rows = select(
+        literal(contract_id, TimelineCheckpoint.contract_id.type),
+        as_of,
+        bindparam("windows", type_=TimelineCheckpoint.windows.type),
+    ).where(*guards)
+    # On the table, not the entity: a plain executemany rather than an ORM bulk insert
+    stmt = sqlite_insert(TimelineCheckpoint.__table__).from_select(["contract_id", "as_of", "windows"], rows)
+    params = [{"as_of": as_of_, "windows": windows, "folded": count} for as_of_, windows, count in checkpoints]
+    if params:
+        await db.execute(stmt.on_conflict_do_nothing(), params)
+
+
+async def delete_checkpoints_from(db: AsyncSession, contract_id, as_of: Optional[datetime] = None) -> None:
+    """Drop checkpoints at or after `as_of` (all when None); caller owns the transaction."""
+    stmt = delete(TimelineCheckpoint).where(TimelineCheckpoint.contract_id == contract_id)
+    if as_of is not None:
+        stmt = stmt.where(TimelineCheckpoint.as_of >= as_of)
+    await db.execute(stmt)
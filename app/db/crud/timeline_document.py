@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.models import Contract, TimelineDocument, utc_now
+
+
+async def get_timeline_document(db: AsyncSession, contract_number: str) -> Optional[bytes]:
+    """The document of the live contract with this number; None once it is deleted."""
+    return await db.scalar(
+        select(TimelineDocument.document)
+        .join(Contract, Contract.id == TimelineDocument.contract_id)
+        .where(TimelineDocument.contract_number == contract_number, Contract.deleted_at.is_(None))
+    )
+
+
+async def put_timeline_document(
+    db: AsyncSession, *, contract_number: str, contract_id, document: bytes
+) -> None:
+    """Insert or replace the document; the caller owns the transaction."""
+    stmt = sqlite_insert(TimelineDocument).values(
+        contract_number=contract_number, contract_id=contract_id, document=document, updated_at=utc_now()
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[TimelineDocument.contract_number],
+            # contract_id too: a reused number's document must not stay tied to the deleted contract
+            set_={
+                "contract_id": stmt.excluded.contract_id,
+                "document": stmt.excluded.document,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+    )
+
+
+async def delete_timeline_document(db: AsyncSession, contract_number: str) -> None:
+    """Caller owns the transaction."""
+    await db.execute(delete(TimelineDocument).where(TimelineDocument.contract_number == contract_number))
+
+
+async def list_timeline_documents(
+    db: AsyncSession, after: str = "", limit: int = 1000
+) -> list[tuple[str, bytes]]:
+    """(contract_number, document) pages in contract_number order."""
+    result = await db.execute(
+        select(TimelineDocument.contract_number, TimelineDocument.document)
+        .where(TimelineDocument.contract_number > after)
+        .order_by(TimelineDocument.contract_number)
+        .limit(limit)
+    )
+    return [(number, document) for number, document in result]
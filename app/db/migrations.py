@@ -0,0 +1,273 @@
+"""
+Versioned schema migrations.
+
+Application startup only checks the recorded schema version (a single query)
+instead of running ``create_all``; migrations are applied explicitly with::
+
+    python -m app.db.migrations upgrade
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import delete, inspect, insert, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.models.models import SchemaVersion  # also populates Base.metadata
+from app.db.session import Base
+
+
+class SchemaOutOfDateError(RuntimeError):
+    """Raised at startup when the database is not at the schema version the code expects."""
+
+
+def _baseline(conn: Connection) -> None:
+    # Version 1 is the schema as it existed before versioning was introduced;
+    # databases created by the old create_all-on-boot only need to be stamped.
+    pass
+
+
+def _component_state_change_seq(conn: Connection) -> None:
+    conn.execute(text("ALTER TABLE component_state ADD COLUMN change_seq INTEGER"))
+    # Existing rows get distinct sequence numbers in insertion order
+    conn.execute(text("UPDATE component_state SET change_seq = rowid"))
+    conn.execute(text("CREATE INDEX ix_component_state_change_seq ON component_state (change_seq)"))
+
+
+def _timeline_document(conn: Connection) -> None:
+    conn.execute(text(
+        "CREATE TABLE timeline_document ("
+        "contract_number VARCHAR NOT NULL, contract_id CHAR(32) NOT NULL, "
+        "document BLOB NOT NULL, updated_at DATETIME NOT NULL, "
+        "PRIMARY KEY (contract_number), FOREIGN KEY(contract_id) REFERENCES contract (id))"
+    ))
+
+
+def _contract_created_at_index(conn: Connection) -> None:
+    conn.execute(text("CREATE INDEX ix_contract_created_at_id ON contract (created_at, id)"))
+
+
+def _drop_redundant_indexes(conn: Connection) -> None:
+    # Primary keys and unique constraints already carry their own index; these
+    # duplicated them (or a leftmost prefix of another index) and only cost writes.
+    for name in (
+        "ix_contract_id",
+        "ix_component_state_id",
+        "ix_component_state_contract_id",
+        "ix_component_state_contract_component",
+        "ix_event_audit_id",
+        "ix_event_audit_contract_id",
+        "ix_component_state_change_seq",
+    ):
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    conn.execute(text(
+        "CREATE INDEX ix_component_state_change_seq_contract ON component_state (change_seq, contract_id)"
+    ))
+
+
+def _timeline_checkpoint(conn: Connection) -> None:
+    conn.execute(text(
+        "CREATE TABLE timeline_checkpoint ("
+        "contract_id CHAR(32) NOT NULL, as_of DATETIME NOT NULL, windows JSON NOT NULL, "
+        "PRIMARY KEY (contract_id, as_of), FOREIGN KEY(contract_id) REFERENCES contract (id))"
+    ))
+
+
+def _compact_audit_reasons(conn: Connection) -> None:
+    # Rebuilds event_audit with the free-text status/message replaced by an integer
+    # reason code; the table is copied so the old text pages are not left behind.
+    from app.domain.audit import AuditReason, audit_message
+
+    known = {
+        audit_message(reason, contract_number=None, component_type=None): int(reason)
+        for reason in AuditReason
+        if reason not in (AuditReason.contract_not_found, AuditReason.component_not_configured)
+    }
+    whens = " ".join(f"WHEN :m{code} THEN {code}" for code in known.values())
+    conn.execute(text(
+        "CREATE TABLE event_audit_new ("
+        "id CHAR(32) NOT NULL, contract_id CHAR(32), raw_type VARCHAR(27) NOT NULL, "
+        "component_type VARCHAR(21), action VARCHAR(5), event_date DATE, event_created_at DATETIME, "
+        "processed_at DATETIME NOT NULL, reason SMALLINT NOT NULL, contract_number VARCHAR, "
+        "PRIMARY KEY (id), FOREIGN KEY(contract_id) REFERENCES contract (id))"
+    ))
+    conn.execute(
+        text(
+            "INSERT INTO event_audit_new SELECT id, contract_id, raw_type, component_type, action, "
+            "event_date, event_created_at, processed_at, "
+            f"CASE WHEN message LIKE 'Contract % not found.' THEN {int(AuditReason.contract_not_found)} "
+            f"WHEN message LIKE 'Component % is not configured for contract %' "
+            f"THEN {int(AuditReason.component_not_configured)} "
+            f"ELSE CASE message {whens} "
+            f"ELSE CASE status WHEN 'accepted' THEN 0 ELSE {int(AuditReason.unknown)} END END END, "
+            "CASE WHEN contract_id IS NULL AND message LIKE 'Contract % not found.' "
+            "THEN substr(message, 10, length(message) - 20) END "
+            "FROM event_audit"
+        ),
+        {f"m{code}": message for message, code in known.items()},
+    )
+    conn.execute(text("DROP TABLE event_audit"))
+    conn.execute(text("ALTER TABLE event_audit_new RENAME TO event_audit"))
+    conn.execute(text(
+        "CREATE INDEX ix_event_audit_contract_created_at ON event_audit (contract_id, event_created_at)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX ix_event_audit_rejections ON event_audit (reason, event_created_at) WHERE reason <> 0"
+    ))
+
+
+def _contract_soft_delete(conn: Connection) -> None:
+    conn.execute(text("ALTER TABLE contract ADD COLUMN deleted_at DATETIME"))
+    conn.execute(text("DROP INDEX ix_contract_contract_number"))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX ix_contract_contract_number ON contract (contract_number) WHERE deleted_at IS NULL"
+    ))
+    conn.execute(text("CREATE INDEX ix_contract_deleted_at ON contract (deleted_at) WHERE deleted_at IS NOT NULL"))
+
+
+def _worker_lease(conn: Connection) -> None:
+    conn.execute(text(
+        "CREATE TABLE worker_lease ("
+        "name VARCHAR NOT NULL, holder VARCHAR NOT NULL, expires_at DATETIME NOT NULL, PRIMARY KEY (name))"
+    ))
+
+
+def _change_sequence(conn: Connection) -> None:
+    conn.execute(text("CREATE TABLE change_sequence (id INTEGER NOT NULL, value INTEGER NOT NULL, PRIMARY KEY (id))"))
+    # Continues after the highest sequence handed out so far
+    conn.execute(text(
+        "INSERT INTO change_sequence (id, value) SELECT 1, coalesce(max(change_seq), 0) FROM component_state"
+    ))
+    conn.execute(text(
+        "CREATE TABLE contract_deletion ("
+        "change_seq INTEGER NOT NULL, contract_number VARCHAR NOT NULL, deleted_at DATETIME NOT NULL, "
+        "PRIMARY KEY (change_seq))"
+    ))
+
+
+# Ordered (version, description, upgrade step). Steps receive a sync connection
+# inside the upgrade transaction and must only move the schema forward.
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "baseline schema", _baseline),
+    (2, "component_state.change_seq", _component_state_change_seq),
+    (3, "timeline_document table", _timeline_document),
+    (4, "contract (created_at, id) index", _contract_created_at_index),
+    (5, "drop redundant indexes, covering change_seq index", _drop_redundant_indexes),
+    (6, "timeline_checkpoint table", _timeline_checkpoint),
+    (7, "event_audit reason codes instead of status/message text", _compact_audit_reasons),
+    (8, "contract.deleted_at tombstones", _contract_soft_delete),
+    (9, "worker_lease table", _worker_lease),
+    (10, "change_sequence counter, contract_deletion feed entries", _change_sequence),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _read_version(conn: Connection) -> Optional[int]:
+    if not inspect(conn).has_table(SchemaVersion.__tablename__):
+        return None
+    return conn.scalar(select(SchemaVersion.version))
+
+
+def _stamp(conn: Connection, version: int) -> None:
+    conn.execute(delete(SchemaVersion))
+    conn.execute(insert(SchemaVersion).values(version=version))
+
+
+def _upgrade(conn: Connection) -> List[int]:
+    current = _read_version(conn)
+    if current is None:
+        app_tables = set(Base.metadata.tables) - {SchemaVersion.__tablename__}
+        if not app_tables & set(inspect(conn).get_table_names()):
+            # Empty database: create the latest schema directly and stamp it.
+            Base.metadata.create_all(conn)
+            _stamp(conn, LATEST_VERSION)
+            return [LATEST_VERSION]
+        SchemaVersion.__table__.create(conn, checkfirst=True)
+        current = 0
+
+    applied: List[int] = []
+    for version, _description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        step(conn)
+        _stamp(conn, version)
+        applied.append(version)
+    return applied
+
+
+async def get_schema_version(engine: AsyncEngine) -> Optional[int]:
+    """
+    Return the recorded schema version, or None for an unversioned database.
+    Issues exactly one query so it is cheap enough to run on every worker start.
+    """
+    async with engine.connect() as conn:
+        try:
+            return await conn.scalar(select(SchemaVersion.version))
+        except (OperationalError, ProgrammingError):
+            return None
+
+
+async def upgrade(engine: AsyncEngine) -> List[int]:
+    """Apply all pending migrations in one transaction; returns the versions applied."""
+    async with engine.begin() as conn:
+        return await conn.run_sync(_upgrade)
+
+
+async def ensure_schema(engine: AsyncEngine, *, auto_migrate: bool = False) -> int:
+    """
+    Verify the database is at LATEST_VERSION, optionally migrating it.
+    Raises SchemaOutOfDateError instead of silently changing the schema.
+    """
+    version = await get_schema_version(engine)
+    if version == LATEST_VERSION:
+        return version
+    if version is not None and version > LATEST_VERSION:
+        raise SchemaOutOfDateError(
+            f"Database schema version {version} is newer than this build ({LATEST_VERSION})."
+        )
+    if not auto_migrate:
+        raise SchemaOutOfDateError(
+            f"Database schema version is {version}, expected {LATEST_VERSION}. "
+            "Run `python -m app.db.migrations upgrade` first."
+        )
+    await upgrade(engine)
+    return LATEST_VERSION
+
+
+async def _run(command: str) -> None:
+    from app.db.session import get_engines
+
+    engines = get_engines()
+    try:
+        # Each shard is an independent database with its own schema version
+        for shard, engine in enumerate(engines):
+            label = f"[shard {shard}] " if len(engines) > 1 else ""
+            if command == "upgrade":
+                applied = await upgrade(engine)
+                print(f"{label}Applied migrations: {applied}" if applied else f"{label}Schema already up to date")
+            else:
+                print(f"{label}Current schema version: {await get_schema_version(engine)} (latest {LATEST_VERSION})")
+    finally:
+        for engine in engines:
+            await engine.dispose()
+
+
+def migrate() -> None:
+    """Apply pending migrations to every configured database, as `upgrade` does."""
+    asyncio.run(_run("upgrade"))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.db.migrations", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["upgrade", "current"], nargs="?", default="current")
+    args = parser.parse_args(argv)
+    asyncio.run(_run(args.command))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
 import uuid
 from datetime import date, datetime, timezone
 
-from sqlalchemy import DateTime, String, JSON, ForeignKey, UniqueConstraint, Date, Index
+from sqlalchemy import DateTime, String, JSON, ForeignKey, UniqueConstraint, Date, Index, Integer, LargeBinary, text
 from sqlalchemy import Enum as SAEnum
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.session import Base
+from app.db.types import EventTimestamp, IntEnumType
+from app.domain.audit import AuditReason
+from app.infra.ids import uuid7
 from app.domain.enums import ComponentType, EventAction, EventType
 from sqlalchemy import Enum as SAEnum
 from sqlalchemy import Index
@@ -20,61 +23,133 @@ def utc_now() -> datetime:
 class Contract(Base):
     __tablename__ = "contract"
 
-    id: Mapped[uuid.UUID] = mapped_column(
-        default=uuid.uuid4, primary_key=True, index=True
-    )
-    contract_number: Mapped[str] = mapped_column(String, nullable=False, unique=True, index=True)
+    id: Mapped[uuid.UUID] = mapped_column(default=uuid7, primary_key=True)
+    contract_number: Mapped[str] = mapped_column(String, nullable=False)
     components: Mapped[list[str]] = mapped_column(JSON, nullable=False)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, default=utc_now
     )
+    # Set when the contract is deleted; the purger then removes it with its dependents
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Unique among live contracts only, so a number can be reused while the old
+        # contract is still being purged; lookups must filter deleted_at IS NULL
+        Index("ix_contract_contract_number", "contract_number", unique=True, sqlite_where=text("deleted_at IS NULL")),
+        # Keyset pagination in creation order
+        Index("ix_contract_created_at_id", "created_at", "id"),
+        # Tombstones waiting for the purger
+        Index("ix_contract_deleted_at", "deleted_at", sqlite_where=text("deleted_at IS NOT NULL")),
+    )
 
 class ComponentState(Base):
     __tablename__ = "component_state"
 
-    id: Mapped[uuid.UUID] = mapped_column(
-        default=uuid.uuid4, primary_key=True, index=True
-    )
-    contract_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("contract.id"), nullable=False, index=True
-    )
+    id: Mapped[uuid.UUID] = mapped_column(default=uuid7, primary_key=True)
+    contract_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("contract.id"), nullable=False)
     component_type: Mapped[ComponentType] = mapped_column(
         SAEnum(ComponentType, name="state_component_type"), nullable=False
     )
     start_date: Mapped[date | None] = mapped_column(Date, nullable=True)
     start_event_created_at: Mapped[datetime | None] = mapped_column(
-        DateTime(timezone=True), nullable=True
+        EventTimestamp(), nullable=True
     )
     end_date: Mapped[date | None] = mapped_column(Date, nullable=True)
     end_event_created_at: Mapped[datetime | None] = mapped_column(
-        DateTime(timezone=True), nullable=True
+        EventTimestamp(), nullable=True
     )
+    # Monotonic change sequence, bumped on every write; drives incremental sync
+    change_seq: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
+    # uq_contract_component doubles as the (contract_id, component_type) lookup
+    # index; the change feed reads (change_seq, contract_id) from its index alone.
     __table_args__ = (
         UniqueConstraint("contract_id", "component_type", name="uq_contract_component"),
-        Index("ix_component_state_contract_component", "contract_id", "component_type"),
+        Index("ix_component_state_change_seq_contract", "change_seq", "contract_id"),
     )
 
 
 class Event(Base):
     __tablename__ = "event_audit"
 
-    id: Mapped[uuid.UUID] = mapped_column(
-        default=uuid.uuid4, primary_key=True, index=True
-    )
-    contract_id: Mapped[uuid.UUID | None] = mapped_column(
-        ForeignKey("contract.id"), nullable=True, index=True
-    )
+    id: Mapped[uuid.UUID] = mapped_column(default=uuid7, primary_key=True)
+    contract_id: Mapped[uuid.UUID | None] = mapped_column(ForeignKey("contract.id"), nullable=True)
     raw_type: Mapped[EventType] = mapped_column(SAEnum(EventType, name="event_type"), nullable=False)
     component_type: Mapped[ComponentType | None] = mapped_column(SAEnum(ComponentType, name="event_component_type"), nullable=True)
     action: Mapped[EventAction | None] = mapped_column(SAEnum(EventAction, name="event_action"), nullable=True)
     event_date: Mapped[date | None] = mapped_column(Date, nullable=True)
     event_created_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     processed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now)
-    status: Mapped[str] = mapped_column(String, nullable=False)
-    message: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Why the event was accepted or rejected; status and message derive from it
+    reason: Mapped[AuditReason] = mapped_column(IntEnumType(AuditReason), nullable=False)
+    # Only set for contract_not_found, where there is no contract_id to join on
+    contract_number: Mapped[str | None] = mapped_column(String, nullable=True)
 
+    # Also serves contract_id-only lookups (leftmost prefix)
     __table_args__ = (
         Index("ix_event_audit_contract_created_at", "contract_id", "event_created_at"),
+        # Rejections only, so accepted events (the bulk) do not pay for it
+        Index("ix_event_audit_rejections", "reason", "event_created_at", sqlite_where=text("reason <> 0")),
+    )
+
+
+class TimelineDocument(Base):
+    """Pre-serialized timeline JSON per contract, kept in sync with component_state."""
+    __tablename__ = "timeline_document"
+
+    contract_number: Mapped[str] = mapped_column(String, primary_key=True)
+    contract_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("contract.id"), nullable=False)
+    document: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=utc_now, onupdate=utc_now
     )
 
+
+class TimelineCheckpoint(Base):
+    """
+    A contract's component windows folded from its accepted audit rows with
+    event_created_at <= `as_of`; point-in-time reads replay only later rows.
+    """
+    __tablename__ = "timeline_checkpoint"
+
+    contract_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("contract.id"), primary_key=True)
+    as_of: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    # One [start_date, start_us, end_date, end_us] or null per `Component` code
+    windows: Mapped[list] = mapped_column(JSON, nullable=False)
+
+
+class ChangeSequence(Base):
+    """
+    Single-row counter behind component_state.change_seq and contract_deletion.
+    It only goes up, so purging the rows that held the highest sequence never
+    hands that number out again.
+    """
+    __tablename__ = "change_sequence"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class ContractDeletion(Base):
+    """A deleted contract's entry in the changes feed; kept after the contract is purged."""
+    __tablename__ = "contract_deletion"
+
+    change_seq: Mapped[int] = mapped_column(Integer, primary_key=True)
+    contract_number: Mapped[str] = mapped_column(String, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utc_now)
+
+
+class WorkerLease(Base):
+    """A named background job held by one worker until `expires_at` unless renewed."""
+    __tablename__ = "worker_lease"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    holder: Mapped[str] = mapped_column(String, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class SchemaVersion(Base):
+    """Single-row table recording the migration version the database is at."""
+    __tablename__ = "schema_version"
+
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -0,0 +1,215 @@
+"""
+Data access for the hot request paths, in two interchangeable implementations.
+
+`OrmRepository` delegates to the CRUD modules (full ORM objects). `CoreRepository`
+runs prebuilt Core statements on the same session, so it shares the session's
+transaction, and returns slotted rows with the same attribute names. Selected
+with DB_REPOSITORY ("orm" or "core") through `get_repository()`.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import bindparam, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.crud import component_state as component_state_crud
+from app.db.crud.change_seq import ADVANCE_CHANGE_SEQ, CURRENT_CHANGE_SEQ
+from app.db.crud import contract as contract_crud
+from app.db.crud import event as event_crud
+from app.db.models.models import ComponentState, Contract, Event
+from app.domain.audit import AuditReason
+from app.domain.enums import ComponentType, EventAction, EventType
+
+
+class ContractRow:
+    __slots__ = ("id", "contract_number", "components", "created_at")
+
+    def __init__(self, id, contract_number: str, components: list, created_at: datetime):
+        self.id = id
+        self.contract_number = contract_number
+        self.components = components
+        self.created_at = created_at
+
+
+class ComponentStateRow:
+    __slots__ = (
+        "contract_id", "component_type", "start_date", "start_event_created_at",
+        "end_date", "end_event_created_at",
+    )
+
+    def __init__(
+        self,
+        contract_id,
+        component_type: ComponentType,
+        start_date: Optional[date],
+        start_event_created_at: Optional[datetime],
+        end_date: Optional[date],
+        end_event_created_at: Optional[datetime],
+    ):
+        self.contract_id = contract_id
+        self.component_type = component_type
+        self.start_date = start_date
+        self.start_event_created_at = start_event_created_at
+        self.end_date = end_date
+        self.end_event_created_at = end_event_created_at
+
+
+class OrmRepository:
+    name = "orm"
+
+    async def get_contract(self, db: AsyncSession, contract_number: str):
+        return await contract_crud.get_contract(db, contract_number)
+
+    async def get_component_state(self, db: AsyncSession, contract_id, component_type: ComponentType):
+        return await component_state_crud.get_component_state(db, contract_id, component_type)
+
+    async def list_component_states(self, db: AsyncSession, contract_id) -> list:
+        return await component_state_crud.list_component_states(db, contract_id)
+
+    async def upsert_component_state(self, db: AsyncSession, **fields) -> None:
+        await component_state_crud.upsert_component_state(db, **fields)
+
+    def upsert_statements(self, contract_id, component_type: ComponentType, at: datetime) -> list:
+        """The upserts `upsert_component_state` executes for each half of a window and both."""
+        start = {"start_date": at.date(), "start_event_created_at": at}
+        end = {"end_date": at.date(), "end_event_created_at": at}
+        return [
+            component_state_crud.upsert_statement(contract_id, component_type, **fields)
+            for fields in (start, end, {**start, **end})
+        ]
+
+    async def record_event(self, db: AsyncSession, **fields) -> None:
+        await event_crud.record_event(db, **fields)
+
+
+_CONTRACT_COLUMNS = (Contract.id, Contract.contract_number, Contract.components, Contract.created_at)
+_STATE_COLUMNS = (
+    ComponentState.contract_id, ComponentState.component_type, ComponentState.start_date,
+    ComponentState.start_event_created_at, ComponentState.end_date, ComponentState.end_event_created_at,
+)
+
+
+def _upsert(*columns):
+    # INSERT .. ON CONFLICT DO UPDATE of the given columns (one half of the window, or
+    # both), like the ORM upsert with only those provided, but built once and
+    # without RETURNING. Each column is bound under its own key.
+    stmt = sqlite_insert(ComponentState).values({
+        ComponentState.contract_id: bindparam("contract_id"),
+        ComponentState.component_type: bindparam("component_type"),
+        **{column: bindparam(column.key) for column in columns},
+        ComponentState.change_seq: CURRENT_CHANGE_SEQ,
+    })
+    return stmt.on_conflict_do_update(
+        index_elements=[ComponentState.contract_id, ComponentState.component_type],
+        set_={
+            **{column.key: stmt.excluded[column.key] for column in columns},
+            "change_seq": CURRENT_CHANGE_SEQ,
+        },
+    )
+
+
+class CoreRepository:
+    """Prebuilt statements (compiled once, then served from the compiled cache) and slotted rows."""
+
+    name = "core"
+
+    _get_contract = select(*_CONTRACT_COLUMNS).where(
+        Contract.contract_number == bindparam("number"), Contract.deleted_at.is_(None)
+    )
+    _get_state = select(*_STATE_COLUMNS).where(
+        ComponentState.contract_id == bindparam("contract_id"),
+        ComponentState.component_type == bindparam("component_type"),
+    )
+    _list_states = select(*_STATE_COLUMNS).where(ComponentState.contract_id == bindparam("contract_id"))
+    _upsert_start = _upsert(ComponentState.start_date, ComponentState.start_event_created_at)
+    _upsert_end = _upsert(ComponentState.end_date, ComponentState.end_event_created_at)
+    _upsert_window = _upsert(
+        ComponentState.start_date, ComponentState.start_event_created_at,
+        ComponentState.end_date, ComponentState.end_event_created_at,
+    )
+    _insert_event = insert(Event)
+
+    async def get_contract(self, db: AsyncSession, contract_number: str) -> Optional[ContractRow]:
+        row = (await db.execute(self._get_contract, {"number": contract_number})).first()
+        return None if row is None else ContractRow(*row)
+
+    async def get_component_state(
+        self, db: AsyncSession, contract_id, component_type: ComponentType
+    ) -> Optional[ComponentStateRow]:
+        row = (await db.execute(
+            self._get_state, {"contract_id": contract_id, "component_type": component_type}
+        )).first()
+        return None if row is None else ComponentStateRow(*row)
+
+    async def list_component_states(self, db: AsyncSession, contract_id) -> List[ComponentStateRow]:
+        result = await db.execute(self._list_states, {"contract_id": contract_id})
+        return [ComponentStateRow(*row) for row in result]
+
+    def upsert_statements(self, contract_id, component_type: ComponentType, at: datetime) -> list:
+        return [self._upsert_start, self._upsert_end, self._upsert_window]
+
+    async def upsert_component_state(
+        self,
+        db: AsyncSession,
+        *,
+        contract_id,
+        component_type: ComponentType,
+        start_date: Optional[date] = None,
+        start_event_created_at: Optional[datetime] = None,
+        end_date: Optional[date] = None,
+        end_event_created_at: Optional[datetime] = None,
+        commit: bool = True,
+    ) -> None:
+        """Writes the start half, the end half, or both, whichever are given."""
+        params = {"contract_id": contract_id, "component_type": component_type}
+        if start_event_created_at is not None:
+            params.update(start_date=start_date, start_event_created_at=start_event_created_at)
+        if end_event_created_at is not None:
+            params.update(end_date=end_date, end_event_created_at=end_event_created_at)
+        if start_event_created_at is None:
+            stmt = self._upsert_end
+        else:
+            stmt = self._upsert_start if end_event_created_at is None else self._upsert_window
+        await db.execute(ADVANCE_CHANGE_SEQ, {"count": 1})
+        await db.execute(stmt, params)
+        if commit:
+            await db.commit()
+
+    async def record_event(
+        self,
+        db: AsyncSession,
+        *,
+        contract_id,
+        raw_type: EventType,
+        component_type: Optional[ComponentType],
+        action: Optional[EventAction],
+        event_date: Optional[date],
+        event_created_at: Optional[datetime],
+        reason: AuditReason,
+        contract_number: Optional[str] = None,
+        commit: bool = True,
+    ) -> None:
+        await db.execute(self._insert_event, {
+            "contract_id": contract_id,
+            "raw_type": raw_type,
+            "component_type": component_type,
+            "action": action,
+            "event_date": event_date,
+            "event_created_at": event_created_at,
+            "reason": reason,
+            "contract_number": contract_number,
+        })
+        if commit:
+            await db.commit()
+
+
+_REPOSITORIES = {repo.name: repo for repo in (OrmRepository(), CoreRepository())}
+
+
+def get_repository():
+    """The implementation named by DB_REPOSITORY; read per call so tests can switch it."""
+    return _REPOSITORIES[settings.DB_REPOSITORY]
@@ -1,28 +1,149 @@
-from typing import AsyncGenerator
+import inspect
+import zlib
+from typing import AsyncGenerator, Dict, List, Optional
 
-from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession, async_sessionmaker,
                                     create_async_engine)
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import QueuePool
 from app.config import settings
 
-# Async engine and sessionmaker
-async_engine = create_async_engine(
-    settings.ASYNC_DATABASE_URL,
-    **settings.ASYNC_SQLALCHEMY_ENGINE_OPTIONS,
-    echo=settings.DEBUG,
-)
 
-AsyncSessionLocal = async_sessionmaker(
-    bind=async_engine,
-    expire_on_commit=False,
-    autoflush=False,
-    autocommit=False,
+def shard_url(url: str, shard: int) -> str:
+    """
+    Database URL of one shard: `{shard}` in the URL is replaced, otherwise the
+    shard number is inserted before a file extension (`eo.db` -> `eo.shard1.db`).
+    """
+    if "{shard}" in url:
+        return url.replace("{shard}", str(shard))
+    head, sep, ext = url.rpartition(".")
+    if sep and "/" not in ext:
+        return f"{head}.shard{shard}.{ext}"
+    return f"{url}.shard{shard}"
+
+
+def _make_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        **settings.ASYNC_SQLALCHEMY_ENGINE_OPTIONS,
+        echo=settings.DEBUG,
+    )
+
+
+def _make_sessionmaker(engine: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(
+        bind=engine,
+        expire_on_commit=False,
+        autoflush=False,
+        autocommit=False,
+    )
+
+
+# Hash-sharded mode: contracts (with their states and audit rows) live in one
+# of DB_SHARD_COUNT databases chosen by a stable hash of the contract number.
+shard_engines: List[AsyncEngine] = (
+    [_make_engine(shard_url(settings.ASYNC_DATABASE_URL, i)) for i in range(settings.DB_SHARD_COUNT)]
+    if settings.DB_SHARD_COUNT > 1
+    else []
 )
+shard_sessionmakers: List[async_sessionmaker] = [_make_sessionmaker(e) for e in shard_engines]
+
+# Async engine and sessionmaker (shard 0 in sharded mode)
+async_engine = shard_engines[0] if shard_engines else _make_engine(settings.ASYNC_DATABASE_URL)
+
+AsyncSessionLocal = shard_sessionmakers[0] if shard_sessionmakers else _make_sessionmaker(async_engine)
 
 class Base(DeclarativeBase):
     pass
 
 
+def get_engines() -> List[AsyncEngine]:
+    """All databases, in shard order; a single entry when not sharded."""
+    return shard_engines if len(shard_engines) > 1 else [async_engine]
+
+
+def _max_overflow() -> int:
+    """The configured overflow limit, QueuePool's default when unset; unlimited (-1) counts as none."""
+    default = inspect.signature(QueuePool).parameters["max_overflow"].default
+    return max(settings.ASYNC_SQLALCHEMY_ENGINE_OPTIONS.get("max_overflow", default), 0)
+
+
+def pool_stats() -> List[Dict[str, int]]:
+    """Checked-out connections per database, against the pool size plus overflow."""
+    stats = []
+    for engine in get_engines():
+        pool = engine.sync_engine.pool
+        if hasattr(pool, "checkedout") and hasattr(pool, "size"):
+            stats.append({"checked_out": pool.checkedout(), "capacity": pool.size() + _max_overflow()})
+    return stats
+
+
+def pool_capacity() -> Optional[int]:
+    """Connections the smallest database pool can hand out at once; None for unsized pools."""
+    capacities = [entry["capacity"] for entry in pool_stats()]
+    return min(capacities) if capacities else None
+
+
+def get_session_makers() -> List[async_sessionmaker]:
+    return shard_sessionmakers if len(shard_sessionmakers) > 1 else [AsyncSessionLocal]
+
+
+def shard_for(contract_number: str, shard_count: int) -> int:
+    """Stable across processes and restarts (unlike hash())."""
+    if shard_count <= 1:
+        return 0
+    return zlib.crc32(contract_number.encode("utf-8")) % shard_count
+
+
+def session_maker_for(contract_number: str) -> async_sessionmaker:
+    makers = get_session_makers()
+    return makers[shard_for(contract_number, len(makers))]
+
+
+class ShardSessions:
+    """Per-request sessions, opened lazily on the shards the request touches."""
+
+    def __init__(self, makers: List[async_sessionmaker]) -> None:
+        self._makers = makers
+        self._sessions: Dict[int, AsyncSession] = {}
+
+    @property
+    def shard_count(self) -> int:
+        return len(self._makers)
+
+    def shard(self, index: int) -> AsyncSession:
+        session = self._sessions.get(index)
+        if session is None:
+            session = self._sessions[index] = self._makers[index]()
+        return session
+
+    def for_contract(self, contract_number: str) -> AsyncSession:
+        return self.shard(shard_for(contract_number, len(self._makers)))
+
+    def all(self) -> List[AsyncSession]:
+        return [self.shard(i) for i in range(len(self._makers))]
+
+    async def close(self) -> None:
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
+
+
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_shard_sessions() -> AsyncGenerator[ShardSessions, None]:
+    """For requests whose contract is only known from the body, or that span all shards."""
+    sessions = ShardSessions(get_session_makers())
+    try:
+        yield sessions
+    finally:
+        await sessions.close()
+
+
+async def get_contract_session(contract_number: str) -> AsyncGenerator[AsyncSession, None]:
+    """Session on the shard owning the `contract_number` path parameter."""
+    async with session_maker_for(contract_number)() as session:
+        yield session
@@ -0,0 +1,84 @@
+"""
+Column types with a storage encoding different from their Python type.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import DateTime, SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+from app.config import settings
+from app.domain.rules import from_epoch_us, to_epoch_us
+
+
+def utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    `value` as naive UTC, the form DATETIME columns store and compare: SQLite
+    drops tzinfo when binding, so an aware filter must be converted first.
+    Naive values are taken to be UTC already.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class EventTimestamp(TypeDecorator):
+    """
+    Aware UTC datetime stored either as DATETIME text or, with
+    COMPACT_EVENT_TIMESTAMPS, as integer epoch microseconds.
+
+    The declared column type stays DATETIME (NUMERIC affinity on SQLite), so both
+    encodings fit the same column and rows written under either setting read back
+    as the same datetime. SQL comparisons are only meaningful once every row uses
+    one encoding; `app.tools.compact_timestamps` converts existing rows.
+    """
+
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def bind_processor(self, dialect):
+        to_text = self.impl_instance.bind_processor(dialect)
+
+        def process(value):
+            if value is None:
+                return None
+            if settings.COMPACT_EVENT_TIMESTAMPS:
+                return to_epoch_us(value)
+            if value.tzinfo is not None:
+                value = value.astimezone(timezone.utc)
+            return to_text(value) if to_text else value
+
+        return process
+
+    def result_processor(self, dialect, coltype):
+        from_text = self.impl_instance.result_processor(dialect, coltype)
+
+        def process(value):
+            if value is None:
+                return None
+            if isinstance(value, int):
+                return from_epoch_us(value)
+            if from_text is not None:
+                value = from_text(value)
+            return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+        return process
+
+
+class IntEnumType(TypeDecorator):
+    """An IntEnum stored as its SMALLINT value rather than its name."""
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_class, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.enum_class = enum_class
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else int(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else self.enum_class(value)
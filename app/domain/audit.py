@@ -0,0 +1,46 @@
+"""
+Audit reason codes.
+
+Every event_audit row records why its event was accepted or rejected as one
+small integer instead of the response text; the text is rebuilt from the code
+(plus the contract number and component it concerns) when the audit is read.
+Codes 0-5 are the rule `Outcome`s, so an outcome converts with `AuditReason(outcome)`.
+"""
+from __future__ import annotations
+
+from enum import IntEnum
+from typing import Optional
+
+from app.domain.enums import ComponentType
+from app.domain.rules import OUTCOME_MESSAGES, Outcome
+
+
+class AuditReason(IntEnum):
+    accepted = 0
+    start_after_end = 1
+    start_not_newer = 2
+    end_without_start = 3
+    end_before_start = 4
+    end_not_newer = 5
+    contract_not_found = 6
+    component_not_configured = 7
+    # Rows migrated from free text that matched none of the fixed messages
+    unknown = 255
+
+
+def audit_status(reason: AuditReason) -> str:
+    return "accepted" if reason is AuditReason.accepted else "rejected"
+
+
+def audit_message(
+    reason: AuditReason, *, contract_number: Optional[str], component_type: Optional[ComponentType]
+) -> str:
+    """The message the API returned for this reason."""
+    if reason is AuditReason.contract_not_found:
+        return f"Contract {contract_number} not found."
+    if reason is AuditReason.component_not_configured:
+        component = component_type.value if component_type is not None else None
+        return f"Component {component} is not configured for contract {contract_number}."
+    if reason is AuditReason.unknown:
+        return "Event rejected."
+    return OUTCOME_MESSAGES[Outcome(reason)]
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from enum import Enum
-from typing import Dict, Tuple, Union
+from typing import Dict, Tuple
 
 
 class ComponentType(str, Enum):
@@ -52,21 +52,3 @@ EVENT_TYPE_TO_COMPONENT_ACTION: Dict[EventType, Tuple[ComponentType, EventAction
     ),
 }
 
-
-def resolve_component_action(
-    event_type: Union[str, EventType],
-) -> Tuple[ComponentType, EventAction]:
-    """
-    Given an event type, return the associated (component, action).
-    Raises KeyError if the event type is unsupported.
-    """
-    if isinstance(event_type, str):
-        try:
-            et = EventType(event_type)
-        except ValueError as exc:
-            raise KeyError(f"Unsupported event type: {event_type}") from exc
-    else:
-        et = event_type
-    return EVENT_TYPE_TO_COMPONENT_ACTION[et]
-
-
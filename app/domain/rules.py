@@ -0,0 +1,199 @@
+"""
+Component lifecycle rules, independent of the database.
+
+The same engine backs the HTTP path, batch imports and replays: callers build
+`RuleEvent`s, hold per-contract `ContractState`, and feed them to
+`apply_event`/`apply_events`. Ordering timestamps are normalized once into
+integer epoch microseconds (UTC) so every comparison is an integer comparison.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from enum import IntEnum
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from app.domain.enums import (
+    EVENT_TYPE_TO_COMPONENT_ACTION,
+    ComponentType,
+    EventAction,
+    EventType,
+)
+
+
+class Component(IntEnum):
+    energy_supply = 0
+    battery_optimization = 1
+    heatpump_optimization = 2
+
+
+class Action(IntEnum):
+    start = 0
+    end = 1
+
+
+class Outcome(IntEnum):
+    accepted = 0
+    start_after_end = 1
+    start_not_newer = 2
+    end_without_start = 3
+    end_before_start = 4
+    end_not_newer = 5
+
+
+OUTCOME_MESSAGES: Dict[Outcome, str] = {
+    Outcome.accepted: "Event processed successfully.",
+    Outcome.start_after_end: "Start event that comes after the end event should be rejected.",
+    Outcome.start_not_newer: "Start event ignored: older or equal to existing start event.",
+    Outcome.end_without_start: "End event without a start event should be rejected.",
+    Outcome.end_before_start: "End event cannot occur before start event.",
+    Outcome.end_not_newer: "End event ignored: older or equal to existing end event.",
+}
+
+# Integer code <-> API enum, indexed by the integer code
+COMPONENT_TYPES: Tuple[ComponentType, ...] = tuple(ComponentType[c.name] for c in Component)
+ACTIONS: Tuple[EventAction, ...] = tuple(EventAction[a.name] for a in Action)
+
+# Precomputed event type string -> (component, action) codes
+EVENT_CODES: Dict[str, Tuple[Component, Action]] = {
+    et.value: (Component[comp.name], Action[act.name])
+    for et, (comp, act) in EVENT_TYPE_TO_COMPONENT_ACTION.items()
+}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_epoch_us(dt: datetime) -> int:
+    """Convert to UTC epoch microseconds; naive datetimes are taken as UTC."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    delta = dt - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def from_epoch_us(us: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=us)
+
+
+def event_codes(event_type: Union[str, EventType]) -> Tuple[Component, Action]:
+    """Raises KeyError if the event type is unsupported."""
+    try:
+        return EVENT_CODES[getattr(event_type, "value", event_type)]
+    except KeyError as exc:
+        raise KeyError(f"Unsupported event type: {event_type}") from exc
+
+
+class RuleEvent:
+    __slots__ = ("component", "action", "event_date", "created_us")
+
+    def __init__(self, component: Component, action: Action, event_date: date, created_us: int):
+        self.component = component
+        self.action = action
+        self.event_date = event_date
+        self.created_us = created_us
+
+    @classmethod
+    def from_type(
+        cls, event_type: Union[str, EventType], event_date: date, created_at: datetime
+    ) -> "RuleEvent":
+        component, action = event_codes(event_type)
+        return cls(component, action, event_date, to_epoch_us(created_at))
+
+    def __repr__(self) -> str:
+        return (
+            f"RuleEvent({self.component.name}, {self.action.name}, "
+            f"{self.event_date}, {self.created_us})"
+        )
+
+
+class ComponentWindow:
+    """Start/end of one component; `*_us` are the created_at of the events that set them."""
+
+    __slots__ = ("start_date", "start_us", "end_date", "end_us")
+
+    def __init__(
+        self,
+        start_date: Optional[date] = None,
+        start_us: Optional[int] = None,
+        end_date: Optional[date] = None,
+        end_us: Optional[int] = None,
+    ):
+        self.start_date = start_date
+        self.start_us = start_us
+        self.end_date = end_date
+        self.end_us = end_us
+
+    def __repr__(self) -> str:
+        return (
+            f"ComponentWindow(start={self.start_date}@{self.start_us}, "
+            f"end={self.end_date}@{self.end_us})"
+        )
+
+
+class ContractState:
+    """Windows of one contract, indexed by `Component` code."""
+
+    __slots__ = ("windows",)
+
+    def __init__(self) -> None:
+        self.windows: List[Optional[ComponentWindow]] = [None] * len(Component)
+
+    def get(self, component: Component) -> Optional[ComponentWindow]:
+        return self.windows[component]
+
+    def window(self, component: Component) -> ComponentWindow:
+        window = self.windows[component]
+        if window is None:
+            window = self.windows[component] = ComponentWindow()
+        return window
+
+
+def _apply_start(window: ComponentWindow, event: RuleEvent) -> Outcome:
+    # Reject restart attempts: start after a recorded end
+    if window.end_us is not None and event.created_us > window.end_us:
+        return Outcome.start_after_end
+    # Duplicate or older start events should not overwrite
+    if window.start_us is not None and event.created_us <= window.start_us:
+        return Outcome.start_not_newer
+    window.start_date = event.event_date
+    window.start_us = event.created_us
+    return Outcome.accepted
+
+
+def _apply_end(window: ComponentWindow, event: RuleEvent) -> Outcome:
+    # Must have a start recorded before this end
+    if window.start_us is None:
+        return Outcome.end_without_start
+    # Created_at ordering: end must come after start
+    if event.created_us <= window.start_us:
+        return Outcome.end_before_start
+    # Duplicate or older end events should not overwrite
+    if window.end_us is not None and event.created_us <= window.end_us:
+        return Outcome.end_not_newer
+    # Validate date ordering (end date must not be before start date)
+    if window.start_date is not None and event.event_date < window.start_date:
+        return Outcome.end_before_start
+    window.end_date = event.event_date
+    window.end_us = event.created_us
+    return Outcome.accepted
+
+
+def apply_event(window: ComponentWindow, event: RuleEvent) -> Outcome:
+    """Apply one event to its component window in place; the window only changes when accepted."""
+    if event.action is Action.start:
+        return _apply_start(window, event)
+    return _apply_end(window, event)
+
+
+def apply_events(state: ContractState, events: Iterable[RuleEvent]) -> List[Outcome]:
+    """Apply events in the given order to a contract's state; returns one outcome per event."""
+    windows = state.windows
+    outcomes: List[Outcome] = []
+    for event in events:
+        window = windows[event.component]
+        if window is None:
+            window = windows[event.component] = ComponentWindow()
+        if event.action is Action.start:
+            outcomes.append(_apply_start(window, event))
+        else:
+            outcomes.append(_apply_end(window, event))
+    return outcomes
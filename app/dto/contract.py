@@ -1,7 +1,9 @@
 from datetime import datetime
-from typing import Iterable, Union
+from enum import Enum
+from typing import Iterable, Optional, Union
+from uuid import UUID
 
-from pydantic import UUID4, BaseModel, ConfigDict, field_validator, Field
+from pydantic import BaseModel, ConfigDict, field_validator, Field
 from app.domain.enums import ComponentType
 
 
@@ -32,9 +34,26 @@ class ContractPayload(BaseModel):
 
 
 class ContractResponse(BaseModel):
-    id: UUID4
+    # v7 for new contracts, v4 for ones created before time-ordered ids
+    id: UUID
     contract_number: str
     components: list[str]
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ContractSortKey(str, Enum):
+    contract_number = "contract_number"
+    created_at = "created_at"
+
+
+class ContractListResponse(BaseModel):
+    items: list[ContractResponse]
+    next_cursor: Optional[str] = Field(
+        default=None, description="Pass as `cursor` to fetch the next page; null on the last page"
+    )
+
+
+class ContractCountResponse(BaseModel):
+    count: int
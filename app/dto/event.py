@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import date, datetime
-from typing import Literal
+from typing import Literal, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -26,3 +26,34 @@ class EventResponse(BaseModel):
     model_config = ConfigDict(use_enum_values=True)
 
 
+
+
+class EventAuditEntry(BaseModel):
+    """One `event_audit` row, with status and message derived from its reason code."""
+
+    event_type: EventType
+    event_date: Optional[date] = None
+    event_created_at: Optional[datetime] = None
+    processed_at: datetime
+    status: Literal["accepted", "rejected"]
+    reason: str = Field(..., examples=["start_after_end"])
+    message: str = Field(..., examples=["Start event that comes after the end event should be rejected."])
+
+    model_config = ConfigDict(use_enum_values=True)
+
+
+class EventAuditListResponse(BaseModel):
+    items: list[EventAuditEntry]
+    next_cursor: Optional[str] = Field(
+        default=None, description="Pass as `cursor` to fetch the next page; null on the last page"
+    )
+
+
+class RejectionCount(BaseModel):
+    reason: str = Field(..., examples=["end_without_start"])
+    count: int
+
+
+class RejectionStatsResponse(BaseModel):
+    total: int
+    reasons: list[RejectionCount] = Field(..., description="Most frequent reason first")
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -21,3 +21,13 @@ class TimelineResponse(BaseModel):
     model_config = ConfigDict(use_enum_values=True)
 
 
+
+
+class TimelineChange(TimelineResponse):
+    seq: int = Field(..., description="Latest change sequence of this contract's states (per shard)")
+    deleted: bool = Field(False, description="The contract was deleted; `components` is empty")
+
+
+class TimelineChangesResponse(BaseModel):
+    items: List[TimelineChange]
+    next_cursor: str = Field(..., description="Pass as `since` to fetch the following changes", examples=["42"])
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict
+
+
+class Overloaded(Exception):
+    """Raised instead of queueing when the wait queue is full."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"Overloaded, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Concurrency limit with a bounded FIFO wait queue.
+
+    At most `limit` callers run at once and at most `max_queue` wait; anyone
+    beyond that is rejected immediately with a Retry-After estimated from the
+    observed service time, so an overloaded backend keeps completing the work
+    it admitted instead of timing everything out. `limit` <= 0 disables it.
+    """
+
+    # Weight of the newest sample in the service-time moving average
+    _EWMA_ALPHA = 0.1
+
+    def __init__(self, limit: int, max_queue: int) -> None:
+        self.limit = limit
+        self.max_queue = max_queue
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._service_s = 0.0
+        self.admitted = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        if self.limit <= 0:
+            yield
+            return
+        await self._acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._observe(time.monotonic() - started)
+            self._release()
+
+    async def _acquire(self) -> None:
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+        elif len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded(self.retry_after())
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                # Resolved by _release, which hands its slot straight to us
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.cancelled():
+                    self._waiters.remove(waiter)
+                else:
+                    self._release()
+                raise
+        self.admitted += 1
+
+    def _release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def _observe(self, seconds: float) -> None:
+        if self._service_s == 0.0:
+            self._service_s = seconds
+        else:
+            self._service_s += self._EWMA_ALPHA * (seconds - self._service_s)
+
+    def retry_after(self) -> int:
+        """Whole seconds until the current queue would drain at the observed rate."""
+        return max(1, math.ceil((len(self._waiters) + 1) * self._service_s / max(self.limit, 1)))
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_service_ms": round(self._service_s * 1000, 3),
+        }
@@ -0,0 +1,254 @@
+"""
+Streaming HTTP body compression as a pure ASGI middleware.
+
+Responses are compressed chunk by chunk with the best encoding the client
+accepts (zstd when the optional `zstandard` package is installed, else gzip)
+once they reach `minimum_size` bytes; Server-Sent Events and bodies that
+already carry a Content-Encoding pass through untouched. Request bodies sent
+with `Content-Encoding: gzip` (or zstd) are decoded as they are received on the
+`decode_paths` routes. Neither direction ever holds a whole body in memory.
+"""
+from __future__ import annotations
+
+import json
+import zlib
+from typing import Iterable, Optional, Tuple
+
+from fastapi import HTTPException
+
+try:
+    import zstandard
+except ImportError:  # optional extra: `poetry install -E compression`
+    zstandard = None
+
+Headers = Iterable[Tuple[bytes, bytes]]
+
+# Decompressed bytes produced per step, so a small compressed chunk cannot
+# expand into one huge buffer
+_DECODE_STEP = 64 * 1024
+# zstd has no output bound per call, so it gets this much input per step instead:
+# a block decodes to at most 128 KiB and takes at least 4 bytes, so one step can
+# produce at most (64 / 4 + 1) * 128 KiB, about 2 MiB
+_ZSTD_INPUT_STEP = 64
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Response encodings in order of preference."""
+    return ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: str, encodings: Tuple[str, ...]) -> Optional[str]:
+    """The first of `encodings` the Accept-Encoding header allows (q > 0), if any."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    for encoding in encodings:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class _GzipEncoder:
+    def __init__(self, level: int) -> None:
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+
+class _ZstdEncoder:
+    def __init__(self, level: int) -> None:
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+
+class _Decoder:
+    """Incremental gzip/zstd decoder capped at `max_size` decoded bytes."""
+
+    def __init__(self, encoding: str, max_size: int) -> None:
+        self._zstd = encoding == "zstd"
+        self._obj = zstandard.ZstdDecompressor().decompressobj() if self._zstd else zlib.decompressobj(31)
+        self._remaining = max_size
+
+    def decode(self, data: bytes) -> bytes:
+        parts = []
+        if self._zstd:
+            view = memoryview(data)
+            for start in range(0, len(view), _ZSTD_INPUT_STEP):
+                out = self._obj.decompress(view[start:start + _ZSTD_INPUT_STEP])
+                self._take(len(out))
+                parts.append(out)
+            return b"".join(parts)
+        while data:
+            out = self._obj.decompress(data, _DECODE_STEP)
+            self._take(len(out))
+            parts.append(out)
+            data = self._obj.unconsumed_tail
+        return b"".join(parts)
+
+    def finish(self) -> None:
+        if not self._obj.eof:
+            raise zlib.error("truncated zstd frame" if self._zstd else "truncated gzip stream")
+
+    def _take(self, size: int) -> None:
+        self._remaining -= size
+        if self._remaining < 0:
+            raise HTTPException(
+                status_code=413,
+                detail={"code": "payload_too_large", "message": "Decoded request body is too large."},
+            )
+
+
+def _header(headers: Headers, name: bytes) -> Optional[str]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        *,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        zstd_level: int = 3,
+        decode_paths: Tuple[str, ...] = (),
+        max_request_size: int = 1024 * 1024,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+        self.decode_paths = decode_paths
+        self.max_request_size = max_request_size
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_encoding = _header(scope["headers"], b"content-encoding")
+        if request_encoding is not None and scope["path"] in self.decode_paths:
+            request_encoding = request_encoding.strip().lower()
+            if request_encoding not in ("gzip", "zstd") or (request_encoding == "zstd" and zstandard is None):
+                message = f"Unsupported Content-Encoding {request_encoding!r}."
+                await _send_error(send, 415, "unsupported_media_type", message)
+                return
+            scope = dict(scope, headers=[
+                (k, v) for k, v in scope["headers"] if k.lower() not in (b"content-encoding", b"content-length")
+            ])
+            receive = self._decoding_receive(receive, _Decoder(request_encoding, self.max_request_size))
+
+        encoding = negotiate(_header(scope["headers"], b"accept-encoding") or "", available_encodings())
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, encoding, self))
+
+    @staticmethod
+    def _decoding_receive(receive, decoder: _Decoder):
+        async def decoding_receive():
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            try:
+                body = decoder.decode(message.get("body", b""))
+                if not message.get("more_body", False):
+                    decoder.finish()
+            except (zlib.error, ValueError) as exc:
+                # zstandard raises ZstdError, a ValueError subclass
+                raise HTTPException(
+                    status_code=400, detail={"code": "bad_request", "message": f"Malformed request body: {exc}"}
+                ) from exc
+            return {**message, "body": body}
+
+        return decoding_receive
+
+
+class _CompressingSend:
+    """Wraps `send`: decides on the first body chunk, then compresses the rest as it streams."""
+
+    def __init__(self, send, encoding: str, options: CompressionMiddleware) -> None:
+        self._send = send
+        self._encoding = encoding
+        self._options = options
+        self._start = None
+        self._encoder = None
+        self._passthrough = False
+
+    async def __call__(self, message) -> None:
+        if self._passthrough:
+            await self._send(message)
+            return
+        if message["type"] == "http.response.start":
+            headers = message.get("headers", [])
+            content_type = _header(headers, b"content-type") or ""
+            length = _header(headers, b"content-length")
+            if (
+                _header(headers, b"content-encoding") is not None
+                or content_type.startswith("text/event-stream")
+                or (length is not None and int(length) < self._options.minimum_size)
+            ):
+                self._passthrough = True
+                await self._send(message)
+            else:
+                self._start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._encoder is None:
+            if not more_body and len(body) < self._options.minimum_size:
+                self._passthrough = True
+                await self._send(self._start)
+                await self._send(message)
+                return
+            await self._send(self._compressed_start())
+        chunk = self._encoder.compress(body)
+        if not more_body:
+            chunk += self._encoder.flush()
+        if chunk or not more_body:
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _compressed_start(self):
+        if self._encoding == "zstd":
+            self._encoder = _ZstdEncoder(self._options.zstd_level)
+        else:
+            self._encoder = _GzipEncoder(self._options.gzip_level)
+        headers = [(k, v) for k, v in self._start.get("headers", []) if k.lower() != b"content-length"]
+        vary = _header(headers, b"vary")
+        headers = [(k, v) for k, v in headers if k.lower() != b"vary"]
+        headers.append((b"vary", b"Accept-Encoding" if not vary else f"{vary}, Accept-Encoding".encode("latin-1")))
+        headers.append((b"content-encoding", self._encoding.encode("latin-1")))
+        return {**self._start, "headers": headers}
+
+
+async def _send_error(send, status: int, code: str, message: str) -> None:
+    body = json.dumps({"detail": {"code": code, "message": message}}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last = 0
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Time-ordered UUID (RFC 9562 version 7): 48-bit Unix milliseconds, 12 bits
+    of sub-millisecond precision, 62 random bits. Successive ids from one
+    process are strictly increasing, even within the same clock tick or when
+    the clock steps backwards, so inserts append to the end of the B-tree.
+    """
+    global _last
+    ns = time.time_ns()
+    # 60-bit timestamp: ms in the top 48 bits, the fraction of a ms in the low 12
+    ms, rem = divmod(ns, 1_000_000)
+    stamp = (ms << 12) | (rem * 4096 // 1_000_000)
+    with _lock:
+        if stamp <= _last:
+            stamp = _last + 1
+        _last = stamp
+    rand = int.from_bytes(os.urandom(8), "big") & 0x3FFF_FFFF_FFFF_FFFF
+    value = (
+        (stamp >> 12) << 80
+        | 0x7 << 76
+        | (stamp & 0xFFF) << 64
+        | 0b10 << 62
+        | rand
+    )
+    return uuid.UUID(int=value)
+
+
+def uuid7_time_ms(value: uuid.UUID) -> int:
+    """Unix milliseconds encoded in a version 7 UUID."""
+    return value.int >> 80
@@ -1,18 +1,56 @@
 from __future__ import annotations
 
 import sys
-from typing import Optional
+from typing import Dict, Mapping, Optional
 from loguru import logger
 
 
-def configure_logging(level: str = "INFO") -> None:
+class _Sampler:
+    """Keeps 1 in N calls per message type; types without a rate are always kept."""
+
+    __slots__ = ("_every", "_counts")
+
+    def __init__(self) -> None:
+        self._every: Dict[str, int] = {}
+        self._counts: Dict[str, int] = {}
+
+    def configure(self, rates: Mapping[str, int]) -> None:
+        self._every = {log_type: int(every) for log_type, every in rates.items() if int(every) > 1}
+        self._counts = {}
+
+    def __call__(self, log_type: str) -> bool:
+        every = self._every.get(log_type)
+        if every is None:
+            return True
+        count = self._counts.get(log_type, 0)
+        self._counts[log_type] = count + 1
+        return count % every == 0
+
+
+should_log = _Sampler()
+
+
+def configure_logging(
+    level: str = "INFO",
+    *,
+    enqueue: bool = False,
+    serialize: bool = False,
+    sample_rates: Optional[Mapping[str, int]] = None,
+) -> None:
+    """
+    `enqueue` hands records to a background writer thread so the event loop never
+    blocks on stdout; `serialize` emits one JSON object per line; `sample_rates`
+    maps a message type (as passed to `should_log`) to "keep 1 in N".
+    """
+    should_log.configure(sample_rates or {})
     logger.remove()
     logger.add(
         sys.stdout,
         level=level,
         backtrace=False,
         diagnose=False,
-        serialize=False,
+        enqueue=enqueue,
+        serialize=serialize,
         format="<green>{time:YYYY-MM-DDTHH:mm:ss.SSSZ}</green> | <level>{level}</level> | {message}",
     )
 
@@ -34,5 +72,3 @@ def log_context(
     if created_at is not None:
         context["created_at"] = created_at
     return logger.bind(**context)
-
-
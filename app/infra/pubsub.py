@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Dict, Optional, Set
+
+
+class Subscription:
+    """A subscriber's bounded buffer; `None` in the queue means the hub closed it."""
+
+    __slots__ = ("topic", "queue", "evicted")
+
+    def __init__(self, topic: Optional[str], buffer_size: int) -> None:
+        self.topic = topic
+        self.queue: asyncio.Queue[Optional[str]] = asyncio.Queue(maxsize=buffer_size + 1)
+        self.evicted = False
+
+
+class FanoutHub:
+    """
+    In-process publish/subscribe for pre-serialized messages.
+
+    Subscribers listen to one topic, or to every topic with `topic=None`. Each
+    message is serialized once by the publisher and shared by all subscribers.
+    A subscriber whose buffer is full is evicted rather than slowing the
+    publisher down; idle subscribers cost one small queue each.
+    """
+
+    def __init__(self, buffer_size: int = 16) -> None:
+        self.buffer_size = buffer_size
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._all: Set[Subscription] = set()
+        self.evictions = 0
+
+    def subscribe(self, topic: Optional[str] = None) -> Subscription:
+        sub = Subscription(topic, self.buffer_size)
+        if topic is None:
+            self._all.add(sub)
+        else:
+            self._topics.setdefault(topic, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        if sub.topic is None:
+            self._all.discard(sub)
+            return
+        subs = self._topics.get(sub.topic)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._topics[sub.topic]
+
+    def has_subscribers(self, topic: str) -> bool:
+        return bool(self._all) or topic in self._topics
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._all) + sum(len(subs) for subs in self._topics.values())
+
+    def publish(self, topic: str, message: str) -> int:
+        """Queue `message` for every subscriber of `topic`; returns how many received it."""
+        delivered = 0
+        for subs in (self._topics.get(topic, ()), self._all):
+            for sub in list(subs):
+                # One slot is reserved for the close marker
+                if sub.queue.qsize() >= self.buffer_size:
+                    self._evict(sub)
+                    continue
+                sub.queue.put_nowait(message)
+                delivered += 1
+        return delivered
+
+    def _evict(self, sub: Subscription) -> None:
+        self.unsubscribe(sub)
+        sub.evicted = True
+        self.evictions += 1
+        sub.queue.put_nowait(None)
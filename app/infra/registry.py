@@ -0,0 +1,220 @@
+"""
+Fixed-layout hash table in a memory-mapped file, shared by processes on one host.
+
+Maps a short string key to a 16-byte id and a 16-bit mask. The file is a 64-byte
+header followed by `capacity` 64-byte slots probed linearly from crc32(key):
+
+    header: magic 4s | version H | key_size H | capacity I | pad 4 | generation Q
+    slot:   seq I | state B | key_len B | mask H | id 16s | key 40s
+
+Readers take no lock: every slot carries a sequence number that a writer makes
+odd before touching the slot and even again afterwards, and a read that saw it
+odd or changed is retried. Writers serialize on an exclusive flock of the file.
+`generation` counts removals: a reader that filled a miss from its own source
+passes the generation it saw before reading, and the fill is dropped if a
+removal happened in between, so a stale value is never written back.
+
+Opening keeps whatever the file holds; it is only laid out afresh when it is
+new or its size or header does not match, so a process joining the others
+never wipes entries they rely on. `clear` empties it explicitly.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import uuid
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; the registry then stays closed
+    fcntl = None
+
+_MAGIC = b"EOCR"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHI4xQ")
+_GENERATION = struct.Struct("<Q")
+_GENERATION_OFFSET = 16
+_HEADER_SIZE = 64
+KEY_SIZE = 40
+_SLOT = struct.Struct(f"<IBBH16s{KEY_SIZE}s")
+_SEQ = struct.Struct("<I")
+_SLOT_SIZE = _SLOT.size
+
+_EMPTY, _LIVE, _REMOVED = 0, 1, 2
+# Slots probed per key before a lookup gives up (and a fill is skipped)
+_MAX_PROBES = 16
+# Attempts at a consistent read of a slot a writer keeps changing
+_MAX_RETRIES = 8
+
+
+class SharedRegistry:
+    def __init__(self) -> None:
+        self._mm: Optional[mmap.mmap] = None
+        self._fd: Optional[int] = None
+        self.capacity = 0
+        self.path: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.fills = 0
+        self.stale_fills = 0
+        self.full = 0
+
+    @property
+    def opened(self) -> bool:
+        return self._mm is not None
+
+    def open(self, path: str, capacity: int) -> None:
+        """Map `path`, keeping its entries unless it has to be laid out for `capacity` slots."""
+        if fcntl is None:
+            raise OSError("the shared registry needs fcntl (POSIX)")
+        self.close()
+        size = _HEADER_SIZE + capacity * _SLOT_SIZE
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_size != size:
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, size)
+                mm = mmap.mmap(fd, size)
+                magic, version, key_size, stored_capacity, _ = _HEADER.unpack_from(mm, 0)
+                if (magic, version, key_size, stored_capacity) != (_MAGIC, _VERSION, KEY_SIZE, capacity):
+                    mm[:size] = bytes(size)
+                    _HEADER.pack_into(mm, 0, _MAGIC, _VERSION, KEY_SIZE, capacity, 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd, self._mm, self.capacity, self.path = fd, mm, capacity, path
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            os.close(self._fd)
+        self._mm = self._fd = None
+        self.capacity = 0
+
+    @contextmanager
+    def _locked(self) -> Iterator[mmap.mmap]:
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield self._mm
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @property
+    def generation(self) -> int:
+        return _GENERATION.unpack_from(self._mm, _GENERATION_OFFSET)[0] if self._mm is not None else 0
+
+    def _bump_generation(self, mm: mmap.mmap) -> None:
+        _GENERATION.pack_into(mm, _GENERATION_OFFSET, _GENERATION.unpack_from(mm, _GENERATION_OFFSET)[0] + 1)
+
+    def _offsets(self, key: bytes) -> Iterator[int]:
+        start = zlib.crc32(key) % self.capacity
+        for probe in range(min(_MAX_PROBES, self.capacity)):
+            yield _HEADER_SIZE + ((start + probe) % self.capacity) * _SLOT_SIZE
+
+    def _read(self, mm: mmap.mmap, offset: int) -> Optional[tuple]:
+        for _ in range(_MAX_RETRIES):
+            slot = _SLOT.unpack_from(mm, offset)
+            if not slot[0] & 1 and _SEQ.unpack_from(mm, offset)[0] == slot[0]:
+                return slot
+        return None
+
+    def _write(self, mm: mmap.mmap, offset: int, state: int, key: bytes, ident: bytes, mask: int) -> None:
+        seq = _SEQ.unpack_from(mm, offset)[0]
+        _SEQ.pack_into(mm, offset, seq + 1)
+        _SLOT.pack_into(mm, offset, seq + 1, state, len(key), mask, ident, key)
+        _SEQ.pack_into(mm, offset, seq + 2)
+
+    def get(self, key: str) -> Optional[Tuple[uuid.UUID, int]]:
+        """(id, mask) stored for `key`, or None when absent or unreadable."""
+        raw = key.encode()
+        if self._mm is None or len(raw) > KEY_SIZE:
+            return None
+        mm = self._mm
+        for offset in self._offsets(raw):
+            slot = self._read(mm, offset)
+            if slot is None or slot[1] == _EMPTY:
+                break
+            _, state, key_len, mask, ident, stored = slot
+            if state == _LIVE and key_len == len(raw) and stored[:key_len] == raw:
+                self.hits += 1
+                return uuid.UUID(bytes=ident), mask
+        self.misses += 1
+        return None
+
+    def put(self, key: str, ident: uuid.UUID, mask: int, *, generation: Optional[int] = None) -> bool:
+        """
+        Store `key`; with `generation`, only if nothing was removed since it was read.
+        False when skipped: stale, key too long, or no free slot within the probe limit.
+        """
+        raw = key.encode()
+        if self._mm is None or len(raw) > KEY_SIZE:
+            return False
+        with self._locked() as mm:
+            if generation is not None and generation != self.generation:
+                self.stale_fills += 1
+                return False
+            free = None
+            for offset in self._offsets(raw):
+                _, state, key_len, _, _, stored = _SLOT.unpack_from(mm, offset)
+                if state == _LIVE and key_len == len(raw) and stored[:key_len] == raw:
+                    free = offset
+                    break
+                if state != _LIVE and free is None:
+                    free = offset
+                if state == _EMPTY:
+                    break
+            if free is None:
+                self.full += 1
+                return False
+            self._write(mm, free, _LIVE, raw, ident.bytes, mask)
+        self.fills += 1
+        return True
+
+    def remove(self, key: str) -> bool:
+        """Drop `key` and advance the generation; True when it was present."""
+        raw = key.encode()
+        if self._mm is None:
+            return False
+        with self._locked() as mm:
+            self._bump_generation(mm)
+            if len(raw) > KEY_SIZE:
+                return False
+            for offset in self._offsets(raw):
+                _, state, key_len, _, _, stored = _SLOT.unpack_from(mm, offset)
+                if state == _EMPTY:
+                    break
+                if state == _LIVE and key_len == len(raw) and stored[:key_len] == raw:
+                    # A tombstone, not empty, so longer probe chains stay intact
+                    self._write(mm, offset, _REMOVED, b"", bytes(16), 0)
+                    return True
+        return False
+
+    def clear(self) -> None:
+        """Empty every slot and advance the generation."""
+        if self._mm is None:
+            return
+        with self._locked() as mm:
+            self._bump_generation(mm)
+            for index in range(self.capacity):
+                offset = _HEADER_SIZE + index * _SLOT_SIZE
+                if mm[offset + 4] != _EMPTY:
+                    self._write(mm, offset, _EMPTY, b"", bytes(16), 0)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "capacity": self.capacity,
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "fills": self.fills,
+            "stale_fills": self.stale_fills,
+            "full": self.full,
+        }
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+Flush = Callable[[Hashable, List[Any]], Awaitable[Sequence[Any]]]
+
+
+class ReorderBuffer:
+    """
+    Short per-key holding window that hands items over sorted.
+
+    The first item for a key opens a window of `window_s`; items for the same key
+    arriving meanwhile join it. When the window closes (or `max_batch` items have
+    joined) `flush(key, items)` is called once with the items sorted by their sort
+    key and must return one result per item, in that order; each `submit` caller
+    gets its own result (or the flush's exception). At most `max_pending` items are
+    held across all keys; beyond that, and when `window_s` <= 0, items are flushed
+    alone right away, so memory and delay stay bounded.
+
+    Flushes of one key run one at a time in the order their windows closed: each
+    waits for the key's previous flush, so a batch closed early by `max_batch` is
+    applied before the items that arrived after it.
+    """
+
+    def __init__(self, window_s: float, max_pending: int, flush: Flush, *, max_batch: int = 64) -> None:
+        self.window_s = window_s
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self._flush = flush
+        self._groups: Dict[Hashable, List[Tuple[Any, Any, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.Task] = {}
+        # The key's latest flush, which the next one waits for
+        self._tails: Dict[Hashable, asyncio.Task] = {}
+        # Strong references: the event loop keeps only weak ones to running tasks
+        self._tasks: Set[asyncio.Task] = set()
+        self.pending = 0
+        self.batches = 0
+        self.bypassed = 0
+        self.reordered = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_s > 0
+
+    async def submit(self, key: Hashable, sort_key: Any, item: Any) -> Any:
+        if not self.enabled:
+            (result,) = await self._flush(key, [item])
+            return result
+        future = asyncio.get_running_loop().create_future()
+        if self.pending >= self.max_pending:
+            self.bypassed += 1
+            self._start_flush(key, [(sort_key, item, future)])
+            return await future
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = []
+            self._timers[key] = asyncio.create_task(self._flush_after(key))
+        elif sort_key < group[-1][0]:
+            self.reordered += 1
+        group.append((sort_key, item, future))
+        self.pending += 1
+        if len(group) >= self.max_batch:
+            self._timers.pop(key).cancel()
+            self._close_window(key)
+        return await future
+
+    async def _flush_after(self, key: Hashable) -> None:
+        await asyncio.sleep(self.window_s)
+        self._timers.pop(key, None)
+        self._close_window(key)
+
+    def _close_window(self, key: Hashable) -> None:
+        group = self._groups.pop(key, None)
+        if group:
+            self.pending -= len(group)
+            self._start_flush(key, group)
+
+    def _start_flush(self, key: Hashable, group: List[Tuple[Any, Any, asyncio.Future]]) -> None:
+        task = asyncio.create_task(self._flush_group(key, group, self._tails.get(key)))
+        self._tails[key] = task
+        self._tasks.add(task)
+        task.add_done_callback(lambda done: self._flush_done(key, done))
+
+    def _flush_done(self, key: Hashable, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if self._tails.get(key) is task:
+            del self._tails[key]
+
+    async def _flush_group(
+        self, key: Hashable, group: List[Tuple[Any, Any, asyncio.Future]], previous: Optional[asyncio.Task]
+    ) -> None:
+        if previous is not None:
+            # wait(), not await: neither its outcome nor our cancellation crosses over
+            await asyncio.wait([previous])
+        self.batches += 1
+        # Stable: equal sort keys keep their arrival order
+        group.sort(key=lambda entry: entry[0])
+        try:
+            results = await self._flush(key, [item for _, item, _ in group])
+        except Exception as exc:
+            for _, _, future in group:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, _, future), result in zip(group, results):
+            # A caller that went away (client disconnect) still had its item applied
+            if not future.done():
+                future.set_result(result)
+
+    async def drain(self) -> None:
+        """Flush every open window now and wait for all flushes; called on shutdown."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for key in list(self._groups):
+            self._close_window(key)
+        while self._tasks:
+            await asyncio.wait(list(self._tasks))
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "window_ms": round(self.window_s * 1000, 3),
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "batches": self.batches,
+            "reordered": self.reordered,
+            "bypassed": self.bypassed,
+        }
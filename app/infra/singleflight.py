@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces concurrent calls for the same key into one in-flight computation
+    whose result (or exception) every caller shares. With `ttl` > 0 the result
+    is also kept for that many seconds; `invalidate` drops both the cached value
+    and the in-flight computation so later callers see fresh data.
+    """
+
+    def __init__(self, ttl: float = 0.0) -> None:
+        self.ttl = ttl
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self._cache: Dict[Hashable, Tuple[float, T]] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            if self.ttl > 0:
+                hit = self._cache.get(key)
+                if hit is not None:
+                    if hit[0] > time.monotonic():
+                        return hit[1]
+                    del self._cache[key]
+
+            flight = self._flights.get(key)
+            if flight is None:
+                return await self._lead(key, fn)
+            try:
+                # shield: a follower giving up must not cancel the shared computation
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+                # The leader was cancelled (e.g. client disconnect); try again ourselves
+
+    async def _lead(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        flight: asyncio.Future = asyncio.get_running_loop().create_future()
+        # Mark exceptions as retrieved even when nobody else was waiting
+        flight.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._flights[key] = flight
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as exc:
+            flight.set_exception(exc)
+            raise
+        else:
+            flight.set_result(result)
+            # invalidate() unregisters the flight, so a result read before it is not cached
+            if self.ttl > 0 and self._flights.get(key) is flight:
+                self._cache[key] = (time.monotonic() + self.ttl, result)
+            return result
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def invalidate(self, key: Hashable) -> None:
+        self._cache.pop(key, None)
+        self._flights.pop(key, None)
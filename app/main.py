@@ -1,34 +1,113 @@
-from contextlib import asynccontextmanager
+import asyncio
+import time
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
+from loguru import logger
 
-from app.api.routers import contract, event
-from app.db.models import models as _models  # ensure models are imported so metadata is populated
-from app.db.session import async_engine, Base
+from app.api.routers import contract, event, ops, timeline
+from app.api.services.event_services import event_reorder
+from app.api.services.purge_services import contract_purger
+from app.api.services.registry_services import contract_registry, open_contract_registry
+from app.api.services.timeline_history import timeline_checkpointer
+from app.api.services.warmup_services import readiness, run_warmup
+from app.db import session as db_session
+from app.infra.compression import CompressionMiddleware
 from app.infra.logging import configure_logging
 from app.config import settings
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    started = time.perf_counter()
     # Configure logging early
     try:
-        configure_logging("DEBUG" if settings.DEBUG else "INFO")
+        configure_logging(
+            "DEBUG" if settings.DEBUG else "INFO",
+            enqueue=settings.LOG_ENQUEUE,
+            serialize=settings.LOG_JSON,
+            sample_rates=settings.LOG_SAMPLE_RATES,
+        )
     except Exception:
         # Avoid failing startup due to logging config
         pass
-    async with async_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-        print("Tables created or already exist")
+
+    # Imported lazily: the migration machinery is only needed once per process start.
+    from app.db.migrations import ensure_schema
+
+    # A single version query instead of create_all: no DDL or table inspection
+    # from every worker at boot. Migrations run via `python -m app.db.migrations`.
+    for engine in db_session.get_engines():
+        await ensure_schema(engine, auto_migrate=settings.DB_AUTO_MIGRATE)
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms > settings.STARTUP_BUDGET_MS:
+        logger.warning("Startup took {:.1f} ms, over the {} ms budget", elapsed_ms, settings.STARTUP_BUDGET_MS)
+    else:
+        logger.info("Startup completed in {:.1f} ms", elapsed_ms)
+
+    # Before warmup, which may preload it
+    if settings.CONTRACT_REGISTRY_ENABLED:
+        open_contract_registry()
+
+    # Warmup runs after startup so it does not count against the budget;
+    # readiness stays false until it finishes.
+    readiness.reset()
+    warmup = None
+    if settings.WARMUP_ENABLED:
+        warmup = asyncio.create_task(run_warmup(
+            db_session.get_engines(),
+            connections=settings.WARMUP_CONNECTIONS,
+            preload_contracts=settings.WARMUP_PRELOAD_CONTRACTS,
+        ))
+    else:
+        readiness.mark_ready(0.0, {})
+
+    purger = None
+    if settings.PURGE_ENABLED:
+        purger = asyncio.create_task(contract_purger.run(
+            db_session.get_engines(),
+            interval_s=settings.PURGE_INTERVAL_S,
+            chunk_rows=settings.PURGE_CHUNK_ROWS,
+            pause_s=settings.PURGE_PAUSE_MS / 1000,
+            lease_s=settings.PURGE_LEASE_S,
+        ))
 
     yield
 
+    # Events still held for reordering are applied, not dropped
+    await event_reorder.drain()
+    await timeline_checkpointer.drain()
+
+    for task in (warmup, purger):
+        if task is not None and not task.done():
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+    contract_registry.close()
+
+    # Drain records still queued for the background writer
+    await logger.complete()
+
 
 app = FastAPI(title="eo_tech_challenge", version="0.1.0", lifespan=lifespan)
 
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+        decode_paths=("/event",),
+        max_request_size=settings.COMPRESSION_MAX_REQUEST_BYTES,
+    )
+
 # All api routers
 app.include_router(contract.router)
 app.include_router(event.router)
+app.include_router(timeline.router)
+app.include_router(ops.router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,106 @@
+"""
+Production launcher for the API, configured from `app.config.settings`.
+
+    python -m app [--host 0.0.0.0] [--port 8000] [--workers 0]
+
+Picks uvloop and httptools when they are installed (`poetry install -E server`)
+and falls back to asyncio and h11 otherwise, sizes the worker pool to the
+available CPUs when SERVER_WORKERS=0, and sets keep-alive, listen backlog and
+graceful shutdown from settings. Once-per-deployment startup work (applying
+migrations with DB_AUTO_MIGRATE, emptying the shared contract registry) runs
+here in the parent before any worker starts; each worker then runs the
+`lifespan` of `app.main` exactly once.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import os
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from app.config import settings
+
+APP = "app.main:app"
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def resolve_loop(choice: str) -> str:
+    if choice == "auto":
+        return "uvloop" if _installed("uvloop") else "asyncio"
+    return choice
+
+
+def resolve_http(choice: str) -> str:
+    if choice == "auto":
+        return "httptools" if _installed("httptools") else "h11"
+    return choice
+
+
+def resolve_workers(workers: int) -> int:
+    """`workers` <= 0 means one per CPU this process may run on."""
+    if workers > 0:
+        return workers
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def uvicorn_options(host: str, port: int, workers: int) -> Dict[str, Any]:
+    return {
+        "host": host,
+        "port": port,
+        "workers": resolve_workers(workers),
+        "loop": resolve_loop(settings.SERVER_LOOP),
+        "http": resolve_http(settings.SERVER_HTTP),
+        "backlog": settings.SERVER_BACKLOG,
+        "timeout_keep_alive": settings.SERVER_KEEP_ALIVE_S,
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_SHUTDOWN_S,
+        "access_log": settings.SERVER_ACCESS_LOG,
+        # A failing lifespan must stop the worker rather than serve without a checked schema
+        "lifespan": "on",
+    }
+
+
+def migrate_before_workers() -> None:
+    """Apply pending migrations once in the parent, then keep workers from repeating it."""
+    if not settings.DB_AUTO_MIGRATE:
+        return
+    from app.db.migrations import migrate
+
+    migrate()
+    # Workers re-read settings from the environment (spawned) or share this object (single worker)
+    os.environ["DB_AUTO_MIGRATE"] = "false"
+    settings.DB_AUTO_MIGRATE = False
+
+
+def reset_registry_before_workers() -> None:
+    """Start the deployment with an empty contract registry; workers that restart later keep it."""
+    if not settings.CONTRACT_REGISTRY_ENABLED:
+        return
+    from app.api.services.registry_services import reset_contract_registry
+
+    reset_contract_registry()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS, help="0 = one per CPU")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    options = uvicorn_options(args.host, args.port, args.workers)
+    migrate_before_workers()
+    reset_registry_before_workers()
+    logger.info(
+        "Serving {} on {}:{} with {} worker(s), loop={} http={}",
+        APP, options["host"], options["port"], options["workers"], options["loop"], options["http"],
+    )
+    uvicorn.run(APP, **options)
@@ -0,0 +1,557 @@
+"""
+Offline backfill of historical events into an empty database.
+
+    python -m app.tools.backfill events.csv more_events.ndjson [--audit] [--dry-run]
+
+Input rows use the `/event` payload fields (`type`, `contract_number`, `date`,
+`created_at`); CSV files need a header row, `.ndjson`/`.jsonl` files hold one
+JSON object per line. Events are loaded chunk by chunk into NumPy columns,
+sorted by (contract, component, created_at) and reduced group-wise to each
+component's final window with the rules of `app.domain.rules`; component
+states (and optionally audit rows) are then bulk-inserted, and with
+ENABLE_MATERIALIZED_TIMELINES the touched contracts' timeline documents are
+rebuilt. Contracts must already exist.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import re
+import time
+from datetime import date, datetime
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.api.services.timeline_services import serialize_timeline, timeline_from_states
+from app.config import settings
+from app.db.crud.change_seq import advance_change_seq, current_change_seq
+from app.db.models.models import ComponentState, Contract, Event, TimelineDocument, utc_now
+from app.db.repository import ComponentStateRow
+from app.db.session import shard_for
+from app.domain.audit import AuditReason
+from app.domain.enums import EventType
+from app.domain.rules import (
+    ACTIONS,
+    COMPONENT_TYPES,
+    Action,
+    Component,
+    ContractState,
+    Outcome,
+    RuleEvent,
+    apply_events,
+    event_codes,
+    from_epoch_us,
+    to_epoch_us,
+)
+
+CHUNK_ROWS = 1_000_000
+
+# Row outcome codes beyond `Outcome`, for events rejected before the rules run
+CONTRACT_NOT_FOUND = -1
+COMPONENT_NOT_CONFIGURED = -2
+
+
+class EventColumns:
+    """Columnar events; `contract` indexes into `contract_numbers`, `day` is a date ordinal."""
+
+    __slots__ = ("contract_numbers", "contract", "component", "action", "day", "created_us", "event_type")
+
+    def __init__(self, contract_numbers, contract, component, action, day, created_us, event_type):
+        self.contract_numbers: List[str] = contract_numbers
+        self.contract: np.ndarray = contract
+        self.component: np.ndarray = component
+        self.action: np.ndarray = action
+        self.day: np.ndarray = day
+        self.created_us: np.ndarray = created_us
+        self.event_type: np.ndarray = event_type
+
+    def __len__(self) -> int:
+        return len(self.contract)
+
+
+class Reduction:
+    """
+    Result of `reduce_events`, in sorted order.
+
+    Per row: `order` (index into the input), `outcome` (an `Outcome` code).
+    Per (contract, component) group with an accepted start: `group_*` arrays,
+    with -1 for an end that was never accepted.
+    """
+
+    __slots__ = (
+        "order", "outcome", "group_contract", "group_component",
+        "group_start_day", "group_start_us", "group_end_day", "group_end_us",
+    )
+
+    def __init__(self, **arrays: np.ndarray):
+        for name, value in arrays.items():
+            setattr(self, name, value)
+
+
+# Event type code -> (component, action), indexed like EventType
+_EVENT_TYPES: Tuple[EventType, ...] = tuple(EventType)
+_TYPE_CODE: Dict[str, int] = {et.value: i for i, et in enumerate(_EVENT_TYPES)}
+_TYPE_COMPONENT = np.array([event_codes(et)[0] for et in _EVENT_TYPES], dtype=np.int8)
+_TYPE_ACTION = np.array([event_codes(et)[1] for et in _EVENT_TYPES], dtype=np.int8)
+
+
+_FIELDS = ("type", "contract_number", "date", "created_at")
+
+
+def _iter_chunks(path: Path, chunk_rows: int) -> Iterator[Tuple[List[str], ...]]:
+    """The file's records as (type, contract_number, date, created_at) column lists."""
+    with path.open(newline="", encoding="utf-8") as fh:
+        if path.suffix.lower() in (".ndjson", ".jsonl"):
+            rows = (json.loads(line) for line in fh if line.strip())
+            picks = itemgetter(*_FIELDS)
+        else:
+            reader = csv.reader(fh)
+            header = next(reader, [])
+            try:
+                picks = itemgetter(*(header.index(name) for name in _FIELDS))
+            except ValueError as exc:
+                raise ValueError(f"{path}: missing column ({exc})") from exc
+            rows = (row for row in reader if row)
+        while True:
+            chunk = list(map(picks, itertools.islice(rows, chunk_rows)))
+            if not chunk:
+                return
+            yield tuple(map(list, zip(*chunk)))
+
+
+_UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def parse_days(values: Sequence[str]) -> np.ndarray:
+    """ISO dates to date ordinals, a whole chunk at once."""
+    return (np.array(values, dtype="datetime64[D]").astype(np.int64) + _UNIX_EPOCH_ORDINAL).astype(np.int32)
+
+
+def _created_us_per_row(values: Sequence[str]) -> np.ndarray:
+    return np.array([to_epoch_us(datetime.fromisoformat(value)) for value in values], dtype=np.int64)
+
+
+_TIMESTAMP_LAYOUT = re.compile(
+    r"\d{4}-\d\d-\d\dT\d\d:\d\d(?::(?P<second>\d\d)(?:\.(?P<fraction>\d{1,6}))?)?"
+    r"(?:Z|(?P<sign>[+-])(?P<offset_hour>\d\d)(?::?(?P<offset_minute>\d\d))?)?"
+)
+
+
+def parse_created_us(values: Sequence[str]) -> np.ndarray:
+    """
+    ISO 8601 timestamps to UTC epoch microseconds, a whole chunk at once; naive
+    ones are taken as UTC, like `to_epoch_us`.
+
+    Exports are machine-written, so a chunk usually repeats one layout: every
+    field then sits at the same byte columns as in the first value and is read
+    as columns of digits. Chunks that mix layouts (or hold anything
+    `fromisoformat` would reject) are parsed per row with `datetime.fromisoformat`.
+    """
+    if not len(values):
+        return np.empty(0, dtype=np.int64)
+    layout = _TIMESTAMP_LAYOUT.fullmatch(values[0])
+    try:
+        raw = np.asarray(values, dtype=np.bytes_)
+    except UnicodeEncodeError:
+        return _created_us_per_row(values)
+    if layout is None or raw.dtype.itemsize != len(values[0]):
+        return _created_us_per_row(values)
+    template = np.frombuffer(values[0].encode(), dtype=np.uint8)
+    grid = raw.view(np.uint8).reshape(len(raw), len(template))
+    is_digit = (template >= ord("0")) & (template <= ord("9"))
+    # Shorter values are zero padded, so they fail on their last column
+    fixed = ~is_digit
+    if layout["sign"]:
+        fixed[layout.start("sign")] = False
+        sign = grid[:, layout.start("sign")]
+        if ((sign != ord("+")) & (sign != ord("-"))).any():
+            return _created_us_per_row(values)
+    digits = grid[:, is_digit].astype(np.int16) - ord("0")
+    if (grid[:, fixed] != template[fixed]).any() or ((digits < 0) | (digits > 9)).any():
+        return _created_us_per_row(values)
+
+    column = np.cumsum(is_digit) - 1  # byte column -> column of `digits`
+
+    def number(start: int, end: int) -> np.ndarray:
+        value = np.zeros(len(raw), dtype=np.int64)
+        for c in column[start:end]:
+            value = value * 10 + digits[:, c]
+        return value
+
+    def group(name: str, scale: int = 1) -> np.ndarray:
+        if layout[name] is None:
+            return np.zeros(len(raw), dtype=np.int64)
+        return number(*layout.span(name)) * 10 ** (scale - len(layout[name]))
+
+    year, month, day, hour, minute = number(0, 4), number(5, 7), number(8, 10), number(11, 13), number(14, 16)
+    second, micros = group("second", 2), group("fraction", 6)
+    offset_minutes = group("offset_hour", 2) * 60 + group("offset_minute", 2)
+    months = (year - 1970) * 12 + month - 1
+    first = months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    days_in_month = (months + 1).astype("datetime64[M]").astype("datetime64[D]").astype(np.int64) - first
+    if (
+        (month < 1) | (month > 12) | (day < 1) | (day > days_in_month)
+        | (hour > 23) | (minute > 59) | (second > 59) | (offset_minutes >= 24 * 60)
+    ).any():
+        return _created_us_per_row(values)
+    if layout["sign"]:
+        offset_minutes = np.where(sign == ord("-"), -offset_minutes, offset_minutes)
+    seconds = (first + day - 1) * 86_400 + hour * 3600 + (minute - offset_minutes) * 60 + second
+    return seconds * 1_000_000 + micros
+
+
+def load_events(paths: Iterable[Path], chunk_rows: int = CHUNK_ROWS) -> EventColumns:
+    """Parse event files chunk by chunk, column by column, into compact NumPy columns."""
+    numbers: Dict[str, int] = {}
+    parts: Dict[str, List[np.ndarray]] = {"contract": [], "type": [], "day": [], "created_us": []}
+
+    for path in paths:
+        for raw_types, contract_numbers, days, created in _iter_chunks(path, chunk_rows):
+            types = list(map(_TYPE_CODE.get, raw_types))
+            if None in types:
+                raise ValueError(f"{path}: unsupported event type {raw_types[types.index(None)]!r}")
+            parts["type"].append(np.array(types, dtype=np.int8))
+            parts["contract"].append(np.array(
+                [numbers.setdefault(number, len(numbers)) for number in contract_numbers], dtype=np.int32
+            ))
+            parts["day"].append(parse_days(days))
+            parts["created_us"].append(parse_created_us(created))
+
+    if not parts["type"]:
+        parts = {name: [np.empty(0, dtype=dtype)] for name, dtype in (
+            ("contract", np.int32), ("type", np.int8), ("day", np.int32), ("created_us", np.int64),
+        )}
+    event_type = np.concatenate(parts["type"])
+    return EventColumns(
+        contract_numbers=list(numbers),
+        contract=np.concatenate(parts["contract"]),
+        component=_TYPE_COMPONENT[event_type],
+        action=_TYPE_ACTION[event_type],
+        day=np.concatenate(parts["day"]),
+        created_us=np.concatenate(parts["created_us"]),
+        event_type=event_type,
+    )
+
+
+def reduce_events(
+    contract: np.ndarray,
+    component: np.ndarray,
+    action: np.ndarray,
+    day: np.ndarray,
+    created_us: np.ndarray,
+) -> Reduction:
+    """
+    Compute each (contract, component)'s final window as if its events were
+    posted one by one in created_at order.
+
+    With strictly increasing created_at inside a group the rules reduce to:
+    every start before the first accepted end F is accepted, F is the first
+    end that has a preceding start and a date not before that start, and
+    after F starts are rejected while ends are accepted iff their date is not
+    before the (now frozen) start date. Groups with duplicate created_at fall
+    back to `apply_events`, since tie handling is order-dependent.
+    """
+    n = len(contract)
+    empty = np.empty(0, dtype=np.int64)
+    if n == 0:
+        return Reduction(
+            order=empty, outcome=np.empty(0, dtype=np.int8), group_contract=empty,
+            group_component=empty, group_start_day=empty, group_start_us=empty,
+            group_end_day=empty, group_end_us=empty,
+        )
+
+    # lexsort is stable: ties keep their input (file) order
+    order = np.lexsort((created_us, component, contract))
+    c, k, a, d, t = contract[order], component[order], action[order], day[order], created_us[order]
+    idx = np.arange(n)
+
+    first = np.ones(n, dtype=bool)
+    first[1:] = (c[1:] != c[:-1]) | (k[1:] != k[:-1])
+    group_first = np.flatnonzero(first)
+    group = np.cumsum(first) - 1
+    row_group_first = group_first[group]
+
+    is_start = a == Action.start
+    # Position of the latest start at or before each row, within its group
+    last_start = np.maximum.accumulate(np.where(is_start, idx, -1))
+    has_start = last_start >= row_group_first
+    start_day_ff = d[np.maximum(last_start, 0)]
+
+    # F: first end with a start before it and a date not before that start
+    candidate = ~is_start & has_start & (d >= start_day_ff)
+    first_end = np.minimum.reduceat(np.where(candidate, idx, n), group_first)
+    row_first_end = first_end[group]
+    has_end = first_end < n
+    frozen_day = np.where(has_end, start_day_ff[np.minimum(first_end, n - 1)], 0)[group]
+
+    accepted_start = is_start & (idx < row_first_end)
+    accepted_end = ~is_start & has_start & (idx >= row_first_end) & (d >= frozen_day)
+
+    outcome = np.full(n, Outcome.accepted, dtype=np.int8)
+    outcome[is_start & ~accepted_start] = Outcome.start_after_end
+    outcome[~is_start & ~has_start] = Outcome.end_without_start
+    outcome[~is_start & has_start & ~accepted_end] = Outcome.end_before_start
+
+    final_start = np.maximum.reduceat(np.where(accepted_start, idx, -1), group_first)
+    final_end = np.maximum.reduceat(np.where(accepted_end, idx, -1), group_first)
+
+    # Exact fallback for groups where created_at ties make the result order-dependent
+    tie = np.zeros(n, dtype=bool)
+    tie[1:] = ~first[1:] & (t[1:] == t[:-1])
+    start_day = np.where(final_start >= 0, d[np.maximum(final_start, 0)], -1).astype(np.int64)
+    start_us = np.where(final_start >= 0, t[np.maximum(final_start, 0)], -1).astype(np.int64)
+    end_day = np.where(final_end >= 0, d[np.maximum(final_end, 0)], -1).astype(np.int64)
+    end_us = np.where(final_end >= 0, t[np.maximum(final_end, 0)], -1).astype(np.int64)
+    for g in np.unique(group[tie]):
+        lo = group_first[g]
+        hi = group_first[g + 1] if g + 1 < len(group_first) else n
+        state = ContractState()
+        events = [
+            RuleEvent(Component(int(k[i])), Action(int(a[i])), int(d[i]), int(t[i]))
+            for i in range(lo, hi)
+        ]
+        outcome[lo:hi] = apply_events(state, events)
+        window = state.get(Component(int(k[lo])))
+        start_day[g] = -1 if window.start_us is None else window.start_date
+        start_us[g] = -1 if window.start_us is None else window.start_us
+        end_day[g] = -1 if window.end_us is None else window.end_date
+        end_us[g] = -1 if window.end_us is None else window.end_us
+
+    keep = start_us >= 0  # groups with only rejected ends never get a state row
+    return Reduction(
+        order=order,
+        outcome=outcome,
+        group_contract=c[group_first][keep].astype(np.int64),
+        group_component=k[group_first][keep].astype(np.int64),
+        group_start_day=start_day[keep],
+        group_start_us=start_us[keep],
+        group_end_day=end_day[keep],
+        group_end_us=end_us[keep],
+    )
+
+
+_insert_document = sqlite_insert(TimelineDocument.__table__)
+# Same replacement as `put_timeline_document`, as an executemany statement
+_UPSERT_DOCUMENT = _insert_document.on_conflict_do_update(
+    index_elements=[TimelineDocument.__table__.c.contract_number],
+    set_={name: _insert_document.excluded[name] for name in ("contract_id", "document", "updated_at")},
+)
+
+
+def _batches(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    batch: List[dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _load_contracts(
+    engines: Sequence[AsyncEngine], numbers: Sequence[str]
+) -> Tuple[np.ndarray, np.ndarray, list]:
+    """Map contract codes to (row in `ids`, component bitmask); -1 for unknown contracts."""
+    index = {number: i for i, number in enumerate(numbers)}
+    slot = np.full(len(numbers), -1, dtype=np.int64)
+    mask = np.zeros(len(numbers), dtype=np.int64)
+    ids: list = []
+    for engine in engines:
+        async with engine.connect() as conn:
+            result = await conn.stream(
+                select(Contract.contract_number, Contract.id, Contract.components).where(Contract.deleted_at.is_(None))
+            )
+            async for number, contract_id, components in result:
+                code = index.get(number)
+                if code is None:
+                    continue
+                slot[code] = len(ids)
+                ids.append(contract_id)
+                mask[code] = sum(1 << Component[comp] for comp in components)
+    return slot, mask, ids
+
+
+async def backfill(
+    engines: Sequence[AsyncEngine],
+    paths: Sequence[Path],
+    *,
+    audit: bool = False,
+    dry_run: bool = False,
+    batch_size: int = 50_000,
+) -> Dict[str, int]:
+    started = time.perf_counter()
+    cols = load_events(paths)
+    logger.info("Loaded {} events for {} contracts in {:.1f}s", len(cols), len(cols.contract_numbers), time.perf_counter() - started)
+
+    for engine in engines:
+        async with engine.connect() as conn:
+            if await conn.scalar(select(ComponentState.id).limit(1)) is not None:
+                raise RuntimeError("component_state is not empty; backfill only loads into an empty database")
+
+    slot, mask, contract_ids = await _load_contracts(engines, cols.contract_numbers)
+    # Rows are written to the shard owning their contract number
+    code_shard = np.array(
+        [shard_for(number, len(engines)) for number in cols.contract_numbers], dtype=np.int64
+    )
+    row_slot = slot[cols.contract]
+    known = row_slot >= 0
+    configured = known & ((mask[cols.contract] >> cols.component.astype(np.int64)) & 1).astype(bool)
+
+    valid = np.flatnonzero(configured)
+    red = reduce_events(
+        cols.contract[valid], cols.component[valid], cols.action[valid], cols.day[valid], cols.created_us[valid]
+    )
+    accepted = int(np.count_nonzero(red.outcome == Outcome.accepted))
+    stats = {
+        "events": len(cols),
+        "accepted": accepted,
+        "rejected": len(cols) - accepted,
+        "states": len(red.group_contract),
+    }
+    logger.info("Reduced events in {:.1f}s: {}", time.perf_counter() - started, stats)
+    if dry_run:
+        return stats
+
+    def state_rows(shard: int, first_seq: int) -> Iterator[dict]:
+        # Stamped like live writes, so the changes feed and warmup see backfilled states
+        seq = itertools.count(first_seq)
+        for contract, component, s_day, s_us, e_day, e_us in zip(
+            red.group_contract.tolist(), red.group_component.tolist(),
+            red.group_start_day.tolist(), red.group_start_us.tolist(),
+            red.group_end_day.tolist(), red.group_end_us.tolist(),
+        ):
+            if code_shard[contract] != shard:
+                continue
+            yield {
+                "contract_id": contract_ids[slot[contract]],
+                "component_type": COMPONENT_TYPES[component],
+                "start_date": date.fromordinal(s_day),
+                "start_event_created_at": from_epoch_us(s_us),
+                "end_date": None if e_us < 0 else date.fromordinal(e_day),
+                "end_event_created_at": None if e_us < 0 else from_epoch_us(e_us),
+                "change_seq": next(seq),
+            }
+
+    def document_rows(shard: int) -> Iterator[dict]:
+        # Byte-identical to what `materialize_timeline` writes: its state read walks
+        # uq_contract_component, so components are listed in name order
+        updated_at = utc_now()
+        ends = np.flatnonzero(np.diff(red.group_contract, append=-1)) + 1
+        for first, last in zip(np.concatenate(([0], ends[:-1])).tolist(), ends.tolist()):
+            contract = int(red.group_contract[first])
+            if code_shard[contract] != shard:
+                continue
+            number = cols.contract_numbers[contract]
+            states = sorted((
+                ComponentStateRow(
+                    contract_id=None,
+                    component_type=COMPONENT_TYPES[component],
+                    start_date=date.fromordinal(s_day),
+                    start_event_created_at=None,
+                    end_date=None if e_us < 0 else date.fromordinal(e_day),
+                    end_event_created_at=None,
+                )
+                for component, s_day, e_day, e_us in zip(
+                    red.group_component[first:last].tolist(), red.group_start_day[first:last].tolist(),
+                    red.group_end_day[first:last].tolist(), red.group_end_us[first:last].tolist(),
+                )
+            ), key=lambda state: state.component_type.name)
+            yield {
+                "contract_number": number,
+                "contract_id": contract_ids[slot[contract]],
+                "document": serialize_timeline(timeline_from_states(number, states)),
+                "updated_at": updated_at,
+            }
+
+    outcome = np.full(len(cols), CONTRACT_NOT_FOUND, dtype=np.int8)
+    outcome[known] = COMPONENT_NOT_CONFIGURED
+    outcome[valid[red.order]] = red.outcome
+    row_shard = code_shard[cols.contract]
+
+    def audit_rows(shard: int) -> Iterator[dict]:
+        for i in np.flatnonzero(row_shard == shard).tolist():
+            code = int(outcome[i])
+            number = cols.contract_numbers[cols.contract[i]]
+            component = COMPONENT_TYPES[cols.component[i]]
+            if code == CONTRACT_NOT_FOUND:
+                reason = AuditReason.contract_not_found
+            elif code == COMPONENT_NOT_CONFIGURED:
+                reason = AuditReason.component_not_configured
+            else:
+                reason = AuditReason(code)
+            yield {
+                "contract_id": None if code == CONTRACT_NOT_FOUND else contract_ids[row_slot[i]],
+                "contract_number": number if code == CONTRACT_NOT_FOUND else None,
+                "raw_type": _EVENT_TYPES[cols.event_type[i]],
+                "component_type": component,
+                "action": ACTIONS[cols.action[i]],
+                "event_date": date.fromordinal(int(cols.day[i])),
+                "event_created_at": from_epoch_us(int(cols.created_us[i])),
+                "reason": reason,
+            }
+
+    for shard, engine in enumerate(engines):
+        async with engine.begin() as conn:
+            # Reserved from the database's change counter like live writes
+            count = int(np.count_nonzero(code_shard[red.group_contract] == shard))
+            first_seq = await current_change_seq(conn) + 1
+            await advance_change_seq(conn, count)
+            for batch in _batches(state_rows(shard, first_seq), batch_size):
+                await conn.execute(insert(ComponentState), batch)
+            if settings.ENABLE_MATERIALIZED_TIMELINES:
+                # Created contracts hold empty documents; replace them in the same transaction
+                for batch in _batches(document_rows(shard), batch_size):
+                    await conn.execute(_UPSERT_DOCUMENT, batch)
+    logger.info("Wrote {} component states", stats["states"])
+    if audit:
+        written = 0
+        for shard, engine in enumerate(engines):
+            for batch in _batches(audit_rows(shard), batch_size):
+                # One transaction per batch keeps the write lock short on huge audits
+                async with engine.begin() as conn:
+                    await conn.execute(insert(Event), batch)
+                written += len(batch)
+                logger.info("Wrote {}/{} audit rows", written, len(cols))
+    logger.info("Backfill finished in {:.1f}s", time.perf_counter() - started)
+    return stats
+
+
+async def _run(args: argparse.Namespace) -> None:
+    from app.db.migrations import ensure_schema
+    from app.db.session import get_engines
+
+    engines = get_engines()
+    try:
+        for engine in engines:
+            await ensure_schema(engine)
+        stats = await backfill(
+            engines, args.paths, audit=args.audit, dry_run=args.dry_run, batch_size=args.batch_size
+        )
+        print(json.dumps(stats))
+    finally:
+        for engine in engines:
+            await engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.tools.backfill", description="Backfill historical events.")
+    parser.add_argument("paths", nargs="+", type=Path, help="CSV or NDJSON event files")
+    parser.add_argument("--audit", action="store_true", help="also write one event_audit row per event")
+    parser.add_argument("--dry-run", action="store_true", help="compute states without writing")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    asyncio.run(_run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Consistency checker for materialized timeline documents.
+
+    python -m app.tools.check_timelines [--repair]
+
+Recomputes every contract's timeline from `component_state` and compares it
+with the stored `timeline_document`. Exits with status 1 when documents are
+missing, stale or orphaned; `--repair` rewrites or deletes them.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.services.timeline_services import materialize_timeline, serialize_timeline, timeline_from_states
+from app.db.crud.component_state import list_component_states_for_contracts
+from app.db.models.models import Contract, TimelineDocument
+
+
+async def check_timelines(db: AsyncSession, *, repair: bool = False, batch_size: int = 500) -> Dict[str, List[str]]:
+    """Return contract numbers per problem kind: missing, mismatched, orphaned."""
+    report: Dict[str, List[str]] = {"missing": [], "mismatched": [], "orphaned": []}
+    after = ""
+    while True:
+        page = (await db.execute(
+            select(Contract.id, Contract.contract_number)
+            .where(Contract.contract_number > after, Contract.deleted_at.is_(None))
+            .order_by(Contract.contract_number)
+            .limit(batch_size)
+        )).all()
+        if not page:
+            break
+        after = page[-1].contract_number
+        ids = {row.id: row.contract_number for row in page}
+
+        states: Dict = {contract_id: [] for contract_id in ids}
+        for state in await list_component_states_for_contracts(db, ids):
+            states[state.contract_id].append(state)
+        documents = dict((await db.execute(
+            select(TimelineDocument.contract_number, TimelineDocument.document)
+            .where(TimelineDocument.contract_number.in_(list(ids.values())))
+        )).all())
+
+        for contract_id, number in ids.items():
+            expected = json.loads(serialize_timeline(timeline_from_states(number, states[contract_id])))
+            stored = documents.get(number)
+            if stored is None:
+                report["missing"].append(number)
+            elif json.loads(stored) != expected:
+                report["mismatched"].append(number)
+            else:
+                continue
+            if repair:
+                await materialize_timeline(db, number, contract_id)
+        if repair:
+            await db.commit()
+
+    orphaned = select(TimelineDocument.contract_number).where(
+        ~select(Contract.id).where(
+            Contract.contract_number == TimelineDocument.contract_number, Contract.deleted_at.is_(None)
+        ).exists()
+    )
+    report["orphaned"] = list(await db.scalars(orphaned))
+    if repair and report["orphaned"]:
+        await db.execute(delete(TimelineDocument).where(TimelineDocument.contract_number.in_(report["orphaned"])))
+        await db.commit()
+    return report
+
+
+async def _run(repair: bool) -> int:
+    from app.db.session import get_engines, get_session_makers
+
+    report: Dict[str, List[str]] = {"missing": [], "mismatched": [], "orphaned": []}
+    try:
+        # Documents live on the same shard as their contract, so shards are checked independently
+        for session_maker in get_session_makers():
+            async with session_maker() as db:
+                for kind, numbers in (await check_timelines(db, repair=repair)).items():
+                    report[kind].extend(numbers)
+    finally:
+        for engine in get_engines():
+            await engine.dispose()
+    print(json.dumps({kind: len(numbers) for kind, numbers in report.items()}))
+    for kind, numbers in report.items():
+        for number in numbers[:20]:
+            print(f"{kind}: {number}")
+    return 0 if repair or not any(report.values()) else 1
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.tools.check_timelines", description="Verify materialized timelines.")
+    parser.add_argument("--repair", action="store_true", help="rewrite missing/stale documents and drop orphans")
+    args = parser.parse_args(argv)
+    raise SystemExit(asyncio.run(_run(args.repair)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Convert stored component_state event timestamps between encodings.
+
+    python -m app.tools.compact_timestamps [--expand] [--batch-size 1000]
+
+By default rewrites DATETIME text values as integer epoch microseconds (run it
+after enabling COMPACT_EVENT_TIMESTAMPS); `--expand` converts back to text
+before disabling the setting. Rows already in the target encoding are skipped,
+so the tool can be re-run or interrupted safely.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from typing import Dict, List, Optional
+
+from sqlalchemy import BigInteger, DateTime, bindparam, func, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.models.models import ComponentState
+from app.domain.rules import to_epoch_us
+
+COLUMNS = (ComponentState.start_event_created_at, ComponentState.end_event_created_at)
+
+
+async def convert_timestamps(engine: AsyncEngine, *, compact: bool = True, batch_size: int = 1000) -> Dict[str, int]:
+    """Rewrite values not yet in the target encoding; returns rows converted per column."""
+    target = "integer" if compact else "text"
+    converted: Dict[str, int] = {}
+    for column in COLUMNS:
+        # The value is bound with an explicit type so the setting does not pick the encoding
+        stmt = (
+            update(ComponentState)
+            .where(ComponentState.id == bindparam("row_id"))
+            .values({column.key: bindparam("value", type_=BigInteger() if compact else DateTime(timezone=True))})
+        )
+        converted[column.key] = 0
+        while True:
+            async with engine.begin() as conn:
+                rows = (await conn.execute(
+                    select(ComponentState.id, column)
+                    .where(column.is_not(None), func.typeof(column) != target)
+                    .limit(batch_size)
+                )).all()
+                if not rows:
+                    break
+                await conn.execute(stmt, [
+                    {"row_id": row_id, "value": to_epoch_us(value) if compact else value}
+                    for row_id, value in rows
+                ])
+            converted[column.key] += len(rows)
+    return converted
+
+
+async def _run(compact: bool, batch_size: int) -> List[Dict[str, int]]:
+    from app.db.session import get_engines
+
+    engines = get_engines()
+    try:
+        return [await convert_timestamps(engine, compact=compact, batch_size=batch_size) for engine in engines]
+    finally:
+        for engine in engines:
+            await engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.tools.compact_timestamps", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--expand", action="store_true", help="convert integer values back to DATETIME text")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+    for shard in asyncio.run(_run(not args.expand, args.batch_size)):
+        print(json.dumps(shard))
+
+
+if __name__ == "__main__":
+    main()
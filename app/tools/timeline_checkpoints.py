@@ -0,0 +1,64 @@
+"""
+Pre-build point-in-time timeline checkpoints.
+
+    python -m app.tools.timeline_checkpoints [--interval 256]
+
+Replays every contract's accepted audit history up to now and stores a
+checkpoint every `--interval` rows, so the first `?as_of=` read of a long
+history does not pay for the full replay. Safe to run periodically: each run
+starts from the latest existing checkpoint.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.services.timeline_history import write_due_checkpoints
+from app.db.models.models import Contract
+
+
+async def build_checkpoints(db: AsyncSession, *, interval: Optional[int] = None, batch_size: int = 500) -> int:
+    """Returns the number of contracts replayed."""
+    after, replayed = "", 0
+    while True:
+        page = (await db.execute(
+            select(Contract.id, Contract.contract_number)
+            .where(Contract.contract_number > after, Contract.deleted_at.is_(None))
+            .order_by(Contract.contract_number)
+            .limit(batch_size)
+        )).all()
+        if not page:
+            return replayed
+        after = page[-1].contract_number
+        for contract_id, _number in page:
+            await write_due_checkpoints(db, contract_id, interval=interval)
+        replayed += len(page)
+
+
+async def _run(interval: Optional[int]) -> int:
+    from app.db.session import get_engines, get_session_makers
+
+    total = 0
+    try:
+        for session_maker in get_session_makers():
+            async with session_maker() as db:
+                total += await build_checkpoints(db, interval=interval)
+    finally:
+        for engine in get_engines():
+            await engine.dispose()
+    return total
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.tools.timeline_checkpoints", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--interval", type=int, default=None, help="rows per checkpoint (default TIMELINE_CHECKPOINT_INTERVAL)")
+    args = parser.parse_args(argv)
+    print(f"Replayed {asyncio.run(_run(args.interval))} contracts")
+
+
+if __name__ == "__main__":
+    main()
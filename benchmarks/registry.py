@@ -0,0 +1,79 @@
+"""
+Contract registry benchmark: contract lookups from the database vs the shared registry.
+
+    python -m benchmarks.registry [--contracts 5000] [--lookups 50000]
+
+Resolves random contract numbers through `lookup_contract`, the lookup
+`process_event` uses, with CONTRACT_REGISTRY_ENABLED off (a query per lookup,
+both repositories) and on (one query per contract to fill, then memory reads),
+against an on-disk SQLite database, and reports the process CPU time per lookup.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.services.registry_services import contract_registry, lookup_contract
+from app.config import settings
+from app.db.crud.contract import create_contract
+from app.db.session import Base
+from app.domain.enums import ComponentType
+from app.dto.contract import ContractPayload
+
+
+async def measure(mode: str, *, contracts: int, lookups: int, workdir: str) -> Dict:
+    settings.DB_REPOSITORY = "orm" if mode == "orm" else "core"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(workdir, mode)}.db")
+    session_maker = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    numbers = [f"C-{i:06d}" for i in range(contracts)]
+    async with session_maker() as db:
+        for number in numbers:
+            await create_contract(db, ContractPayload(contract_number=number, components=list(ComponentType)))
+
+    if mode == "registry":
+        contract_registry.open(os.path.join(workdir, "contracts.registry"), 4 * contracts)
+    rng = random.Random(3)
+    keys = [rng.choice(numbers) for _ in range(lookups)]
+    async with session_maker() as db:
+        started = time.process_time()
+        for number in keys:
+            await lookup_contract(db, number)
+        elapsed = time.process_time() - started
+    stats = contract_registry.stats()
+    contract_registry.close()
+    await engine.dispose()
+    return {
+        "mode": mode,
+        "lookups": lookups,
+        "us_per_lookup": round(elapsed / lookups * 1e6, 2),
+        "registry_hits": stats["hits"] if mode == "registry" else 0,
+    }
+
+
+async def _run(args) -> None:
+    with tempfile.TemporaryDirectory() as workdir:
+        for mode in ("orm", "core", "registry"):
+            result = await measure(mode, contracts=args.contracts, lookups=args.lookups, workdir=workdir)
+            print(json.dumps(result), flush=True)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.registry", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--contracts", type=int, default=5_000)
+    parser.add_argument("--lookups", type=int, default=50_000)
+    args = parser.parse_args(argv)
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Reorder-window benchmark: rejections and state writes for out-of-order delivery.
+
+    python -m benchmarks.reorder [--contracts 2000] [--rate 100] [--jitter-ms 20] [--windows 0,10,25,50]
+
+Every contract gets one start and one end event, created a millisecond apart;
+contracts begin at `--rate` per second and each event is delivered after a
+random delay of up to `--jitter-ms`, so many ends arrive before their start the
+way gateway traffic does. A rejected event is delivered once more after
+`--retry-ms`, like a gateway retry. The events go through the same
+`ReorderBuffer` and `process_events` as POST /event, once per window (0 = no
+window, each event processed on arrival). Reports deliveries, first-attempt
+rejections, component_state writes and the latency per delivery.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.services.event_services import process_events
+from app.config import settings
+from app.db.crud.contract import create_contract
+from app.db.session import Base
+from app.domain.enums import ComponentType
+from app.domain.rules import RuleEvent
+from app.dto.contract import ContractPayload
+from app.dto.event import EventPayload
+from app.infra.reorder import ReorderBuffer
+
+
+async def measure(
+    window_ms: float, *, contracts: int, rate: float, jitter_ms: float, retry_ms: float, workdir: str
+) -> Dict:
+    settings.DB_REPOSITORY = "core"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(workdir, f'w{window_ms}')}.db")
+    session_maker = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        await conn.run_sync(Base.metadata.create_all)
+    numbers = [f"R-{i:06d}" for i in range(contracts)]
+    async with session_maker() as db:
+        for number in numbers:
+            await create_contract(db, ContractPayload(contract_number=number, components=[ComponentType.energy_supply]))
+
+    state_writes = 0
+
+    def count_writes(conn, cursor, statement, parameters, context, executemany):
+        nonlocal state_writes
+        if "component_state" in statement and statement.lstrip().upper().startswith(("INSERT", "UPDATE")):
+            state_writes += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_writes)
+
+    # SQLite has one writer; serialized so no flush waits out the busy timeout
+    lock = asyncio.Lock()
+
+    async def flush(key, payloads: List[EventPayload]):
+        async with lock, session_maker() as db:
+            return await process_events(db, payloads)
+
+    buffer = ReorderBuffer(window_ms / 1000, max_pending=100_000, flush=flush)
+    rng = random.Random(11)
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    latencies: List[float] = []
+    rejected = 0
+
+    async def deliver(payload: EventPayload, delay_s: float, retry: bool = True) -> None:
+        nonlocal rejected
+        await asyncio.sleep(delay_s)
+        started = time.perf_counter()
+        rule = RuleEvent.from_type(payload.event_type, payload.event_date, payload.created_at)
+        response = await buffer.submit((payload.contract_number, rule.component), rule.created_us, payload)
+        latencies.append(time.perf_counter() - started)
+        if response.status == "rejected" and retry:
+            rejected += 1
+            await deliver(payload, retry_ms / 1000, retry=False)
+
+    deliveries = []
+    for i, number in enumerate(numbers):
+        created = base + timedelta(seconds=i)
+        for offset, type_, day in ((0, "supply_energy_start", 1), (1, "supply_energy_end", 2)):
+            payload = EventPayload.model_validate({
+                "type": type_, "contract_number": number, "date": date(2024, 1, day),
+                "created_at": created + timedelta(milliseconds=offset),
+            })
+            # Contracts start in sequence; each event arrives after a random delay
+            deliveries.append(deliver(payload, i / rate + rng.uniform(0, jitter_ms / 1000)))
+    await asyncio.gather(*deliveries)
+    await buffer.drain()
+    await engine.dispose()
+
+    latencies.sort()
+    return {
+        "window_ms": window_ms,
+        "events": 2 * contracts,
+        "deliveries": len(latencies),
+        "rejected": rejected,
+        "state_writes": state_writes,
+        "reordered": buffer.reordered,
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+    }
+
+
+async def _run(args) -> None:
+    with tempfile.TemporaryDirectory() as workdir:
+        for window in args.windows:
+            result = await measure(
+                window, contracts=args.contracts, rate=args.rate, jitter_ms=args.jitter_ms,
+                retry_ms=args.retry_ms, workdir=workdir,
+            )
+            print(json.dumps(result), flush=True)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.reorder", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--contracts", type=int, default=2_000)
+    parser.add_argument("--rate", type=float, default=100.0, help="contracts started per second")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="maximum delivery delay per event")
+    parser.add_argument("--retry-ms", type=float, default=500.0, help="delay before a rejected event is retried")
+    parser.add_argument(
+        "--windows", type=lambda s: [float(w) for w in s.split(",")], default=[0.0, 10.0, 25.0, 50.0],
+        help="comma-separated reorder windows in ms",
+    )
+    args = parser.parse_args(argv)
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
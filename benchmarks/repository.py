@@ -0,0 +1,101 @@
+"""
+Repository benchmark: ORM vs Core implementations of the hot data access.
+
+    python -m benchmarks.repository [--contracts 2000] [--events 20000] [--reads 20000]
+
+Runs the `POST /event` service (`process_event`) and the uncached timeline
+build behind `GET /contract/{n}/contract_timeline` against an on-disk SQLite
+database, once with DB_REPOSITORY=orm and once with DB_REPOSITORY=core, and
+reports the process CPU time per call. CPU time rather than wall time, so the numbers show
+the Python work each implementation saves and not disk latency.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.services.event_services import process_event
+from app.api.services.timeline_services import _build_timeline
+from app.config import settings
+from app.db.crud.contract import create_contract
+from app.db.session import Base
+from app.domain.enums import ComponentType, EventType
+from app.dto.contract import ContractPayload
+from app.dto.event import EventPayload
+
+_TYPES: List[EventType] = list(EventType)
+
+
+async def measure(repository: str, *, contracts: int, events: int, reads: int, workdir: str) -> Dict:
+    settings.DB_REPOSITORY = repository
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(workdir, repository)}.db")
+    session_maker = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        await conn.run_sync(Base.metadata.create_all)
+
+    numbers = [f"C-{i:06d}" for i in range(contracts)]
+    rng = random.Random(7)
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    async with session_maker() as db:
+        for number in numbers:
+            await create_contract(db, ContractPayload(contract_number=number, components=list(ComponentType)))
+
+        payloads = [
+            EventPayload.model_validate({
+                "type": rng.choice(_TYPES),
+                "contract_number": rng.choice(numbers),
+                "date": date(2024, 1, 1) + timedelta(days=i // 100),
+                "created_at": base + timedelta(seconds=i),
+            })
+            for i in range(events)
+        ]
+        started = time.process_time()
+        for payload in payloads:
+            await process_event(db, payload)
+        event_cpu = time.process_time() - started
+
+        started = time.process_time()
+        for i in range(reads):
+            await _build_timeline(db, numbers[i % contracts])
+        read_cpu = time.process_time() - started
+    await engine.dispose()
+
+    return {
+        "repository": repository,
+        "events": events,
+        "event_cpu_us": round(event_cpu / events * 1e6, 1),
+        "reads": reads,
+        "timeline_read_cpu_us": round(read_cpu / reads * 1e6, 1),
+    }
+
+
+async def _run(args) -> None:
+    with tempfile.TemporaryDirectory() as workdir:
+        for repository in ("orm", "core"):
+            result = await measure(
+                repository, contracts=args.contracts, events=args.events, reads=args.reads, workdir=workdir
+            )
+            print(json.dumps(result), flush=True)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.repository", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--contracts", type=int, default=2_000)
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--reads", type=int, default=20_000)
+    args = parser.parse_args(argv)
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
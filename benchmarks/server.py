@@ -0,0 +1,177 @@
+"""
+Server configuration benchmark for the `python -m app` launcher.
+
+    python -m benchmarks.server [--duration 20] [--concurrency 64] [--contracts 500]
+
+Starts the launcher once per configuration (event loop, HTTP parser, workers),
+each on a fresh temporary database, seeds contracts, and then drives a mixed
+load for `--duration` seconds from `--concurrency` keep-alive connections:
+three `POST /event` for every `GET /contract/{n}/contract_timeline`. Reports requests per
+second and latency percentiles for each configuration.
+
+Configurations whose implementations are not installed are skipped; install
+them with `poetry install -E server`.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.server import resolve_workers
+
+CONFIGURATIONS: List[Dict[str, str]] = [
+    {"name": "asyncio+h11, 1 worker", "SERVER_LOOP": "asyncio", "SERVER_HTTP": "h11", "SERVER_WORKERS": "1"},
+    {"name": "uvloop+httptools, 1 worker", "SERVER_LOOP": "uvloop", "SERVER_HTTP": "httptools", "SERVER_WORKERS": "1"},
+    {"name": "uvloop+httptools, 1 per CPU", "SERVER_LOOP": "uvloop", "SERVER_HTTP": "httptools", "SERVER_WORKERS": "0"},
+]
+
+_EVENT_TYPES = ["supply_energy_start", "supply_energy_end", "battery_optimization_start", "battery_optimization_end"]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _available(config: Dict[str, str]) -> bool:
+    return all(
+        importlib.util.find_spec(module) is not None
+        for module in (config["SERVER_LOOP"], config["SERVER_HTTP"])
+        if module not in ("asyncio", "h11")
+    )
+
+
+async def _wait_ready(client: httpx.AsyncClient, process: subprocess.Popen, timeout_s: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with {process.returncode}")
+        try:
+            if (await client.get("/health/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+async def _drive(base_url: str, *, duration: float, concurrency: int, contracts: int) -> Dict:
+    numbers = [f"B-{i:05d}" for i in range(contracts)]
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        for number in numbers:
+            await client.post("/contract", json={
+                "contract_number": number, "components": ["energy_supply", "battery_optimization"],
+            })
+
+        latencies: List[float] = []
+        errors = 0
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        deadline = time.monotonic() + duration
+
+        async def user(seed: int) -> None:
+            nonlocal errors
+            rng = random.Random(seed)
+            i = 0
+            while time.monotonic() < deadline:
+                number = rng.choice(numbers)
+                started = time.perf_counter()
+                try:
+                    if i % 4 == 3:
+                        res = await client.get(f"/contract/{number}/contract_timeline")
+                    else:
+                        res = await client.post("/event", json={
+                            "type": rng.choice(_EVENT_TYPES),
+                            "contract_number": number,
+                            "date": "2024-06-01",
+                            "created_at": (base + timedelta(microseconds=rng.getrandbits(40))).isoformat(),
+                        })
+                    # Rejected events are 200s, so any 4xx/5xx means the run is not measuring the service
+                    errors += res.status_code >= 400
+                except httpx.TransportError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+                i += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(user(seed) for seed in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2)
+
+    return {
+        "requests": len(latencies),
+        "req_per_s": round(len(latencies) / elapsed),
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99),
+        "errors": errors,
+    }
+
+
+async def measure(config: Dict[str, str], *, duration: float, concurrency: int, contracts: int) -> Optional[Dict]:
+    if not _available(config):
+        return None
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {
+            **os.environ,
+            **{k: v for k, v in config.items() if k != "name"},
+            "ASYNC_DATABASE_URL": f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}",
+            "DB_AUTO_MIGRATE": "true",
+        }
+        process = subprocess.Popen(
+            [sys.executable, "-m", "app", "--port", str(port)],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            async with httpx.AsyncClient(base_url=base_url) as probe:
+                await _wait_ready(probe, process)
+            result = await _drive(base_url, duration=duration, concurrency=concurrency, contracts=contracts)
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
+    return {
+        "configuration": config["name"],
+        "workers": resolve_workers(int(config["SERVER_WORKERS"])),
+        **result,
+    }
+
+
+async def _run(args) -> None:
+    for config in CONFIGURATIONS:
+        result = await measure(config, duration=args.duration, concurrency=args.concurrency, contracts=args.contracts)
+        if result is None:
+            print(json.dumps({"configuration": config["name"], "skipped": "not installed"}), flush=True)
+        else:
+            print(json.dumps(result), flush=True)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.server", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of load per configuration")
+    parser.add_argument("--concurrency", type=int, default=64, help="concurrent keep-alive connections")
+    parser.add_argument("--contracts", type=int, default=500)
+    args = parser.parse_args(argv)
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Soak benchmark: latency drift and storage growth under a long mixed workload.
+
+    python -m benchmarks.soak [--duration 3600] [--interval 30] [--concurrency 16] [--output soak.jsonl]
+
+Starts `python -m app` on a fresh database with the event audit enabled and
+drives a mixed workload for `--duration` seconds: mostly `POST /event`, plus
+timeline reads, contract creation, contract reads and listing pages. Every
+`--interval` seconds one sample is appended to `--output` (JSON lines):
+throughput, p50/p99 latency and errors for the interval, the database and WAL
+file sizes, the server's RSS, and the pool and admission figures from
+`/metrics`, so pool exhaustion shows as checked-out connections at capacity.
+
+At the end the last samples are compared with the first ones (after
+`--warmup` seconds) and any drift beyond the thresholds is reported; the exit
+status is 1 when something drifted, so the run can gate a release.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.server import _free_port, _wait_ready
+
+_EVENT_TYPES = ["supply_energy_start", "supply_energy_end", "battery_optimization_start", "battery_optimization_end"]
+_MB = 2**20
+
+
+def _file_mb(path: str) -> float:
+    try:
+        return round(os.path.getsize(path) / _MB, 2)
+    except OSError:
+        return 0.0
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            return round(int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / _MB, 1)
+    except (OSError, ValueError):
+        return None
+
+
+class Workload:
+    """Mixed traffic: 70% events, 15% timeline reads, 5% new contracts, 5% contract reads, 5% listing pages."""
+
+    def __init__(self, client: httpx.AsyncClient, contracts: int) -> None:
+        self.client = client
+        self.numbers = [f"S-{i:07d}" for i in range(contracts)]
+        self.base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    async def seed(self) -> None:
+        for number in self.numbers:
+            await self._create(number)
+
+    async def _create(self, number: str) -> httpx.Response:
+        return await self.client.post("/contract", json={
+            "contract_number": number, "components": ["energy_supply", "battery_optimization"],
+        })
+
+    async def one(self, rng: random.Random) -> None:
+        number = rng.choice(self.numbers)
+        roll = rng.random()
+        started = time.perf_counter()
+        try:
+            if roll < 0.70:
+                res = await self.client.post("/event", json={
+                    "type": rng.choice(_EVENT_TYPES),
+                    "contract_number": number,
+                    "date": "2024-06-01",
+                    "created_at": (self.base + timedelta(microseconds=rng.getrandbits(40))).isoformat(),
+                })
+            elif roll < 0.85:
+                res = await self.client.get(f"/contract/{number}/contract_timeline")
+            elif roll < 0.90:
+                number = f"S-{len(self.numbers):07d}"
+                self.numbers.append(number)
+                res = await self._create(number)
+            elif roll < 0.95:
+                res = await self.client.get(f"/contract/{number}")
+            else:
+                res = await self.client.get("/contract", params={"limit": 100, "order_by": "created_at"})
+            self.errors += res.status_code >= 500
+        except httpx.TransportError:
+            self.errors += 1
+        self.latencies.append(time.perf_counter() - started)
+
+    def take_window(self) -> tuple:
+        latencies, errors = sorted(self.latencies), self.errors
+        self.latencies, self.errors = [], 0
+        return latencies, errors
+
+
+def _percentile_ms(latencies: List[float], p: float) -> Optional[float]:
+    if not latencies:
+        return None
+    return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2)
+
+
+def detect_drift(samples: List[Dict], *, window: int, max_p99_ratio: float, max_throughput_drop: float,
+                 max_rss_growth_mb: float, max_wal_mb: float) -> List[str]:
+    """Compares the mean of the first and last `window` samples; returns one line per breached threshold."""
+    if len(samples) < 2 * window:
+        return []
+    first, last = samples[:window], samples[-window:]
+
+    def mean(rows: List[Dict], key: str) -> Optional[float]:
+        values = [row[key] for row in rows if row.get(key) is not None]
+        return sum(values) / len(values) if values else None
+
+    findings = []
+    p99_before, p99_after = mean(first, "p99_ms"), mean(last, "p99_ms")
+    if p99_before and p99_after and p99_after > p99_before * max_p99_ratio:
+        findings.append(f"p99 latency drifted {p99_before:.1f} -> {p99_after:.1f} ms (limit x{max_p99_ratio})")
+    rate_before, rate_after = mean(first, "req_per_s"), mean(last, "req_per_s")
+    if rate_before and rate_after is not None and rate_after < rate_before * (1 - max_throughput_drop):
+        findings.append(f"throughput dropped {rate_before:.0f} -> {rate_after:.0f} req/s (limit -{max_throughput_drop:.0%})")
+    rss_before, rss_after = mean(first, "rss_mb"), mean(last, "rss_mb")
+    if rss_before is not None and rss_after is not None and rss_after - rss_before > max_rss_growth_mb:
+        findings.append(f"server RSS grew {rss_before:.0f} -> {rss_after:.0f} MB (limit +{max_rss_growth_mb} MB)")
+    wal_peak = max(row["wal_mb"] for row in samples)
+    if wal_peak > max_wal_mb:
+        findings.append(f"WAL reached {wal_peak:.1f} MB (limit {max_wal_mb} MB); checkpoints are falling behind")
+    saturated = [row for row in last if any(p["checked_out"] >= p["capacity"] for p in row.get("db_pools", []))]
+    if len(saturated) == len(last):
+        findings.append("connection pool at capacity for the whole final window")
+    return findings
+
+
+async def soak(args, workdir: str) -> List[Dict]:
+    db_path = os.path.join(workdir, "soak.db")
+    port = _free_port()
+    env = {
+        **os.environ,
+        "ASYNC_DATABASE_URL": f"sqlite+aiosqlite:///{db_path}",
+        "DB_AUTO_MIGRATE": "true",
+        "ENABLE_EVENT_AUDIT": "true",
+        "DB_REPOSITORY": args.repository,
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app", "--port", str(port), "--workers", "1"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    samples: List[Dict] = []
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=args.concurrency + 1, max_keepalive_connections=args.concurrency + 1)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+            await _wait_ready(client, process)
+            workload = Workload(client, args.contracts)
+            await workload.seed()
+
+            started = time.monotonic()
+            deadline = started + args.duration
+
+            async def user(seed: int) -> None:
+                rng = random.Random(seed)
+                while time.monotonic() < deadline:
+                    await workload.one(rng)
+
+            users = [asyncio.ensure_future(user(seed)) for seed in range(args.concurrency)]
+            with open(args.output, "w") as out:
+                window_started = time.monotonic()
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(min(args.interval, max(deadline - time.monotonic(), 0)))
+                    now = time.monotonic()
+                    latencies, errors = workload.take_window()
+                    metrics = (await client.get("/metrics")).json()
+                    sample = {
+                        "t_s": round(now - started, 1),
+                        "requests": len(latencies),
+                        "req_per_s": round(len(latencies) / (now - window_started), 1),
+                        "p50_ms": _percentile_ms(latencies, 0.50),
+                        "p99_ms": _percentile_ms(latencies, 0.99),
+                        "errors": errors,
+                        "contracts": len(workload.numbers),
+                        "db_mb": _file_mb(db_path),
+                        "wal_mb": _file_mb(db_path + "-wal"),
+                        "rss_mb": _rss_mb(process.pid),
+                        "db_pools": metrics["db_pools"],
+                        "admission_queue": metrics["event_admission"].get("queue_depth"),
+                    }
+                    window_started = now
+                    samples.append(sample)
+                    out.write(json.dumps(sample) + "\n")
+                    out.flush()
+                    print(json.dumps(sample), flush=True)
+            await asyncio.gather(*users)
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+    return samples
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.soak", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=3600.0, help="seconds of load")
+    parser.add_argument("--interval", type=float, default=30.0, help="seconds per sample")
+    parser.add_argument("--warmup", type=float, default=60.0, help="seconds excluded from the baseline")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--contracts", type=int, default=1000, help="contracts seeded before the run")
+    parser.add_argument("--repository", choices=["orm", "core"], default="core")
+    parser.add_argument("--output", default="soak.jsonl", help="time series file (JSON lines)")
+    parser.add_argument("--compare-samples", type=int, default=5, help="samples averaged at the start and end")
+    parser.add_argument("--max-p99-ratio", type=float, default=1.5)
+    parser.add_argument("--max-throughput-drop", type=float, default=0.2, help="fraction, e.g. 0.2 = 20%%")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=100.0)
+    parser.add_argument("--max-wal-mb", type=float, default=256.0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        samples = asyncio.run(soak(args, workdir))
+    steady = [row for row in samples if row["t_s"] > args.warmup] or samples
+    findings = detect_drift(
+        steady,
+        window=args.compare_samples,
+        max_p99_ratio=args.max_p99_ratio,
+        max_throughput_drop=args.max_throughput_drop,
+        max_rss_growth_mb=args.max_rss_growth_mb,
+        max_wal_mb=args.max_wal_mb,
+    )
+    print(f"{len(samples)} samples written to {args.output}")
+    for finding in findings:
+        print(f"DRIFT: {finding}")
+    if findings:
+        sys.exit(1)
+    print("No drift beyond thresholds")
+
+
+if __name__ == "__main__":
+    main()
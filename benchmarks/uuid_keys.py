@@ -0,0 +1,115 @@
+"""
+Primary-key generator benchmark: random UUIDv4 vs time-ordered UUIDv7.
+
+    python -m benchmarks.uuid_keys [--rows 10000000] [--batch 10000]
+
+Bulk-loads ``event_audit`` rows (the append-only table) into two on-disk
+SQLite databases that differ only in how ``id`` is generated, and reports the
+insert throughput per million-row segment plus the final size of the table
+and of its primary-key index (``sqlite_autoindex_event_audit_1``).
+
+Rows are inserted through the DB-API with ids already in the stored CHAR(32)
+hex form, so the measurement is B-tree maintenance rather than ORM overhead.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import create_engine
+
+from app.db.models.models import Event
+from app.db.session import Base
+from app.infra.ids import uuid7
+
+GENERATORS: Dict[str, Callable[[], uuid.UUID]] = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+
+_INSERT = (
+    "INSERT INTO event_audit (id, contract_id, raw_type, component_type, action, event_date, "
+    "event_created_at, processed_at, reason) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_SEGMENT = 1_000_000
+
+
+def _create_schema(path: str) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn, tables=[Event.__table__])
+    engine.dispose()
+
+
+def _object_sizes(conn: sqlite3.Connection) -> Optional[Dict[str, int]]:
+    try:
+        rows = conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall()
+    except sqlite3.OperationalError:
+        # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB
+        return None
+    return {name: size for name, size in rows}
+
+
+def measure(generator: str, *, rows: int, batch: int, workdir: str) -> Dict:
+    path = os.path.join(workdir, f"{generator}.db")
+    _create_schema(path)
+    new_id = GENERATORS[generator]
+    base = datetime(2024, 1, 1)
+    processed = base.isoformat(" ")
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    segments: List[float] = []
+    segment_started = started = time.perf_counter()
+    for offset in range(0, rows, batch):
+        count = min(batch, rows - offset)
+        conn.executemany(_INSERT, [
+            (
+                new_id().hex, None, "supply_energy_start", "energy_supply", "start", "2024-01-01",
+                (base + timedelta(seconds=offset + i)).isoformat(" "), processed, 0,
+            )
+            for i in range(count)
+        ])
+        conn.commit()
+        done = offset + count
+        if done % _SEGMENT == 0 or done == rows:
+            now = time.perf_counter()
+            segment_rows = done % _SEGMENT or _SEGMENT
+            segments.append(round(segment_rows / (now - segment_started)))
+            segment_started = now
+    elapsed = time.perf_counter() - started
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    sizes = _object_sizes(conn)
+    conn.close()
+
+    result = {
+        "generator": generator,
+        "rows": rows,
+        "rows_per_s": round(rows / elapsed),
+        "rows_per_s_by_million": segments,
+        "file_mb": round(os.path.getsize(path) / 2**20, 1),
+    }
+    if sizes is not None:
+        result["table_mb"] = round(sizes.get("event_audit", 0) / 2**20, 1)
+        result["pk_index_mb"] = round(sizes.get("sqlite_autoindex_event_audit_1", 0) / 2**20, 1)
+    return result
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.uuid_keys", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--batch", type=int, default=10_000, help="rows per transaction")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for generator in GENERATORS:
+            print(json.dumps(measure(generator, rows=args.rows, batch=args.batch, workdir=workdir)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
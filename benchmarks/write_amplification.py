@@ -0,0 +1,186 @@
+"""
+Write-amplification benchmark for the event write path.
+
+    python -m benchmarks.write_amplification [--events 100000] [--contracts 10000]
+
+Replays the statements an accepted `POST /event` issues (contract lookup,
+component_state lookup + insert/update with a fresh change_seq, audit insert)
+against two on-disk SQLite databases:
+
+* ``before`` - the schema with the indexes dropped by migration 5 recreated,
+* ``after``  - the current schema.
+
+Reports the mean cost of each write kind and the database size, both scaled to
+one million events. Transactions are committed every ``--batch`` events so the
+numbers reflect index maintenance rather than fsync latency.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy import bindparam, create_engine, event, func, insert, select, text, update
+from sqlalchemy.engine import Engine
+
+from app.db.models.models import ComponentState, Contract, Event
+from app.db.session import Base
+from app.domain.audit import AuditReason
+from app.domain.enums import ComponentType, EventAction, EventType
+
+# Indexes present before migration 5, on top of today's schema
+LEGACY_INDEXES = [
+    "CREATE INDEX ix_contract_id ON contract (id)",
+    "CREATE INDEX ix_component_state_id ON component_state (id)",
+    "CREATE INDEX ix_component_state_contract_id ON component_state (contract_id)",
+    "CREATE INDEX ix_component_state_contract_component ON component_state (contract_id, component_type)",
+    "CREATE INDEX ix_event_audit_id ON event_audit (id)",
+    "CREATE INDEX ix_event_audit_contract_id ON event_audit (contract_id)",
+    "DROP INDEX ix_component_state_change_seq_contract",
+    "CREATE INDEX ix_component_state_change_seq ON component_state (change_seq)",
+]
+
+_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def build_database(path: str, *, legacy: bool) -> Engine:
+    engine = create_engine(f"sqlite:///{path}")
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_conn, _record):
+        dbapi_conn.execute("PRAGMA journal_mode=WAL")
+        dbapi_conn.execute("PRAGMA synchronous=NORMAL")
+
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        if legacy:
+            for ddl in LEGACY_INDEXES:
+                conn.execute(text(ddl))
+    return engine
+
+
+def _index_names(engine: Engine) -> List[str]:
+    with engine.connect() as conn:
+        return list(conn.scalars(text("SELECT name FROM sqlite_master WHERE type = 'index' ORDER BY name")))
+
+
+def run_workload(engine: Engine, *, events: int, contracts: int, batch: int, seed: int = 0) -> Dict[str, float]:
+    rng = random.Random(seed)
+    components = list(ComponentType)
+    numbers = [f"C-{i:08d}" for i in range(contracts)]
+
+    timings = {"contract_insert": 0.0, "state_insert": 0.0, "state_update": 0.0, "audit_insert": 0.0, "lookups": 0.0}
+    counts = dict.fromkeys(timings, 0)
+
+    with engine.connect() as conn:
+        started = time.perf_counter()
+        for i in range(0, contracts, batch):
+            conn.execute(insert(Contract), [
+                {"id": uuid.uuid4(), "contract_number": n, "components": [c.value for c in components],
+                 "created_at": _EPOCH}
+                for n in numbers[i:i + batch]
+            ])
+            conn.commit()
+        timings["contract_insert"] = time.perf_counter() - started
+        counts["contract_insert"] = contracts
+
+        # Statements are built once so per-call cost is execution, not compilation
+        next_seq = select(func.coalesce(func.max(ComponentState.change_seq), 0) + 1).scalar_subquery()
+        find_contract = select(Contract.id).where(Contract.contract_number == bindparam("number"))
+        find_state = select(ComponentState.id).where(
+            ComponentState.contract_id == bindparam("contract_id"),
+            ComponentState.component_type == bindparam("component"),
+        )
+        insert_state = insert(ComponentState).values(change_seq=next_seq)
+        update_state = (
+            update(ComponentState)
+            .where(ComponentState.id == bindparam("state_id"))
+            .values(change_seq=next_seq)
+        )
+        insert_audit = insert(Event)
+        for i in range(events):
+            number = rng.choice(numbers)
+            component = rng.choice(components)
+            created_at = _EPOCH + timedelta(seconds=i)
+
+            t0 = time.perf_counter()
+            contract_id = conn.scalar(find_contract, {"number": number})
+            state_id = conn.scalar(find_state, {"contract_id": contract_id, "component": component})
+            t1 = time.perf_counter()
+            if state_id is None:
+                conn.execute(insert_state, {
+                    "id": uuid.uuid4(), "contract_id": contract_id, "component_type": component,
+                    "start_date": date(2024, 1, 1), "start_event_created_at": created_at,
+                })
+                kind = "state_insert"
+            else:
+                conn.execute(update_state, {
+                    "state_id": state_id, "end_date": date(2024, 12, 31), "end_event_created_at": created_at,
+                })
+                kind = "state_update"
+            t2 = time.perf_counter()
+            conn.execute(insert_audit, {
+                "id": uuid.uuid4(), "contract_id": contract_id, "raw_type": EventType.supply_energy_start,
+                "component_type": component, "action": EventAction.start, "event_date": date(2024, 1, 1),
+                "event_created_at": created_at, "processed_at": created_at, "reason": AuditReason.accepted,
+            })
+            t3 = time.perf_counter()
+
+            timings["lookups"] += t1 - t0
+            timings[kind] += t2 - t1
+            timings["audit_insert"] += t3 - t2
+            counts["lookups"] += 1
+            counts[kind] += 1
+            counts["audit_insert"] += 1
+            if (i + 1) % batch == 0:
+                conn.commit()
+        conn.commit()
+
+    return {f"{kind}_us": round(timings[kind] / counts[kind] * 1e6, 2) for kind in timings if counts[kind]}
+
+
+def measure(schema: str, *, events: int, contracts: int, batch: int, workdir: str) -> Dict:
+    path = os.path.join(workdir, f"{schema}.db")
+    engine = build_database(path, legacy=schema == "before")
+    try:
+        started = time.perf_counter()
+        result = run_workload(engine, events=events, contracts=contracts, batch=batch)
+        elapsed = time.perf_counter() - started
+        with engine.connect() as conn:
+            conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+        size = os.path.getsize(path)
+        indexes = _index_names(engine)
+    finally:
+        engine.dispose()
+    scale = 1_000_000 / events
+    return {
+        "schema": schema,
+        "indexes": len(indexes),
+        **result,
+        "seconds_per_million_events": round(elapsed * scale, 1),
+        "mb_per_million_events": round(size * scale / 2**20, 1),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.write_amplification", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--contracts", type=int, default=10_000)
+    parser.add_argument("--batch", type=int, default=1_000, help="events per transaction")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for schema in ("before", "after"):
+            print(json.dumps(measure(
+                schema, events=args.events, contracts=args.contracts, batch=args.batch, workdir=workdir,
+            )))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import uuid
+
 import pytest
 
 @pytest.mark.asyncio
@@ -22,4 +24,190 @@ async def test_duplicate_contract_number_conflict(async_client):
     assert res.status_code == 201
     # Duplicate
     res = await async_client.post("/contract", json=payload)
-    assert res.status_code in (409, 400)
\ No newline at end of file
+    assert res.status_code in (409, 400)
+
+@pytest.mark.asyncio
+async def test_contract_listing_keyset_pages_and_filters(async_client):
+    for i in range(7):
+        components = ["energy_supply", "battery_optimization"] if i % 2 else ["energy_supply"]
+        res = await async_client.post("/contract", json={"contract_number": f"C-LIST-{i}", "components": components})
+        assert res.status_code == 201
+
+    async def walk(params):
+        numbers, cursor = [], None
+        while True:
+            res = await async_client.get("/contract", params={**params, **({"cursor": cursor} if cursor else {})})
+            assert res.status_code == 200
+            data = res.json()
+            assert len(data["items"]) <= params["limit"]
+            numbers += [item["contract_number"] for item in data["items"]]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                return numbers
+
+    expected = [f"C-LIST-{i}" for i in range(7)]
+    assert await walk({"limit": 3}) == expected
+    assert await walk({"limit": 2, "order_by": "created_at"}) == expected
+    assert await walk({"limit": 2, "component": "battery_optimization"}) == ["C-LIST-1", "C-LIST-3", "C-LIST-5"]
+    assert await walk({"limit": 10, "created_to": "2000-01-01T00:00:00Z"}) == []
+
+    res = await async_client.get("/contract", params={"count_only": True, "component": "battery_optimization"})
+    assert res.json() == {"count": 3}
+    res = await async_client.get("/contract", params={"count_only": True, "created_from": "2000-01-01T00:00:00Z"})
+    assert res.json() == {"count": 7}
+
+    # Cursors are bound to their order
+    res = await async_client.get("/contract", params={"limit": 1})
+    cursor = res.json()["next_cursor"]
+    res = await async_client.get("/contract", params={"order_by": "created_at", "cursor": cursor})
+    assert res.status_code == 400
+    res = await async_client.get("/contract", params={"cursor": "garbage"})
+    assert res.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_contract_listing_uses_indexes(async_client):
+    from sqlalchemy import text
+
+    from app.db import session as db_session
+
+    async with db_session.async_engine.connect() as conn:
+        by_number = (await conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM contract WHERE deleted_at IS NULL AND contract_number > 'x' "
+            "ORDER BY contract_number LIMIT 10"
+        ))).all()
+        by_created = (await conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM contract WHERE deleted_at IS NULL AND (created_at, id) > ('2024', 'x') "
+            "ORDER BY created_at, id LIMIT 10"
+        ))).all()
+    assert "USING INDEX" in by_number[0][-1] and "TEMP B-TREE" not in str(by_number)
+    assert "ix_contract_created_at_id" in by_created[0][-1] and "TEMP B-TREE" not in str(by_created)
+
+
+@pytest.mark.asyncio
+async def test_new_contracts_get_time_ordered_ids_and_v4_rows_stay_readable(async_client):
+    import uuid
+
+    from app.db import session as db_session
+    from app.db.models.models import Contract
+
+    ids = []
+    for number in ("C-V7-1", "C-V7-2"):
+        res = await async_client.post("/contract", json={"contract_number": number, "components": ["energy_supply"]})
+        ids.append(uuid.UUID(res.json()["id"]))
+    assert [i.version for i in ids] == [7, 7]
+    assert ids[0] < ids[1]
+
+    legacy_id = uuid.uuid4()
+    async with db_session.AsyncSessionLocal() as db:
+        db.add(Contract(id=legacy_id, contract_number="C-V4", components=["energy_supply"]))
+        await db.commit()
+    res = await async_client.get("/contract/C-V4")
+    assert res.status_code == 200
+    assert res.json()["id"] == str(legacy_id)
+
+
+@pytest.mark.asyncio
+async def test_deleted_contract_is_gone_at_once_and_purged_in_chunks(async_client, monkeypatch):
+    from sqlalchemy import func, select
+
+    from app.api.services.purge_services import ContractPurger
+    from app.config import settings
+    from app.db import session as db_session
+    from app.db.models.models import ComponentState, Contract, Event
+
+    monkeypatch.setattr(settings, "ENABLE_EVENT_AUDIT", True)
+    await async_client.post("/contract", json={"contract_number": "C-DEL", "components": ["energy_supply"]})
+    await async_client.post("/contract", json={"contract_number": "C-KEEP", "components": ["energy_supply"]})
+    for number in ("C-DEL", "C-KEEP"):
+        for day in range(1, 6):
+            res = await async_client.post("/event", json={
+                "type": "supply_energy_start", "contract_number": number,
+                "date": f"2024-01-{day:02d}", "created_at": f"2024-01-01T00:00:0{day}Z",
+            })
+            assert res.status_code == 200
+
+    res = await async_client.delete("/contract/C-DEL")
+    assert res.status_code == 200
+    assert (await async_client.delete("/contract/C-DEL")).status_code == 404
+    # Event and timeline paths treat the tombstoned contract as gone
+    assert (await async_client.get("/contract/C-DEL")).status_code == 404
+    assert (await async_client.get("/contract/C-DEL/contract_timeline")).status_code == 404
+    res = await async_client.post("/event", json={
+        "type": "supply_energy_end", "contract_number": "C-DEL", "date": "2024-02-01", "created_at": "2024-02-01T00:00:00Z",
+    })
+    assert res.json() == {"status": "rejected", "message": "Contract C-DEL not found."}
+    assert [c["contract_number"] for c in (await async_client.get("/contract")).json()["items"]] == ["C-KEEP"]
+    # The number is free again while the old contract waits for the purger
+    res = await async_client.post("/contract", json={"contract_number": "C-DEL", "components": ["energy_supply"]})
+    assert res.status_code == 201
+
+    async def counts():
+        async with db_session.AsyncSessionLocal() as db:
+            return [
+                await db.scalar(select(func.count()).select_from(model))
+                for model in (Contract, ComponentState, Event)
+            ]
+
+    assert await counts() == [3, 2, 11]
+    purger = ContractPurger()
+    assert await purger.purge_once(db_session.get_engines(), chunk_rows=2) == 1
+    # 5 audit rows in 3 chunks, then the state, then the contract row
+    assert purger.stats() == {"pending": 0, "purged_contracts": 1, "purged_rows": 7, "current": None}
+    assert await counts() == [2, 1, 6]
+    assert (await async_client.get("/contract/C-KEEP/contract_timeline")).status_code == 200
+    assert (await async_client.get("/contract/C-DEL")).status_code == 200
+    assert await purger.purge_once(db_session.get_engines(), chunk_rows=2) == 0
+
+
+@pytest.mark.asyncio
+async def test_one_purger_holds_the_database_until_its_lease_expires(async_client):
+    from app.api.services.purge_services import ContractPurger
+    from app.db import session as db_session
+
+    engines = db_session.get_engines()
+    first, second = ContractPurger(), ContractPurger()
+
+    async def tombstone(number):
+        await async_client.post("/contract", json={"contract_number": number, "components": ["energy_supply"]})
+        assert (await async_client.delete(f"/contract/{number}")).status_code == 200
+
+    await tombstone("C-L1")
+    assert await first.purge_once(engines, chunk_rows=10, lease_s=60) == 1
+    await tombstone("C-L2")
+    assert await second.purge_once(engines, chunk_rows=10, lease_s=60) == 0
+    assert await first.purge_once(engines, chunk_rows=10, lease_s=0) == 1
+    # Expired, so the other worker takes it over
+    await tombstone("C-L3")
+    assert await second.purge_once(engines, chunk_rows=10, lease_s=60) == 1
+    assert await first.purge_once(engines, chunk_rows=10, lease_s=60) == 0
+
+
+@pytest.mark.asyncio
+async def test_document_written_for_a_deleted_contract_is_not_served(async_client, monkeypatch):
+    from sqlalchemy import select
+
+    from app.config import settings
+    from app.db import session as db_session
+    from app.db.crud.timeline_document import put_timeline_document
+    from app.db.models.models import TimelineDocument
+
+    monkeypatch.setattr(settings, "ENABLE_MATERIALIZED_TIMELINES", True)
+    old_id = (await async_client.post("/contract", json={"contract_number": "C-RE", "components": ["energy_supply"]})).json()["id"]
+    assert (await async_client.delete("/contract/C-RE")).status_code == 200
+    # An event that raced the deletion rewrites the document afterwards
+    async with db_session.AsyncSessionLocal() as db:
+        await put_timeline_document(db, contract_number="C-RE", contract_id=uuid.UUID(old_id), document=b"{}")
+        await db.commit()
+    assert (await async_client.get("/contract/C-RE/contract_timeline")).status_code == 404
+
+    new_id = (await async_client.post("/contract", json={"contract_number": "C-RE", "components": ["energy_supply"]})).json()["id"]
+    assert (await async_client.get("/contract/C-RE/contract_timeline")).json()["components"] == {}
+    res = await async_client.post("/event", json={
+        "type": "supply_energy_start", "contract_number": "C-RE", "date": "2024-03-01", "created_at": "2024-03-01T00:00:00Z",
+    })
+    assert res.status_code == 200
+    async with db_session.AsyncSessionLocal() as db:
+        assert await db.scalar(select(TimelineDocument.contract_id)) == uuid.UUID(new_id)
+    res = await async_client.get("/contract/C-RE/contract_timeline")
+    assert res.json()["components"]["energy_supply"]["start"] == "2024-03-01"
@@ -1,3 +1,6 @@
+import gzip
+import json
+
 import pytest
 from datetime import date, datetime, timezone
 
@@ -263,3 +266,255 @@ async def test_older_duplicate_events_rejected(async_client):
     assert res.json()["status"] == "rejected"
 
 
+
+
+@pytest.mark.asyncio
+async def test_event_overload_returns_503_with_retry_after(async_client, monkeypatch):
+    from app.api.services import event_services
+    from app.infra.admission import AdmissionController
+
+    ctl = AdmissionController(limit=1, max_queue=0)
+    monkeypatch.setattr(event_services, "event_admission", ctl)
+    monkeypatch.setattr("app.api.routers.event.event_admission", ctl)
+    payload = {
+        "type": "supply_energy_start",
+        "contract_number": "C-BUSY",
+        "date": "2024-12-01",
+        "created_at": iso_dt(2024, 12, 1, 10),
+    }
+    async with ctl.admit():
+        res = await async_client.post("/event", json=payload)
+    assert res.status_code == 503
+    assert int(res.headers["Retry-After"]) >= 1
+    assert res.json()["detail"]["code"] == "overloaded"
+
+    res = await async_client.post("/event", json=payload)
+    assert res.status_code == 200
+    assert ctl.stats()["rejected"] == 1
+
+
+
+def test_event_concurrency_defaults_to_the_pool_capacity(monkeypatch):
+    from app.api.services import event_services
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "EVENT_CONCURRENCY_LIMIT", None)
+    monkeypatch.setattr(event_services, "pool_capacity", lambda: 15)
+    assert event_services.event_concurrency_limit() == 15
+    monkeypatch.setattr(event_services, "pool_capacity", lambda: None)
+    assert event_services.event_concurrency_limit() == 32
+    # An explicit limit wins, even above the pool
+    monkeypatch.setattr(settings, "EVENT_CONCURRENCY_LIMIT", 64)
+    assert event_services.event_concurrency_limit() == 64
+
+
+@pytest.mark.asyncio
+async def test_gzip_encoded_event(async_client):
+    res = await async_client.post("/contract", json={"contract_number": "C-GZ", "components": ["energy_supply"]})
+    assert res.status_code == 201
+    payload = {
+        "type": "supply_energy_start",
+        "contract_number": "C-GZ",
+        "date": "2024-03-03",
+        "created_at": iso_dt(2024, 3, 3, 10, 0, 0),
+    }
+    res = await async_client.post(
+        "/event",
+        content=gzip.compress(json.dumps(payload).encode()),
+        headers={"Content-Encoding": "gzip", "Content-Type": "application/json"},
+    )
+    assert res.status_code == 200
+    assert res.json()["status"] == "accepted"
+
+
+@pytest.mark.asyncio
+async def test_audit_history_and_rejection_counts(async_client, monkeypatch):
+    from app.config import settings
+
+    res = await async_client.post("/contract", json={"contract_number": "C-AUD", "components": ["energy_supply"]})
+    assert res.status_code == 201
+    res = await async_client.get("/contract/C-AUD/events")
+    assert res.status_code == 400  # needs the audit
+
+    monkeypatch.setattr(settings, "ENABLE_EVENT_AUDIT", True)
+    sent = [
+        ("supply_energy_end", "C-AUD", "2024-12-31", iso_dt(2024, 12, 1, 9)),
+        ("supply_energy_start", "C-AUD", "2024-12-01", iso_dt(2024, 12, 1, 10)),
+        ("battery_optimization_start", "C-AUD", "2024-12-01", iso_dt(2024, 12, 1, 11)),
+        ("supply_energy_end", "C-AUD", "2024-11-30", iso_dt(2024, 12, 1, 12)),
+        ("supply_energy_start", "C-NONE", "2024-12-01", iso_dt(2024, 12, 1, 13)),
+    ]
+    responses = []
+    for type_, number, day, created_at in sent:
+        res = await async_client.post("/event", json={
+            "type": type_, "contract_number": number, "date": day, "created_at": created_at,
+        })
+        responses.append(res.json())
+
+    # The history pages through the contract's rows, rebuilding each response from its reason code
+    items, cursor = [], None
+    while True:
+        res = await async_client.get("/contract/C-AUD/events", params={"limit": 3, **({"cursor": cursor} if cursor else {})})
+        assert res.status_code == 200
+        items += res.json()["items"]
+        cursor = res.json()["next_cursor"]
+        if cursor is None:
+            break
+    assert [{"status": i["status"], "message": i["message"]} for i in items] == responses[:4]
+    assert [i["reason"] for i in items] == [
+        "end_without_start", "accepted", "component_not_configured", "end_before_start",
+    ]
+    assert responses[4] == {"status": "rejected", "message": "Contract C-NONE not found."}
+
+    res = await async_client.get("/events/rejections")
+    assert res.json()["total"] == 4
+    assert {r["reason"]: r["count"] for r in res.json()["reasons"]} == {
+        "end_without_start": 1, "component_not_configured": 1, "end_before_start": 1, "contract_not_found": 1,
+    }
+    res = await async_client.get("/events/rejections", params={"since": iso_dt(2024, 12, 1, 11)})
+    assert res.json()["total"] == 3
+    # The same instants written with an offset cover the same window
+    res = await async_client.get("/events/rejections", params={"since": "2024-12-01T13:00:00+02:00"})
+    assert res.json()["total"] == 3
+    res = await async_client.get("/events/rejections", params={
+        "since": "2024-12-01T10:00:00+01:00", "until": "2024-12-01T06:30:00-05:00",
+    })
+    assert res.json()["total"] == 2
+
+    res = await async_client.get("/contract/C-AUD/events", params={"cursor": "not-a-cursor"})
+    assert res.status_code == 400
+    res = await async_client.get("/contract/C-NONE/events")
+    assert res.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_reorder_window_applies_end_delivered_before_start(async_client, monkeypatch):
+    import asyncio
+
+    from app.api.services.event_services import event_reorder
+    from app.config import settings
+
+    monkeypatch.setattr(event_reorder, "window_s", 0.05)
+    monkeypatch.setattr(settings, "ENABLE_EVENT_AUDIT", True)
+    monkeypatch.setattr(settings, "ENABLE_MATERIALIZED_TIMELINES", True)
+    await async_client.post("/contract", json={"contract_number": "C-RO", "components": ["energy_supply"]})
+
+    def event(type_, number, day, created_at):
+        return {"type": type_, "contract_number": number, "date": day, "created_at": created_at}
+
+    # The end is delivered first; within the window both are applied in created_at order.
+    # One window at a time: the test engine shares a single connection between sessions.
+    responses = await asyncio.gather(
+        async_client.post("/event", json=event("supply_energy_end", "C-RO", "2024-12-31", iso_dt(2024, 12, 2))),
+        async_client.post("/event", json=event("supply_energy_start", "C-RO", "2024-12-01", iso_dt(2024, 12, 1))),
+    )
+    assert [r.json()["status"] for r in responses] == ["accepted", "accepted"]
+    responses = await asyncio.gather(*(
+        async_client.post("/event", json=event("supply_energy_start", "C-NOPE", "2024-12-01", iso_dt(2024, 12, day)))
+        for day in (2, 1)
+    ))
+    assert [r.json()["message"] for r in responses] == ["Contract C-NOPE not found."] * 2
+    res = await async_client.get("/contract/C-RO/contract_timeline")
+    assert res.json()["components"]["energy_supply"] == {"start": "2024-12-01", "end": "2024-12-31"}
+    res = await async_client.get("/contract/C-RO/events")
+    assert [i["event_type"] for i in res.json()["items"]] == ["supply_energy_start", "supply_energy_end"]
+    assert event_reorder.stats()["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_contract_registry_serves_lookups_and_sees_deletions(async_client, monkeypatch, tmp_path):
+    from app.api.services.registry_services import contract_registry
+    from app.infra.registry import fcntl
+
+    if fcntl is None:
+        pytest.skip("the shared registry needs fcntl")
+    monkeypatch.setattr(contract_registry, "hits", 0)
+    contract_registry.open(str(tmp_path / "contracts.registry"), 64)
+    try:
+        await async_client.post("/contract", json={"contract_number": "C-REG", "components": ["battery_optimization"]})
+        event = {"type": "battery_optimization_start", "contract_number": "C-REG", "date": "2024-03-03"}
+        res = await async_client.post("/event", json={**event, "created_at": iso_dt(2024, 3, 3)})
+        assert res.json()["status"] == "accepted"
+        other = {**event, "type": "supply_energy_start", "created_at": iso_dt(2024, 3, 4)}
+        res = await async_client.post("/event", json=other)
+        assert res.json()["message"] == "Component energy_supply is not configured for contract C-REG."
+        assert contract_registry.stats()["hits"] == 2
+
+        await async_client.delete("/contract/C-REG")
+        res = await async_client.post("/event", json={**event, "created_at": iso_dt(2024, 3, 5)})
+        assert res.json()["message"] == "Contract C-REG not found."
+        res = await async_client.get("/metrics")
+        assert res.json()["contract_registry"]["enabled"] is True
+    finally:
+        contract_registry.close()
+
+
+@pytest.mark.asyncio
+async def test_orm_upsert_survives_concurrent_first_writes(tmp_path):
+    import asyncio
+
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from app.db.crud.component_state import get_component_state, upsert_component_state
+    from app.db.crud.contract import create_contract
+    from app.db.session import Base
+    from app.domain.enums import ComponentType
+    from app.dto.contract import ContractPayload
+
+    # Separate connections, unlike the shared test connection, so the two writers really race
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'race.db'}")
+    session_maker = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with session_maker() as db:
+        contract = await create_contract(db, ContractPayload(contract_number="C-RACE", components=["energy_supply"]))
+
+    async def write(**fields):
+        async with session_maker() as db:
+            await upsert_component_state(
+                db, contract_id=contract.id, component_type=ComponentType.energy_supply, **fields
+            )
+
+    # Both find no row; the second insert used to fail on uq_contract_component
+    await asyncio.gather(write(start_date=date(2024, 12, 1)), write(end_date=date(2024, 12, 31)))
+    async with session_maker() as db:
+        state = await get_component_state(db, contract.id, ComponentType.energy_supply)
+    assert (state.start_date, state.end_date) == (date(2024, 12, 1), date(2024, 12, 31))
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_failed_audit_write_rolls_back_the_state_change(async_client, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+
+    from app.config import settings
+    from app.db.repository import get_repository
+
+    monkeypatch.setattr(settings, "ENABLE_EVENT_AUDIT", True)
+    await async_client.post("/contract", json={"contract_number": "C-TX", "components": ["energy_supply"]})
+    repo = get_repository()
+
+    async def failing_record_event(db, **fields):
+        raise OperationalError("INSERT INTO event_audit", {}, Exception("disk I/O error"))
+
+    monkeypatch.setattr(type(repo), "record_event", lambda self, db, **fields: failing_record_event(db, **fields))
+    event = {"type": "supply_energy_start", "contract_number": "C-TX", "date": "2024-12-01",
+             "created_at": iso_dt(2024, 12, 1)}
+    with pytest.raises(OperationalError):
+        await async_client.post("/event", json=event)
+
+    # The state change went with the audit row, so the event can simply be retried
+    res = await async_client.get("/contract/C-TX/contract_timeline")
+    assert res.json()["components"] == {}
+
+
+def test_pool_capacity_counts_the_configured_overflow(monkeypatch):
+    from app.config import settings
+    from app.db import session
+
+    pool_size = session.get_engines()[0].sync_engine.pool.size()
+    assert session.pool_capacity() == pool_size + 10
+    monkeypatch.setattr(settings, "ASYNC_SQLALCHEMY_ENGINE_OPTIONS", {"max_overflow": 3})
+    assert session.pool_capacity() == pool_size + 3
+    monkeypatch.setattr(settings, "ASYNC_SQLALCHEMY_ENGINE_OPTIONS", {"max_overflow": -1})
+    assert session.pool_capacity() == pool_size
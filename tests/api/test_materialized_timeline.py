@@ -0,0 +1,71 @@
+import pytest
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.db import session as db_session
+from app.db.models.models import TimelineDocument
+from app.tools.check_timelines import check_timelines
+
+
+def iso_dt(year, month, day, hour=0, minute=0, second=0):
+    return datetime(year, month, day, hour, minute, second, tzinfo=timezone.utc).isoformat()
+
+
+@pytest.fixture
+def materialized(monkeypatch):
+    monkeypatch.setattr(settings, "ENABLE_MATERIALIZED_TIMELINES", True)
+
+
+@pytest.mark.asyncio
+async def test_materialized_timeline_matches_computed(async_client, materialized, monkeypatch):
+    res = await async_client.post("/contract", json={
+        "contract_number": "C-MAT", "components": ["energy_supply", "battery_optimization"],
+    })
+    assert res.status_code == 201
+    res = await async_client.get("/contract/C-MAT/contract_timeline")
+    assert res.json() == {"contract_number": "C-MAT", "components": {}}
+
+    for evt in [
+        {"type": "supply_energy_start", "date": "2024-12-01", "created_at": iso_dt(2024, 12, 1, 9)},
+        {"type": "supply_energy_end", "date": "2024-12-31", "created_at": iso_dt(2024, 12, 31, 9)},
+        {"type": "battery_optimization_end", "date": "2024-04-04", "created_at": iso_dt(2024, 4, 4, 9)},
+    ]:
+        res = await async_client.post("/event", json={"contract_number": "C-MAT", **evt})
+        assert res.status_code == 200
+
+    stored = await async_client.get("/contract/C-MAT/contract_timeline")
+    monkeypatch.setattr(settings, "ENABLE_MATERIALIZED_TIMELINES", False)
+    computed = await async_client.get("/contract/C-MAT/contract_timeline")
+    assert stored.status_code == 200
+    assert stored.json() == computed.json()
+    assert stored.json()["components"]["energy_supply"] == {"start": "2024-12-01", "end": "2024-12-31"}
+
+    async with db_session.AsyncSessionLocal() as db:
+        assert await check_timelines(db) == {"missing": [], "mismatched": [], "orphaned": []}
+
+
+@pytest.mark.asyncio
+async def test_consistency_checker_reports_and_repairs(async_client, materialized, monkeypatch):
+    monkeypatch.setattr(settings, "ENABLE_MATERIALIZED_TIMELINES", False)
+    res = await async_client.post("/contract", json={"contract_number": "C-OLD", "components": ["energy_supply"]})
+    assert res.status_code == 201
+    monkeypatch.setattr(settings, "ENABLE_MATERIALIZED_TIMELINES", True)
+    res = await async_client.post("/contract", json={"contract_number": "C-NEW", "components": ["energy_supply"]})
+    assert res.status_code == 201
+
+    async with db_session.AsyncSessionLocal() as db:
+        doc = await db.get(TimelineDocument, "C-NEW")
+        doc.document = b'{"contract_number": "C-NEW", "components": {"energy_supply": {"start": null, "end": null}}}'
+        await db.commit()
+
+        report = await check_timelines(db, repair=True)
+        assert report == {"missing": ["C-OLD"], "mismatched": ["C-NEW"], "orphaned": []}
+        assert await check_timelines(db) == {"missing": [], "mismatched": [], "orphaned": []}
+
+    # The contract without events is now served from its document too
+    res = await async_client.get("/contract/C-OLD/contract_timeline")
+    assert res.json() == {"contract_number": "C-OLD", "components": {}}
+    res = await async_client.delete("/contract/C-NEW")
+    assert res.status_code == 200
+    res = await async_client.get("/contract/C-NEW/contract_timeline")
+    assert res.status_code == 404
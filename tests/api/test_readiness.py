@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.api.services.warmup_services import readiness, run_warmup
+from app.config import settings
+from app.db import migrations
+from app.db import session as db_session
+from app.db.models.models import ComponentState
+from app.main import app
+
+
+@pytest.mark.asyncio
+async def test_ready_only_after_warmup(async_client):
+    res = await async_client.post("/contract", json={"contract_number": "C-WARM", "components": ["energy_supply"]})
+    assert res.status_code == 201
+    res = await async_client.post("/event", json={
+        "type": "supply_energy_start", "contract_number": "C-WARM",
+        "date": "2024-12-01", "created_at": "2024-12-01T09:00:00Z",
+    })
+    assert res.json()["status"] == "accepted"
+
+    readiness.reset()
+    res = await async_client.get("/health/ready")
+    assert res.status_code == 503
+
+    await run_warmup([db_session.async_engine], connections=2, preload_contracts=10)
+    res = await async_client.get("/health/ready")
+    assert res.status_code == 200
+    body = res.json()
+    assert body["status"] == "ready"
+    # Nothing would keep preloaded contracts, so none are read
+    assert body["preloaded_contracts"] == 0
+    assert body["connections"] == 2
+    async with db_session.AsyncSessionLocal() as db:
+        assert await db.scalar(select(func.count()).select_from(ComponentState)) == 1
+
+
+@pytest.mark.asyncio
+async def test_warmup_preloads_the_registry_and_timeline_cache(async_client, monkeypatch, tmp_path):
+    from app.api.services import timeline_services
+    from app.api.services.registry_services import contract_registry
+
+    await async_client.post("/contract", json={"contract_number": "C-HOT", "components": ["energy_supply"]})
+    await async_client.post("/event", json={
+        "type": "supply_energy_start", "contract_number": "C-HOT",
+        "date": "2024-12-01", "created_at": "2024-12-01T09:00:00Z",
+    })
+    monkeypatch.setattr(timeline_services._timeline_flights, "ttl", 60.0)
+    contract_registry.open(str(tmp_path / "contracts.registry"), 64)
+    try:
+        await run_warmup([db_session.async_engine], connections=1, preload_contracts=10)
+        assert readiness.stats["preloaded_contracts"] == 1
+        assert contract_registry.get("C-HOT") is not None
+        assert "C-HOT" in timeline_services._timeline_flights._cache
+    finally:
+        contract_registry.close()
+        timeline_services.invalidate_timeline("C-HOT")
+
+
+@pytest.mark.asyncio
+async def test_warmup_prepares_upserts_without_writing(async_client):
+    from sqlalchemy import event
+
+    statements = []
+    engine = db_session.async_engine.sync_engine
+    record = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        await run_warmup([db_session.async_engine], connections=1)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    # The upserts are prepared under EXPLAIN only; everything else is a read
+    explained = [s for s in statements if s.startswith("EXPLAIN ")]
+    assert len(explained) == readiness.stats["prepared_upserts"] == 4
+    assert sum("INSERT INTO component_state" in s and "ON CONFLICT" in s for s in explained) == 3
+    assert all(s.lstrip().upper().startswith(("SELECT", "EXPLAIN")) for s in statements)
+
+
+@pytest.mark.asyncio
+async def test_lifespan_runs_warmup_in_background(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    await migrations.upgrade(engine)
+    monkeypatch.setattr(db_session, "async_engine", engine, raising=True)
+    monkeypatch.setattr(settings, "DB_AUTO_MIGRATE", False)
+
+    async with app.router.lifespan_context(app):
+        for _ in range(100):
+            if readiness.ready:
+                break
+            await asyncio.sleep(0.01)
+        assert readiness.ready
+        assert readiness.warmup_ms is not None
+    await engine.dispose()
@@ -0,0 +1,128 @@
+import pytest
+import pytest_asyncio
+from datetime import datetime, timezone
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.db import session as db_session
+from app.db.migrations import ensure_schema
+from app.db.models.models import Contract
+from app.db.session import shard_for, shard_url
+
+SHARDS = 2
+
+
+def iso_dt(year, month, day, hour=0, minute=0, second=0):
+    return datetime(year, month, day, hour, minute, second, tzinfo=timezone.utc).isoformat()
+
+
+@pytest_asyncio.fixture
+async def sharded_client(async_client, monkeypatch):
+    engines = [
+        create_async_engine(
+            "sqlite+aiosqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        for _ in range(SHARDS)
+    ]
+    for engine in engines:
+        await ensure_schema(engine, auto_migrate=True)
+    makers = [
+        async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False, autocommit=False)
+        for engine in engines
+    ]
+    monkeypatch.setattr(db_session, "shard_engines", engines, raising=True)
+    monkeypatch.setattr(db_session, "shard_sessionmakers", makers, raising=True)
+    yield async_client, engines
+    for engine in engines:
+        await engine.dispose()
+
+
+def test_shard_url_and_hash_are_stable():
+    assert shard_url("sqlite+aiosqlite:///./eo.db", 1) == "sqlite+aiosqlite:///./eo.shard1.db"
+    assert shard_url("sqlite+aiosqlite:///./db/eo_{shard}.sqlite", 3) == "sqlite+aiosqlite:///./db/eo_3.sqlite"
+    assert shard_for("1234", 1) == 0
+    assert [shard_for("1234", 4) for _ in range(3)] == [shard_for("1234", 4)] * 3
+
+
+@pytest.mark.asyncio
+async def test_contracts_are_routed_to_their_shard(sharded_client):
+    client, engines = sharded_client
+    numbers = [f"C-SHARD-{i}" for i in range(8)]
+    assert {shard_for(n, SHARDS) for n in numbers} == set(range(SHARDS))
+
+    for number in numbers:
+        res = await client.post("/contract", json={"contract_number": number, "components": ["energy_supply"]})
+        assert res.status_code == 201
+    res = await client.post("/contract", json={"contract_number": numbers[0], "components": ["energy_supply"]})
+    assert res.status_code == 409
+
+    for shard, engine in enumerate(engines):
+        async with engine.connect() as conn:
+            stored = set(await conn.scalars(select(Contract.contract_number)))
+        assert stored == {n for n in numbers if shard_for(n, SHARDS) == shard}
+
+    for number in numbers:
+        res = await client.post("/event", json={
+            "type": "supply_energy_start", "contract_number": number,
+            "date": "2024-12-01", "created_at": iso_dt(2024, 12, 1, 9),
+        })
+        assert res.json()["status"] == "accepted"
+        res = await client.get(f"/contract/{number}/contract_timeline")
+        assert res.json()["components"]["energy_supply"]["start"] == "2024-12-01"
+
+    res = await client.post("/event", json={
+        "type": "supply_energy_start", "contract_number": "C-MISSING",
+        "date": "2024-12-01", "created_at": iso_dt(2024, 12, 1, 9),
+    })
+    assert res.json()["status"] == "rejected"
+
+
+@pytest.mark.asyncio
+async def test_changes_cursor_spans_shards(sharded_client):
+    client, _ = sharded_client
+    numbers = [f"C-SYNC-{i}" for i in range(6)]
+    for number in numbers:
+        await client.post("/contract", json={"contract_number": number, "components": ["energy_supply"]})
+        await client.post("/event", json={
+            "type": "supply_energy_start", "contract_number": number,
+            "date": "2024-12-01", "created_at": iso_dt(2024, 12, 1, 9),
+        })
+
+    res = await client.get("/timelines/changes", params={"since": "0"})
+    assert res.status_code == 200
+    data = res.json()
+    assert sorted(item["contract_number"] for item in data["items"]) == numbers
+    cursor = data["next_cursor"]
+    assert len(cursor.split(".")) == SHARDS
+
+    res = await client.get("/timelines/changes", params={"since": cursor})
+    assert res.json() == {"items": [], "next_cursor": cursor}
+
+    # A cursor from a different shard layout is rejected
+    res = await client.get("/timelines/changes", params={"since": "1.2.3"})
+    assert res.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_contract_listing_merges_shards(sharded_client):
+    client, _ = sharded_client
+    numbers = sorted(f"C-PAGE-{i}" for i in range(9))
+    for number in numbers:
+        await client.post("/contract", json={"contract_number": number, "components": ["energy_supply"]})
+
+    for order_by in ("contract_number", "created_at"):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 4, "order_by": order_by, **({"cursor": cursor} if cursor else {})}
+            data = (await client.get("/contract", params=params)).json()
+            seen += [item["contract_number"] for item in data["items"]]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == numbers
+
+    res = await client.get("/contract", params={"count_only": True})
+    assert res.json() == {"count": len(numbers)}
@@ -84,3 +84,253 @@ async def test_timeline_from_readme_example(async_client):
     assert comps["heatpump_optimization"]["start"] == "2025-03-03"
     assert comps["heatpump_optimization"]["end"] == "2025-04-04"
 
+
+
+@pytest.mark.asyncio
+async def test_timeline_cache_invalidated_by_accepted_event(async_client, monkeypatch):
+    from app.api.services import timeline_services
+
+    monkeypatch.setattr(timeline_services._timeline_flights, "ttl", 60.0)
+    res = await async_client.post("/contract", json={"contract_number": "C-TL-CACHE", "components": ["energy_supply"]})
+    assert res.status_code == 201
+    res = await async_client.get("/contract/C-TL-CACHE/contract_timeline")
+    assert res.json()["components"] == {}
+
+    res = await async_client.post("/event", json={
+        "type": "supply_energy_start", "contract_number": "C-TL-CACHE",
+        "date": "2024-12-01", "created_at": iso_dt(2024, 12, 1, 9),
+    })
+    assert res.json()["status"] == "accepted"
+
+    res = await async_client.get("/contract/C-TL-CACHE/contract_timeline")
+    assert res.json()["components"]["energy_supply"]["start"] == "2024-12-01"
+    timeline_services.invalidate_timeline("C-TL-CACHE")
+
+
+@pytest.mark.asyncio
+async def test_timeline_stream_pushes_accepted_changes(async_client):
+    import json
+
+    from app.api.services.timeline_services import open_timeline_stream, timeline_hub
+
+    res = await async_client.get("/contract/C-NOPE/timeline/stream")
+    assert res.status_code == 404
+
+    res = await async_client.post("/contract", json={"contract_number": "C-SSE", "components": ["energy_supply"]})
+    assert res.status_code == 201
+    stream = await open_timeline_stream(None, None)
+    first = stream.__anext__()
+    fleet = next(iter(timeline_hub._all))
+
+    # Rejected events do not publish
+    res = await async_client.post("/event", json={
+        "type": "supply_energy_end", "contract_number": "C-SSE",
+        "date": "2024-12-31", "created_at": iso_dt(2024, 12, 31, 9),
+    })
+    assert res.json()["status"] == "rejected"
+    assert fleet.queue.empty()
+
+    res = await async_client.post("/event", json={
+        "type": "supply_energy_start", "contract_number": "C-SSE",
+        "date": "2024-12-01", "created_at": iso_dt(2024, 12, 1, 9),
+    })
+    assert res.json()["status"] == "accepted"
+
+    message = await first
+    assert message.startswith("event: timeline\ndata: ")
+    data = json.loads(message.split("data: ", 1)[1])
+    assert data["contract_number"] == "C-SSE"
+    assert data["components"]["energy_supply"]["start"] == "2024-12-01"
+    await stream.aclose()
+    assert timeline_hub.subscriber_count == 0
+
+
+@pytest.mark.asyncio
+async def test_timeline_changes_cursor_sync(async_client):
+    for number in ("C-SYNC-A", "C-SYNC-B"):
+        res = await async_client.post("/contract", json={"contract_number": number, "components": ["energy_supply"]})
+        assert res.status_code == 201
+
+    async def post(number, type_, day, created):
+        res = await async_client.post("/event", json={
+            "type": type_, "contract_number": number, "date": day, "created_at": created,
+        })
+        assert res.json()["status"] == "accepted"
+
+    await post("C-SYNC-A", "supply_energy_start", "2024-12-01", iso_dt(2024, 12, 1, 9))
+    await post("C-SYNC-B", "supply_energy_start", "2024-11-01", iso_dt(2024, 11, 1, 9))
+
+    res = await async_client.get("/timelines/changes", params={"since": 0})
+    assert res.status_code == 200
+    data = res.json()
+    assert [item["contract_number"] for item in data["items"]] == ["C-SYNC-A", "C-SYNC-B"]
+    cursor = data["next_cursor"]
+    assert cursor == str(data["items"][-1]["seq"])
+
+    # Paging scans at most `limit` changes
+    res = await async_client.get("/timelines/changes", params={"since": 0, "limit": 1})
+    assert [item["contract_number"] for item in res.json()["items"]] == ["C-SYNC-A"]
+
+    # Nothing new since the cursor
+    res = await async_client.get("/timelines/changes", params={"since": cursor})
+    assert res.json() == {"items": [], "next_cursor": cursor}
+
+    await post("C-SYNC-A", "supply_energy_end", "2024-12-31", iso_dt(2024, 12, 31, 9))
+    res = await async_client.get("/timelines/changes", params={"since": cursor})
+    data = res.json()
+    assert len(data["items"]) == 1
+    item = data["items"][0]
+    assert item["contract_number"] == "C-SYNC-A"
+    assert item["components"]["energy_supply"] == {"start": "2024-12-01", "end": "2024-12-31"}
+    assert int(data["next_cursor"]) > int(cursor)
+
+    res = await async_client.get("/timelines/changes", params={"since": "1.2"})
+    assert res.status_code == 400
+
+
+
+@pytest.mark.asyncio
+async def test_changes_cursor_survives_purging_the_latest_contract(async_client):
+    from app.api.services.purge_services import ContractPurger
+    from app.db import session as db_session
+
+    for number in ("C-KEPT", "C-TOP"):
+        await async_client.post("/contract", json={"contract_number": number, "components": ["energy_supply"]})
+    for number, day in (("C-KEPT", 1), ("C-TOP", 2)):
+        res = await async_client.post("/event", json={
+            "type": "supply_energy_start", "contract_number": number,
+            "date": f"2024-12-0{day}", "created_at": iso_dt(2024, 12, day, 9),
+        })
+        assert res.json()["status"] == "accepted"
+    cursor = (await async_client.get("/timelines/changes", params={"since": 0})).json()["next_cursor"]
+
+    # C-TOP holds the highest sequence; its deletion is a change of its own
+    assert (await async_client.delete("/contract/C-TOP")).status_code == 200
+    data = (await async_client.get("/timelines/changes", params={"since": cursor})).json()
+    assert [(item["contract_number"], item["deleted"], item["components"]) for item in data["items"]] == [
+        ("C-TOP", True, {}),
+    ]
+    cursor = data["next_cursor"]
+
+    # Purging removes its states, but sequence numbers are never handed out again
+    assert await ContractPurger().purge_once(db_session.get_engines(), chunk_rows=10) == 1
+    res = await async_client.post("/event", json={
+        "type": "supply_energy_end", "contract_number": "C-KEPT", "date": "2024-12-31", "created_at": iso_dt(2024, 12, 31, 9),
+    })
+    assert res.json()["status"] == "accepted"
+    data = (await async_client.get("/timelines/changes", params={"since": cursor})).json()
+    assert [item["contract_number"] for item in data["items"]] == ["C-KEPT"]
+    assert data["items"][0]["seq"] > int(cursor)
+
+
+@pytest.mark.asyncio
+async def test_timeline_as_of_replays_audit_with_checkpoints(async_client, monkeypatch):
+    import random
+
+    from sqlalchemy import func, select
+
+    from app.api.services.timeline_history import timeline_checkpointer
+    from app.config import settings
+    from app.db import session as db_session
+    from app.db.models.models import TimelineCheckpoint
+
+    res = await async_client.post("/contract", json={
+        "contract_number": "C-ASOF", "components": ["energy_supply", "battery_optimization"],
+    })
+    assert res.status_code == 201
+    res = await async_client.get("/contract/C-ASOF/contract_timeline", params={"as_of": iso_dt(2025, 1, 1)})
+    assert res.status_code == 400  # needs the audit
+
+    monkeypatch.setattr(settings, "ENABLE_EVENT_AUDIT", True)
+    monkeypatch.setattr(settings, "TIMELINE_CHECKPOINT_INTERVAL", 2)
+
+    async def post(type_, day, created_at):
+        res = await async_client.post("/event", json={
+            "type": type_, "contract_number": "C-ASOF", "date": day, "created_at": created_at,
+        })
+        return res.json()["status"]
+
+    async def as_of(created_at):
+        res = await async_client.get("/contract/C-ASOF/contract_timeline", params={"as_of": created_at})
+        assert res.status_code == 200
+        # Checkpoints due are written in the background; the test engine has one connection
+        await timeline_checkpointer.drain()
+        return res.json()["components"]
+
+    async def checkpoints():
+        async with db_session.AsyncSessionLocal() as db:
+            return await db.scalar(select(func.count()).select_from(TimelineCheckpoint))
+
+    assert await post("supply_energy_start", "2024-12-01", iso_dt(2024, 12, 1, 9)) == "accepted"
+    assert await post("battery_optimization_start", "2024-03-03", iso_dt(2024, 3, 3, 9)) == "accepted"
+    assert await post("supply_energy_end", "2024-11-30", iso_dt(2024, 12, 2, 9)) == "rejected"
+    assert await post("supply_energy_end", "2024-12-31", iso_dt(2024, 12, 31, 9)) == "accepted"
+
+    assert await as_of(iso_dt(2024, 1, 1)) == {}
+    assert await as_of(iso_dt(2024, 6, 1)) == {"battery_optimization": {"start": "2024-03-03", "end": None}}
+    assert await as_of(iso_dt(2024, 12, 1, 9)) == {
+        "battery_optimization": {"start": "2024-03-03", "end": None},
+        "energy_supply": {"start": "2024-12-01", "end": None},
+    }
+    # Offsets are normalized: 11:00+02:00 is 09:00Z
+    assert (await as_of("2024-12-31T11:00:00+02:00"))["energy_supply"] == {"start": "2024-12-01", "end": "2024-12-31"}
+    assert await checkpoints() == 1
+
+    # A late event (created before the checkpoint) rewrites history after it and drops stale checkpoints
+    assert await post("battery_optimization_end", "2024-04-04", iso_dt(2024, 4, 4, 9)) == "accepted"
+    assert await checkpoints() == 0
+    assert await as_of(iso_dt(2024, 6, 1)) == {"battery_optimization": {"start": "2024-03-03", "end": "2024-04-04"}}
+    latest = await as_of(iso_dt(2030, 1, 1))
+    assert latest["energy_supply"] == {"start": "2024-12-01", "end": "2024-12-31"}
+    res = await async_client.get("/contract/C-ASOF/contract_timeline")
+    assert res.json()["components"] == latest
+
+    # Random histories: as of "now" always equals the live timeline
+    rng = random.Random(7)
+    types = ["supply_energy_start", "supply_energy_end", "battery_optimization_start", "battery_optimization_end"]
+    for _ in range(40):
+        day = rng.randrange(1, 28)
+        await post(rng.choice(types), f"2025-02-{day:02d}", iso_dt(2025, 1, rng.randrange(1, 28), rng.randrange(24)))
+        if rng.random() < 0.3:
+            await as_of(iso_dt(2025, 1, rng.randrange(1, 28)))
+    res = await async_client.get("/contract/C-ASOF/contract_timeline")
+    assert await as_of(iso_dt(2030, 1, 1)) == res.json()["components"]
+
+
+@pytest.mark.asyncio
+async def test_checkpoints_made_stale_by_a_late_event_are_not_stored(async_client, monkeypatch):
+    from sqlalchemy import func, select
+
+    from app.api.services.timeline_history import fold_accepted_events
+    from app.config import settings
+    from app.db import session as db_session
+    from app.db.crud.event import list_accepted_events
+    from app.db.crud.timeline_checkpoint import add_checkpoints
+    from app.db.models.models import TimelineCheckpoint
+    from app.db.repository import get_repository
+    from app.domain.rules import ContractState
+
+    monkeypatch.setattr(settings, "ENABLE_EVENT_AUDIT", True)
+    await async_client.post("/contract", json={
+        "contract_number": "C-LATE", "components": ["energy_supply", "battery_optimization"],
+    })
+
+    async def post(type_, day, created_at):
+        await async_client.post("/event", json={
+            "type": type_, "contract_number": "C-LATE", "date": day, "created_at": created_at,
+        })
+
+    await post("supply_energy_start", "2024-12-01", iso_dt(2024, 12, 1))
+    await post("supply_energy_end", "2024-12-31", iso_dt(2024, 12, 5))
+    async with db_session.AsyncSessionLocal() as db:
+        contract = await get_repository().get_contract(db, "C-LATE")
+        # A checkpoint writer reads the history ...
+        rows = await list_accepted_events(db, contract.id, after=None, until=datetime(2030, 1, 1))
+        checkpoints = fold_accepted_events(ContractState(), rows, 1)
+        assert len(checkpoints) == 2
+        # ... a late event before both checkpoints commits meanwhile ...
+        await post("battery_optimization_start", "2024-11-01", iso_dt(2024, 11, 1))
+        # ... and the insert finds the rows it replayed no longer match
+        await add_checkpoints(db, contract.id, checkpoints, base=None)
+        await db.commit()
+        assert await db.scalar(select(func.count()).select_from(TimelineCheckpoint)) == 0
@@ -5,13 +5,17 @@ from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.pool import StaticPool
 
+from app.config import settings
 from app.main import app
 from app.db import session as db_session
 from app.db.session import Base
 
 
-@pytest_asyncio.fixture
-async def async_client(monkeypatch):
+@pytest_asyncio.fixture(params=["orm", "core"])
+async def async_client(request, monkeypatch):
+    # Every API test runs against both repository implementations
+    monkeypatch.setattr(settings, "DB_REPOSITORY", request.param)
+
     # Use a fresh in-memory SQLite DB per test with a static pool (single connection)
     test_engine = create_async_engine(
         "sqlite+aiosqlite:///:memory:",
@@ -0,0 +1,66 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.db import migrations
+
+# Hot queries of the event and sync paths, with the index each must use
+HOT_QUERIES = [
+    ("SELECT * FROM contract WHERE contract_number = 'x' AND deleted_at IS NULL", "ix_contract_contract_number"),
+    ("SELECT id FROM contract WHERE deleted_at IS NOT NULL ORDER BY deleted_at LIMIT 100", "ix_contract_deleted_at"),
+    (
+        "SELECT * FROM component_state WHERE contract_id = 'x' AND component_type = 'energy_supply'",
+        "sqlite_autoindex_component_state",
+    ),
+    ("SELECT * FROM component_state WHERE contract_id = 'x'", "sqlite_autoindex_component_state"),
+    (
+        "SELECT contract_id, change_seq FROM component_state WHERE change_seq > 0 ORDER BY change_seq LIMIT 100",
+        "COVERING INDEX ix_component_state_change_seq_contract",
+    ),
+    ("SELECT max(change_seq) FROM component_state", "ix_component_state_change_seq_contract"),
+    ("SELECT * FROM event_audit WHERE contract_id = 'x'", "ix_event_audit_contract_created_at"),
+    (
+        "SELECT reason, count(*) FROM event_audit WHERE reason <> 0 AND event_created_at >= '2024-01-01' GROUP BY reason",
+        "COVERING INDEX ix_event_audit_rejections",
+    ),
+]
+
+
+@pytest_asyncio.fixture
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    await migrations.upgrade(engine)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("query, index", HOT_QUERIES)
+async def test_hot_queries_use_an_index(engine, query, index):
+    async with engine.connect() as conn:
+        plan = " ".join(row[-1] for row in await conn.execute(text(f"EXPLAIN QUERY PLAN {query}")))
+    assert index in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.asyncio
+async def test_no_index_duplicates_a_primary_key_or_another_index(engine):
+    def read(conn):
+        insp = inspect(conn)
+        result = {}
+        for table in insp.get_table_names():
+            keys = [tuple(insp.get_pk_constraint(table)["constrained_columns"])]
+            keys += [tuple(u["column_names"]) for u in insp.get_unique_constraints(table)]
+            keys += [tuple(i["column_names"]) for i in insp.get_indexes(table)]
+            result[table] = keys
+        return result
+
+    async with engine.connect() as conn:
+        tables = await conn.run_sync(read)
+    for table, keys in tables.items():
+        for i, key in enumerate(keys):
+            others = keys[:i] + keys[i + 1:]
+            # Neither a duplicate nor a leftmost prefix of another index
+            assert not any(other[:len(key)] == key for other in others), (table, key)
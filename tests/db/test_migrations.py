@@ -0,0 +1,172 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.config import settings
+from app.db import migrations
+from app.db import session as db_session
+from app.db.session import Base
+from app.domain.audit import AuditReason, audit_message
+from app.domain.enums import ComponentType
+from app.main import app
+
+
+@pytest_asyncio.fixture
+async def engine():
+    eng = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    yield eng
+    await eng.dispose()
+
+
+async def _table_names(engine):
+    async with engine.connect() as conn:
+        return await conn.run_sync(lambda c: set(inspect(c).get_table_names()))
+
+
+@pytest.mark.asyncio
+async def test_fresh_database_is_created_and_stamped(engine):
+    assert await migrations.get_schema_version(engine) is None
+    with pytest.raises(migrations.SchemaOutOfDateError):
+        await migrations.ensure_schema(engine)
+
+    await migrations.upgrade(engine)
+
+    assert await migrations.get_schema_version(engine) == migrations.LATEST_VERSION
+    assert set(Base.metadata.tables) <= await _table_names(engine)
+    # Re-running is a no-op
+    assert await migrations.upgrade(engine) == []
+    assert await migrations.ensure_schema(engine) == migrations.LATEST_VERSION
+
+
+# Schema as created by create_all before versioning existed (version 1)
+LEGACY_DDL = [
+    """CREATE TABLE contract (
+        id CHAR(32) NOT NULL, contract_number VARCHAR NOT NULL, components JSON NOT NULL,
+        created_at DATETIME NOT NULL, PRIMARY KEY (id))""",
+    "CREATE UNIQUE INDEX ix_contract_contract_number ON contract (contract_number)",
+    "CREATE INDEX ix_contract_id ON contract (id)",
+    """CREATE TABLE component_state (
+        id CHAR(32) NOT NULL, contract_id CHAR(32) NOT NULL, component_type VARCHAR(21) NOT NULL,
+        start_date DATE, start_event_created_at DATETIME, end_date DATE, end_event_created_at DATETIME,
+        PRIMARY KEY (id), CONSTRAINT uq_contract_component UNIQUE (contract_id, component_type),
+        FOREIGN KEY(contract_id) REFERENCES contract (id))""",
+    "CREATE INDEX ix_component_state_contract_component ON component_state (contract_id, component_type)",
+    "CREATE INDEX ix_component_state_contract_id ON component_state (contract_id)",
+    "CREATE INDEX ix_component_state_id ON component_state (id)",
+    """CREATE TABLE event_audit (
+        id CHAR(32) NOT NULL, contract_id CHAR(32), raw_type VARCHAR(27) NOT NULL,
+        component_type VARCHAR(21), action VARCHAR(5), event_date DATE, event_created_at DATETIME,
+        processed_at DATETIME NOT NULL, status VARCHAR NOT NULL, message VARCHAR,
+        PRIMARY KEY (id), FOREIGN KEY(contract_id) REFERENCES contract (id))""",
+    "CREATE INDEX ix_event_audit_contract_id ON event_audit (contract_id)",
+    "CREATE INDEX ix_event_audit_id ON event_audit (id)",
+    "CREATE INDEX ix_event_audit_contract_created_at ON event_audit (contract_id, event_created_at)",
+    "INSERT INTO contract VALUES ('0123456789abcdef0123456789abcdef', 'LEGACY', '[\"energy_supply\"]', '2024-01-01 00:00:00.000000')",
+    """INSERT INTO component_state VALUES ('00000000000000000000000000000001', '0123456789abcdef0123456789abcdef',
+        'energy_supply', '2024-12-01', '2024-12-01 09:00:00.000000', NULL, NULL)""",
+]
+
+
+async def _columns(engine):
+    def read(conn):
+        insp = inspect(conn)
+        return {t: {c["name"] for c in insp.get_columns(t)} for t in insp.get_table_names()}
+
+    async with engine.connect() as conn:
+        return await conn.run_sync(read)
+
+
+async def _indexes(engine):
+    def read(conn):
+        insp = inspect(conn)
+        return {
+            (t, i["name"], tuple(i["column_names"]), bool(i["unique"]))
+            for t in insp.get_table_names()
+            for i in insp.get_indexes(t)
+        }
+
+    async with engine.connect() as conn:
+        return await conn.run_sync(read)
+
+
+@pytest.mark.asyncio
+async def test_unversioned_legacy_database_is_migrated_in_place(engine):
+    async with engine.begin() as conn:
+        for ddl in LEGACY_DDL:
+            await conn.execute(text(ddl))
+
+    applied = await migrations.upgrade(engine)
+
+    assert applied == [v for v, _, _ in migrations.MIGRATIONS]
+    async with engine.connect() as conn:
+        assert await conn.scalar(text("SELECT contract_number FROM contract")) == "LEGACY"
+        assert await conn.scalar(text("SELECT change_seq FROM component_state")) == 1
+
+    # The migrated schema has the same columns as a freshly created one
+    fresh = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    await migrations.upgrade(fresh)
+    assert await _columns(engine) == await _columns(fresh)
+    assert await _indexes(engine) == await _indexes(fresh)
+    await fresh.dispose()
+
+
+# Audit rows as written before reason codes (version 6 and earlier)
+LEGACY_AUDIT = [
+    ("0123456789abcdef0123456789abcdef", "accepted", "Event processed successfully."),
+    ("0123456789abcdef0123456789abcdef", "rejected", "End event without a start event should be rejected."),
+    ("0123456789abcdef0123456789abcdef", "rejected", "Component heatpump_optimization is not configured for contract LEGACY."),
+    (None, "rejected", "Contract 9999 not found."),
+    (None, "rejected", "Something nobody wrote any more."),
+]
+
+
+@pytest.mark.asyncio
+async def test_legacy_audit_text_becomes_reason_codes(engine):
+    async with engine.begin() as conn:
+        for ddl in LEGACY_DDL:
+            await conn.execute(text(ddl))
+        for i, (contract_id, status, message) in enumerate(LEGACY_AUDIT):
+            await conn.execute(
+                text(
+                    "INSERT INTO event_audit VALUES (:id, :contract_id, 'supply_energy_start', 'energy_supply', "
+                    "'start', '2024-12-01', '2024-12-01 09:00:00.000000', '2024-12-01 09:00:01.000000', "
+                    ":status, :message)"
+                ),
+                {"id": f"{i:032x}", "contract_id": contract_id, "status": status, "message": message},
+            )
+
+    await migrations.upgrade(engine)
+
+    async with engine.connect() as conn:
+        rows = (await conn.execute(text("SELECT reason, contract_number FROM event_audit ORDER BY id"))).all()
+    assert rows == [
+        (AuditReason.accepted, None),
+        (AuditReason.end_without_start, None),
+        (AuditReason.component_not_configured, None),
+        (AuditReason.contract_not_found, "9999"),
+        (AuditReason.unknown, None),
+    ]
+    # The original text is rebuilt from the code
+    assert [
+        audit_message(AuditReason(reason), contract_number=number or "LEGACY", component_type=ComponentType.heatpump_optimization)
+        for reason, number in rows[:4]
+    ] == [message for _, _, message in LEGACY_AUDIT[:4]]
+
+
+@pytest.mark.asyncio
+async def test_lifespan_refuses_unmigrated_database(engine, monkeypatch):
+    monkeypatch.setattr(db_session, "async_engine", engine, raising=True)
+    monkeypatch.setattr(settings, "DB_AUTO_MIGRATE", False)
+    with pytest.raises(migrations.SchemaOutOfDateError):
+        async with app.router.lifespan_context(app):
+            pass
+
+    await migrations.upgrade(engine)
+    async with app.router.lifespan_context(app):
+        pass
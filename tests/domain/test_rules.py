@@ -0,0 +1,96 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.domain.enums import EVENT_TYPE_TO_COMPONENT_ACTION, ComponentType, EventAction, EventType
+from app.domain.rules import (
+    ACTIONS,
+    COMPONENT_TYPES,
+    EVENT_CODES,
+    Action,
+    Component,
+    ContractState,
+    Outcome,
+    RuleEvent,
+    apply_events,
+    event_codes,
+    from_epoch_us,
+    to_epoch_us,
+)
+
+
+def evt(event_type, day, created_at):
+    return RuleEvent.from_type(event_type, day, created_at)
+
+
+def dt(year, month, day, hour=0):
+    return datetime(year, month, day, hour, tzinfo=timezone.utc)
+
+
+def test_event_codes_cover_every_event_type():
+    assert set(EVENT_CODES) == {et.value for et in EventType}
+    for et in EventType:
+        component, action = event_codes(et)
+        assert event_codes(et.value) == (component, action)
+        assert (COMPONENT_TYPES[component], ACTIONS[action]) == EVENT_TYPE_TO_COMPONENT_ACTION[et]
+    with pytest.raises(KeyError):
+        event_codes("unknown_event")
+    component, action = event_codes("supply_energy_end")
+    assert (COMPONENT_TYPES[component], ACTIONS[action]) == (ComponentType.energy_supply, EventAction.end)
+
+
+def test_epoch_us_round_trip_and_naive_as_utc():
+    aware = datetime(2024, 3, 3, 10, 0, 0, 123456, tzinfo=timezone(timedelta(hours=2)))
+    assert from_epoch_us(to_epoch_us(aware)) == aware
+    assert to_epoch_us(datetime(2024, 3, 3, 8, 0, 0, 123456)) == to_epoch_us(aware)
+
+
+def test_apply_events_matches_readme_scenario():
+    events = [
+        evt("supply_energy_start", date(2024, 12, 1), dt(2024, 12, 1, 9)),
+        evt("supply_energy_end", date(2024, 12, 31), dt(2024, 12, 31, 9)),
+        evt("battery_optimization_start", date(2024, 3, 3), dt(2024, 3, 3, 9)),
+        evt("battery_optimization_end", date(2024, 4, 4), dt(2024, 4, 4, 9)),
+        evt("battery_optimization_end", date(2024, 2, 1), dt(2025, 5, 1, 9)),
+        evt("battery_optimization_start", date(2024, 3, 15), dt(2025, 5, 3, 9)),
+        evt("battery_optimization_end", date(2024, 4, 15), dt(2025, 5, 4, 9)),
+    ]
+    state = ContractState()
+
+    outcomes = apply_events(state, events)
+
+    assert outcomes == [
+        Outcome.accepted,
+        Outcome.accepted,
+        Outcome.accepted,
+        Outcome.accepted,
+        Outcome.end_before_start,
+        Outcome.start_after_end,
+        Outcome.accepted,
+    ]
+    battery = state.get(Component.battery_optimization)
+    assert (battery.start_date, battery.end_date) == (date(2024, 3, 3), date(2024, 4, 15))
+    assert state.get(Component.heatpump_optimization) is None
+
+
+@pytest.mark.parametrize(
+    "events,expected",
+    [
+        ([("supply_energy_end", 31, 2)], [Outcome.end_without_start]),
+        ([("supply_energy_start", 1, 5), ("supply_energy_start", 2, 5)], [Outcome.accepted, Outcome.start_not_newer]),
+        ([("supply_energy_start", 1, 5), ("supply_energy_end", 31, 4)], [Outcome.accepted, Outcome.end_before_start]),
+        (
+            [("supply_energy_start", 1, 1), ("supply_energy_end", 30, 5), ("supply_energy_end", 31, 4)],
+            [Outcome.accepted, Outcome.accepted, Outcome.end_not_newer],
+        ),
+        # An earlier start is still accepted after an end, as long as it is newer than the current start
+        (
+            [("supply_energy_start", 2, 1), ("supply_energy_end", 30, 5), ("supply_energy_start", 1, 3)],
+            [Outcome.accepted, Outcome.accepted, Outcome.accepted],
+        ),
+    ],
+)
+def test_ordering_rules(events, expected):
+    state = ContractState()
+    rule_events = [evt(t, date(2024, 1, d), dt(2024, 2, 1, h)) for t, d, h in events]
+    assert apply_events(state, rule_events) == expected
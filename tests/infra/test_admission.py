@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from app.infra.admission import AdmissionController, Overloaded
+
+
+@pytest.mark.asyncio
+async def test_limit_queue_and_fast_rejection():
+    ctl = AdmissionController(limit=2, max_queue=1)
+    release = asyncio.Event()
+    order = []
+
+    async def work(i):
+        async with ctl.admit():
+            order.append(i)
+            await release.wait()
+
+    running = [asyncio.ensure_future(work(i)) for i in range(3)]
+    await asyncio.sleep(0.01)
+    assert order == [0, 1]
+    assert ctl.stats()["queue_depth"] == 1
+
+    with pytest.raises(Overloaded) as exc:
+        async with ctl.admit():
+            pass
+    assert exc.value.retry_after >= 1
+    assert ctl.rejected == 1
+
+    release.set()
+    await asyncio.gather(*running)
+    assert order == [0, 1, 2]
+    stats = ctl.stats()
+    assert (stats["in_flight"], stats["queue_depth"], stats["admitted"]) == (0, 0, 3)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    ctl = AdmissionController(limit=1, max_queue=5)
+    async with ctl.admit():
+        waiter = asyncio.ensure_future(ctl.admit().__aenter__())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+    assert ctl.stats()["in_flight"] == 0
+    async with ctl.admit():
+        assert ctl.stats()["in_flight"] == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_after_tracks_service_time():
+    ctl = AdmissionController(limit=1, max_queue=0)
+    ctl._observe(3.0)
+    assert ctl.retry_after() == 3
@@ -0,0 +1,26 @@
+import time
+import uuid
+
+from app.infra.ids import uuid7, uuid7_time_ms
+
+
+def test_uuid7_layout_and_time():
+    now_ms = time.time_ns() // 1_000_000
+    value = uuid7()
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+    assert abs(uuid7_time_ms(value) - now_ms) < 1000
+
+
+def test_uuid7_is_strictly_increasing_within_a_tick():
+    ids = [uuid7() for _ in range(10_000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    # Byte order matches integer order, so the stored CHAR(32) hex sorts the same way
+    assert [i.hex for i in ids] == sorted(i.hex for i in ids)
+
+
+def test_uuid7_survives_clock_going_backwards(monkeypatch):
+    first = uuid7()
+    monkeypatch.setattr(time, "time_ns", lambda: 0)
+    assert uuid7() > first
@@ -0,0 +1,43 @@
+import json
+
+from loguru import logger
+
+from app.infra.logging import configure_logging, should_log
+
+
+class _Explodes:
+    def __format__(self, spec):
+        raise AssertionError("formatted although the level is filtered out")
+
+
+def test_sampling_keeps_one_in_n_per_type():
+    configure_logging(sample_rates={"event.processing": 3, "timeline.read": 1})
+    try:
+        kept = [should_log("event.processing") for _ in range(9)]
+        assert kept == [True, False, False] * 3
+        assert all(should_log("timeline.read") for _ in range(5))
+        assert all(should_log("unconfigured") for _ in range(5))
+    finally:
+        configure_logging()
+
+
+def test_filtered_level_is_not_formatted_and_json_sink(capsys):
+    configure_logging("WARNING", serialize=True)
+    try:
+        logger.info("never rendered {}", _Explodes())
+        logger.warning("Processing event: {}", "supply_energy_start", contract_number="1234")
+        record = json.loads(capsys.readouterr().out.strip())["record"]
+        assert record["message"] == "Processing event: supply_energy_start"
+        assert record["extra"]["contract_number"] == "1234"
+    finally:
+        configure_logging()
+
+
+def test_enqueued_sink_is_drained_on_complete(capsys):
+    configure_logging(enqueue=True)
+    try:
+        logger.info("queued message")
+        logger.complete()
+        assert "queued message" in capsys.readouterr().out
+    finally:
+        configure_logging()
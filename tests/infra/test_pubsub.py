@@ -0,0 +1,39 @@
+import pytest
+
+from app.infra.pubsub import FanoutHub
+
+
+@pytest.mark.asyncio
+async def test_publish_fans_out_to_topic_and_fleet_subscribers():
+    hub = FanoutHub(buffer_size=4)
+    a = hub.subscribe("1234")
+    b = hub.subscribe("1234")
+    other = hub.subscribe("9999")
+    fleet = hub.subscribe()
+
+    assert hub.publish("1234", "msg") == 3
+    assert [a.queue.get_nowait(), b.queue.get_nowait(), fleet.queue.get_nowait()] == ["msg"] * 3
+    assert other.queue.empty()
+
+    hub.unsubscribe(a)
+    hub.unsubscribe(b)
+    hub.unsubscribe(fleet)
+    assert not hub.has_subscribers("1234")
+    assert hub.has_subscribers("9999")
+    assert hub.subscriber_count == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_is_evicted_without_blocking_others():
+    hub = FanoutHub(buffer_size=2)
+    slow = hub.subscribe("1234")
+    fast = hub.subscribe("1234")
+
+    for i in range(3):
+        hub.publish("1234", f"m{i}")
+        fast.queue.get_nowait()
+
+    assert slow.evicted and not fast.evicted
+    assert hub.evictions == 1
+    assert [slow.queue.get_nowait() for _ in range(3)] == ["m0", "m1", None]
+    assert hub.publish("1234", "m3") == 1
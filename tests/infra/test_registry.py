@@ -0,0 +1,91 @@
+import subprocess
+import sys
+import uuid
+
+import pytest
+
+from app.infra.registry import KEY_SIZE, SharedRegistry, fcntl
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="the shared registry needs fcntl")
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = SharedRegistry()
+    registry.open(str(tmp_path / "contracts.registry"), capacity=64)
+    yield registry
+    registry.close()
+
+
+def test_put_get_remove_across_mappings(registry):
+    # A second mapping of the same file stands in for another worker
+    other = SharedRegistry()
+    other.open(registry.path, capacity=64)
+    ident = uuid.uuid4()
+    assert registry.get("C-1") is None
+    assert registry.put("C-1", ident, 0b101)
+    assert other.get("C-1") == (ident, 0b101)
+    assert other.remove("C-1")
+    assert registry.get("C-1") is None
+    assert registry.generation == other.generation
+    # Keys that do not fit are never stored, so they always fall back
+    assert not registry.put("x" * (KEY_SIZE + 1), ident, 1)
+    other.close()
+
+
+def test_fill_is_dropped_after_a_removal(registry):
+    ident = uuid.uuid4()
+    generation = registry.generation
+    registry.remove("C-2")  # another worker deletes while this one reads the database
+    assert not registry.put("C-2", ident, 1, generation=generation)
+    assert registry.get("C-2") is None
+    assert registry.put("C-2", ident, 1, generation=registry.generation)
+    assert registry.stats()["stale_fills"] == 1
+
+
+def test_probe_chains_survive_removals_and_bound_the_table(tmp_path):
+    registry = SharedRegistry()
+    registry.open(str(tmp_path / "small.registry"), capacity=4)
+    ids = {f"K-{i}": uuid.uuid4() for i in range(5)}
+    stored = [key for key, ident in ids.items() if registry.put(key, ident, 1)]
+    assert len(stored) == 4 and registry.stats()["full"] == 1
+    registry.remove(stored[0])
+    assert all(registry.get(key) == (ids[key], 1) for key in stored[1:])
+    # The removed slot is reused
+    assert registry.put(stored[0], ids[stored[0]], 2)
+    assert registry.get(stored[0]) == (ids[stored[0]], 2)
+    registry.close()
+
+
+def test_entries_written_by_another_process_are_visible(registry):
+    ident = uuid.uuid4()
+    code = (
+        "import sys, uuid\n"
+        "from app.infra.registry import SharedRegistry\n"
+        "r = SharedRegistry()\n"
+        "r.open(sys.argv[1], 64)\n"
+        "r.put('C-3', uuid.UUID(sys.argv[2]), 3)\n"
+    )
+    subprocess.run([sys.executable, "-c", code, registry.path, str(ident)], check=True)
+    assert registry.get("C-3") == (ident, 3)
+
+
+def test_reopening_keeps_entries_unless_the_layout_changes(registry):
+    ident = uuid.uuid4()
+    registry.put("C-4", ident, 1)
+    # A worker joining (or restarting) must not wipe what the others stored
+    joining = SharedRegistry()
+    joining.open(registry.path, capacity=64)
+    assert joining.get("C-4") == (ident, 1)
+    joining.close()
+
+    with open(registry.path, "r+b") as raw:
+        raw.write(b"XXXX")
+    joining.open(registry.path, capacity=64)
+    assert joining.get("C-4") is None
+    joining.close()
+
+    registry.put("C-4", ident, 1)
+    joining.open(registry.path, capacity=32)
+    assert joining.get("C-4") is None and joining.capacity == 32
+    joining.close()
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from app.infra.reorder import ReorderBuffer
+
+
+def recording_flush(calls):
+    async def flush(key, items):
+        calls.append((key, list(items)))
+        return [f"{key}:{item}" for item in items]
+
+    return flush
+
+
+@pytest.mark.asyncio
+async def test_items_in_one_window_are_flushed_sorted_and_answered_individually():
+    calls = []
+    buf = ReorderBuffer(0.05, max_pending=100, flush=recording_flush(calls))
+
+    results = await asyncio.gather(
+        buf.submit("a", 3, "end"),
+        buf.submit("b", 1, "other"),
+        buf.submit("a", 1, "start"),
+        buf.submit("a", 2, "middle"),
+    )
+
+    assert results == ["a:end", "b:other", "a:start", "a:middle"]
+    assert sorted(calls) == [("a", ["start", "middle", "end"]), ("b", ["other"])]
+    assert buf.stats()["batches"] == 2 and buf.stats()["reordered"] == 1 and buf.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_disabled_full_or_large_windows_do_not_wait():
+    calls = []
+    buf = ReorderBuffer(0.0, max_pending=1, flush=recording_flush(calls))
+    assert await buf.submit("a", 1, "x") == "a:x"
+
+    buf.window_s = 60.0
+    held = asyncio.ensure_future(buf.submit("a", 2, "held"))
+    await asyncio.sleep(0)
+    # Over max_pending: flushed alone immediately instead of waiting a minute
+    assert await asyncio.wait_for(buf.submit("a", 1, "over"), 1) == "a:over"
+    assert buf.bypassed == 1
+
+    buf.max_batch = 2
+    buf.max_pending = 10
+    # The second item fills the batch and closes the window early
+    assert await asyncio.wait_for(buf.submit("a", 1, "fill"), 1) == "a:fill"
+    assert await held == "a:held"
+    assert calls[-1] == ("a", ["fill", "held"])
+
+
+@pytest.mark.asyncio
+async def test_drain_flushes_open_windows_and_errors_reach_every_caller():
+    async def failing(key, items):
+        raise RuntimeError("database down")
+
+    buf = ReorderBuffer(60.0, max_pending=10, flush=failing)
+    waiting = [asyncio.ensure_future(buf.submit("a", i, i)) for i in range(2)]
+    await asyncio.sleep(0)
+
+    await buf.drain()
+
+    for task in waiting:
+        with pytest.raises(RuntimeError):
+            await task
+    assert buf.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_flushes_of_one_key_never_overlap():
+    calls, active, overlaps = [], set(), []
+
+    async def slow(key, items):
+        overlaps.append(key in active)
+        active.add(key)
+        await asyncio.sleep(0.02 if items[0] == 1 else 0)
+        active.discard(key)
+        calls.append((key, list(items)))
+        return items
+
+    buf = ReorderBuffer(0.001, max_pending=100, flush=slow, max_batch=2)
+    # The first batch closes early and is still running when the second window closes
+    results = await asyncio.gather(*(buf.submit(key, i, i) for key in ("a", "b") for i in (1, 2, 3)))
+
+    assert results == [1, 2, 3] * 2
+    assert overlaps.count(True) == 0
+    assert [items for key, items in calls if key == "a"] == [[1, 2], [3]]
+    assert buf._tasks == set() and buf._tails == {}
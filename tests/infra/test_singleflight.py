@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from app.infra.singleflight import SingleFlight
+
+
+class Counter:
+    def __init__(self, result="value", delay=0.01, exc=None):
+        self.calls = 0
+        self.result = result
+        self.delay = delay
+        self.exc = exc
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.exc is not None:
+            raise self.exc
+        return f"{self.result}-{self.calls}"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_computation():
+    flights = SingleFlight()
+    fn = Counter()
+    results = await asyncio.gather(*(flights.do("1234", fn) for _ in range(20)))
+    assert fn.calls == 1
+    assert results == ["value-1"] * 20
+    # Without a ttl nothing is kept once the flight lands
+    assert await flights.do("1234", fn) == "value-2"
+
+
+@pytest.mark.asyncio
+async def test_exception_is_shared():
+    flights = SingleFlight()
+    fn = Counter(exc=LookupError("missing"))
+    results = await asyncio.gather(*(flights.do("k", fn) for _ in range(5)), return_exceptions=True)
+    assert fn.calls == 1
+    assert all(isinstance(r, LookupError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_ttl_cache_and_invalidation_during_flight():
+    flights = SingleFlight(ttl=60)
+    fn = Counter()
+    assert await flights.do("k", fn) == "value-1"
+    assert await flights.do("k", fn) == "value-1"
+    flights.invalidate("k")
+    assert await flights.do("k", fn) == "value-2"
+
+    # An invalidation while computing keeps the (possibly stale) result out of the cache
+    slow = asyncio.ensure_future(flights.do("other", fn))
+    await asyncio.sleep(0)
+    flights.invalidate("other")
+    assert await slow == "value-3"
+    assert await flights.do("other", fn) == "value-4"
+
+
+@pytest.mark.asyncio
+async def test_follower_retries_when_leader_is_cancelled():
+    flights = SingleFlight()
+    fn = Counter(delay=0.05)
+    leader = asyncio.ensure_future(flights.do("k", fn))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flights.do("k", fn))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == "value-2"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+@pytest.mark.asyncio
+async def test_invalidations_leave_no_state_behind():
+    flights = SingleFlight(ttl=60)
+    fn = Counter(delay=0)
+    # Timeline writes invalidate every contract they touch, most never read
+    for number in range(10_000):
+        flights.invalidate(f"C-{number}")
+    assert await flights.do("C-1", fn) == "value-1"
+    flights.invalidate("C-1")
+    assert vars(flights) == {"ttl": 60, "_flights": {}, "_cache": {}}
+
+    # A flight invalidated and overtaken by a newer one caches only the newer result
+    first = asyncio.ensure_future(flights.do("k", Counter(result="old", delay=0.02)))
+    await asyncio.sleep(0)
+    flights.invalidate("k")
+    second = asyncio.ensure_future(flights.do("k", Counter(result="new", delay=0.01)))
+    assert await second == "new-1"
+    assert await first == "old-1"
+    assert await flights.do("k", fn) == "new-1"
@@ -0,0 +1,87 @@
+"""
+Peak and steady-state memory assertions for the memory budget suite.
+
+`MemoryBudget` traces Python allocations with tracemalloc and samples the
+process RSS while a workload runs. On exit it fails when the traced peak or the
+memory still held after the workload (the growth, i.e. what a leak looks like)
+exceed the budget, and the failure lists the allocation sites that grew most.
+
+The suite runs a small workload by default; MEMORY_EVENTS scales it (the
+release check uses MEMORY_EVENTS=100000).
+"""
+from __future__ import annotations
+
+import gc
+import os
+import tracemalloc
+from typing import List, Optional
+
+MEMORY_EVENTS = int(os.getenv("MEMORY_EVENTS", "300"))
+
+_MB = 2**20
+_TOP_SITES = 10
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class MemoryBudget:
+    def __init__(self, label: str, *, peak_mb: float, growth_mb: float, rss_growth_mb: Optional[float] = None) -> None:
+        self.label = label
+        self.peak_mb = peak_mb
+        self.growth_mb = growth_mb
+        self.rss_growth_mb = rss_growth_mb
+        self._rss_start: Optional[int] = None
+        self._rss_max: Optional[int] = None
+
+    def __enter__(self) -> "MemoryBudget":
+        gc.collect()
+        tracemalloc.start()
+        self._baseline = tracemalloc.take_snapshot()
+        self._traced_start = tracemalloc.get_traced_memory()[0]
+        self._rss_start = self._rss_max = rss_bytes()
+        return self
+
+    def sample(self) -> None:
+        """Call periodically from the workload to record the RSS high-water mark."""
+        rss = rss_bytes()
+        if rss is not None and self._rss_max is not None:
+            self._rss_max = max(self._rss_max, rss)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.sample()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        if exc_type is not None:
+            return
+
+        failures: List[str] = []
+        peak_mb = (peak - self._traced_start) / _MB
+        growth_mb = (current - self._traced_start) / _MB
+        if peak_mb > self.peak_mb:
+            failures.append(f"traced peak {peak_mb:.2f} MB > budget {self.peak_mb} MB")
+        if growth_mb > self.growth_mb:
+            failures.append(f"retained growth {growth_mb:.2f} MB > budget {self.growth_mb} MB")
+        if self.rss_growth_mb is not None and self._rss_start is not None:
+            rss_growth_mb = (self._rss_max - self._rss_start) / _MB
+            if rss_growth_mb > self.rss_growth_mb:
+                failures.append(f"RSS growth {rss_growth_mb:.2f} MB > budget {self.rss_growth_mb} MB")
+        if failures:
+            raise AssertionError(f"{self.label}: " + "; ".join(failures) + "\n" + self._top_sites(snapshot))
+
+    def _top_sites(self, snapshot: tracemalloc.Snapshot) -> str:
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__),
+        ])
+        stats = [s for s in snapshot.compare_to(self._baseline, "lineno") if s.size_diff > 0][:_TOP_SITES]
+        lines = ["Top allocation sites by retained growth:"]
+        lines += [f"  {s.traceback}: +{s.size_diff / 1024:.1f} KiB in {s.count_diff:+d} blocks" for s in stats]
+        return "\n".join(lines)
@@ -0,0 +1,115 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.api.services.event_services import process_event
+from app.api.services.timeline_services import get_contract_timeline
+from app.db.session import get_async_session
+from app.dto.event import EventPayload
+from tests.memory.budget import MEMORY_EVENTS, MemoryBudget
+
+CONTRACTS = 50
+BATCH = 100
+BASE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+TYPES = ["supply_energy_start", "supply_energy_end", "battery_optimization_start", "battery_optimization_end"]
+
+
+def event_payload(i: int, *, contracts: int = CONTRACTS) -> dict:
+    created_at = BASE + timedelta(seconds=i)
+    return {
+        "type": TYPES[(i // contracts) % len(TYPES)],
+        "contract_number": f"M-{i % contracts:05d}",
+        "date": (date(2024, 1, 1) + timedelta(days=i // (contracts * 2))).isoformat(),
+        "created_at": created_at.isoformat(),
+    }
+
+
+async def create_contracts(client, count: int) -> None:
+    for n in range(count):
+        res = await client.post("/contract", json={
+            "contract_number": f"M-{n:05d}", "components": ["energy_supply", "battery_optimization"],
+        })
+        assert res.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_sequential_events_memory(async_client):
+    await create_contracts(async_client, CONTRACTS)
+    # Warm caches (compiled statements, schemas) outside the measured window
+    for i in range(BATCH):
+        await async_client.post("/event", json=event_payload(i))
+
+    with MemoryBudget("sequential /event", peak_mb=4, growth_mb=1, rss_growth_mb=64) as budget:
+        for i in range(BATCH, BATCH + MEMORY_EVENTS):
+            res = await async_client.post("/event", json=event_payload(i))
+            assert res.status_code == 200
+            if i % BATCH == 0:
+                budget.sample()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_event_batches_memory(async_client):
+    await create_contracts(async_client, CONTRACTS)
+    await asyncio.gather(*(async_client.post("/event", json=event_payload(i)) for i in range(BATCH)))
+
+    with MemoryBudget("concurrent /event batches", peak_mb=12, growth_mb=1, rss_growth_mb=64) as budget:
+        for offset in range(BATCH, BATCH + MEMORY_EVENTS, BATCH):
+            responses = await asyncio.gather(
+                *(async_client.post("/event", json=event_payload(i)) for i in range(offset, offset + BATCH))
+            )
+            assert all(res.status_code == 200 for res in responses)
+            budget.sample()
+
+
+@pytest.mark.asyncio
+async def test_streaming_exports_memory(async_client):
+    # Paging through every contract and every change must hold one page at a time
+    contracts = max(MEMORY_EVENTS // 10, CONTRACTS)
+    await create_contracts(async_client, contracts)
+    for i in range(contracts):
+        await async_client.post("/event", json=event_payload(i, contracts=contracts))
+
+    async def export() -> int:
+        exported, cursor = 0, None
+        while True:
+            params = {"limit": 50} if cursor is None else {"limit": 50, "cursor": cursor}
+            body = (await async_client.get("/contract", params=params)).json()
+            exported += len(body["items"])
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+        since = "0"
+        while True:
+            body = (await async_client.get("/timelines/changes", params={"since": since, "limit": 50})).json()
+            if not body["items"]:
+                return exported
+            since = body["next_cursor"]
+
+    await export()
+    with MemoryBudget("paged exports", peak_mb=4, growth_mb=0.5, rss_growth_mb=64) as budget:
+        for _ in range(3):
+            assert await export() == contracts
+            budget.sample()
+
+
+@pytest.mark.asyncio
+async def test_long_lived_session_memory(async_client):
+    await create_contracts(async_client, CONTRACTS)
+    sessions = get_async_session()
+    db = await sessions.__anext__()
+    try:
+        for i in range(BATCH):
+            await process_event(db, EventPayload.model_validate(event_payload(i)))
+
+        with MemoryBudget("long-lived session", peak_mb=4, growth_mb=1, rss_growth_mb=64) as budget:
+            for i in range(BATCH, BATCH + MEMORY_EVENTS):
+                payload = EventPayload.model_validate(event_payload(i))
+                await process_event(db, payload)
+                await get_contract_timeline(db, payload.contract_number)
+                if i % BATCH == 0:
+                    budget.sample()
+        # The identity map must not accumulate every row the session has touched
+        assert len(db.identity_map) <= CONTRACTS * 3
+    finally:
+        await sessions.aclose()
@@ -0,0 +1,73 @@
+import asyncio
+import os
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import server
+from app.config import settings
+from app.db import migrations
+from app.db import session as db_session
+
+
+def test_auto_picks_fast_implementations_when_installed(monkeypatch):
+    monkeypatch.setattr(server, "_installed", lambda module: True)
+    assert server.resolve_loop("auto") == "uvloop"
+    assert server.resolve_http("auto") == "httptools"
+
+    monkeypatch.setattr(server, "_installed", lambda module: False)
+    assert server.resolve_loop("auto") == "asyncio"
+    assert server.resolve_http("auto") == "h11"
+    assert server.resolve_loop("uvloop") == "uvloop"
+
+
+def test_worker_count_defaults_to_cpus():
+    assert server.resolve_workers(3) == 3
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    assert server.resolve_workers(0) == cpus
+
+
+def test_uvicorn_options_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_KEEP_ALIVE_S", 7)
+    monkeypatch.setattr(settings, "SERVER_BACKLOG", 512)
+    monkeypatch.setattr(settings, "SERVER_GRACEFUL_SHUTDOWN_S", 12)
+    monkeypatch.setattr(settings, "SERVER_LOOP", "asyncio")
+    options = server.uvicorn_options("0.0.0.0", 9000, 2)
+    assert options["workers"] == 2
+    assert options["loop"] == "asyncio"
+    assert options["timeout_keep_alive"] == 7
+    assert options["backlog"] == 512
+    assert options["timeout_graceful_shutdown"] == 12
+    assert options["lifespan"] == "on"
+
+
+def test_migrations_run_once_in_parent(monkeypatch, tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'eo.db'}")
+    monkeypatch.setattr(db_session, "async_engine", engine, raising=True)
+    monkeypatch.setattr(settings, "DB_AUTO_MIGRATE", True)
+    monkeypatch.setenv("DB_AUTO_MIGRATE", "true")
+
+    server.migrate_before_workers()
+
+    assert asyncio.run(migrations.get_schema_version(engine)) == migrations.LATEST_VERSION
+    # Workers see auto-migration switched off and only check the version
+    assert os.environ["DB_AUTO_MIGRATE"] == "false"
+    assert settings.DB_AUTO_MIGRATE is False
+
+
+def test_registry_is_emptied_once_in_parent(monkeypatch, tmp_path):
+    import uuid
+
+    from app.infra.registry import SharedRegistry
+
+    path = str(tmp_path / "contracts.registry")
+    monkeypatch.setattr(settings, "CONTRACT_REGISTRY_ENABLED", True)
+    monkeypatch.setattr(settings, "CONTRACT_REGISTRY_PATH", path)
+    monkeypatch.setattr(settings, "CONTRACT_REGISTRY_SLOTS", 64)
+    left_over = SharedRegistry()
+    left_over.open(path, 64)
+    left_over.put("C-OLD", uuid.uuid4(), 1)
+
+    server.reset_registry_before_workers()
+
+    assert left_over.get("C-OLD") is None
+    left_over.close()
@@ -0,0 +1,211 @@
+import random
+import uuid
+from datetime import date, datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+np = pytest.importorskip("numpy")
+
+from app.db.migrations import upgrade  # noqa: E402
+from app.db.models.models import ComponentState, Contract, Event  # noqa: E402
+from app.domain.audit import AuditReason  # noqa: E402
+from app.domain.rules import Action, Component, ContractState, RuleEvent, apply_events  # noqa: E402
+from app.db.models.models import TimelineDocument  # noqa: E402
+from app.domain.rules import to_epoch_us  # noqa: E402
+from app.tools.backfill import backfill, load_events, parse_created_us, reduce_events  # noqa: E402
+
+
+def _reference(rows):
+    """Replay rows one (contract, component) at a time with the pure-Python engine."""
+    outcomes = {}
+    windows = {}
+    order = sorted(range(len(rows)), key=lambda i: (rows[i][0], rows[i][1], rows[i][4]))
+    states = {}
+    for i in order:
+        c, k, a, d, t = rows[i]
+        state = states.setdefault(c, ContractState())
+        (outcomes[i],) = apply_events(state, [RuleEvent(Component(k), Action(a), d, t)])
+    for c, state in states.items():
+        for k, window in enumerate(state.windows):
+            if window is not None and window.start_us is not None:
+                windows[(c, k)] = (window.start_date, window.start_us, window.end_date, window.end_us)
+    return outcomes, windows
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_vectorized_reduction_matches_rule_engine(seed):
+    rng = random.Random(seed)
+    rows = [
+        (rng.randrange(5), rng.randrange(3), rng.randrange(2), rng.randrange(20), rng.randrange(40))
+        for _ in range(400)
+    ]
+    arrays = [np.array(col, dtype=np.int64) for col in zip(*rows)]
+
+    red = reduce_events(*arrays)
+
+    expected_outcomes, expected_windows = _reference(rows)
+    got_outcomes = {int(red.order[j]): int(red.outcome[j]) for j in range(len(rows))}
+    assert got_outcomes == expected_outcomes
+    got_windows = {
+        (int(c), int(k)): (int(sd), int(su), None if eu < 0 else int(ed), None if eu < 0 else int(eu))
+        for c, k, sd, su, ed, eu in zip(
+            red.group_contract, red.group_component, red.group_start_day,
+            red.group_start_us, red.group_end_day, red.group_end_us,
+        )
+    }
+    assert got_windows == expected_windows
+
+
+@pytest_asyncio.fixture
+async def engine():
+    eng = create_async_engine(
+        "sqlite+aiosqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    await upgrade(eng)
+    yield eng
+    await eng.dispose()
+
+
+@pytest.mark.asyncio
+async def test_backfill_writes_states_and_audit(engine, tmp_path):
+    async with engine.begin() as conn:
+        await conn.execute(Contract.__table__.insert().values(
+            id=uuid.uuid4(), contract_number="1234",
+            components=["energy_supply", "battery_optimization"],
+        ))
+    csv_file = tmp_path / "events.csv"
+    csv_file.write_text(
+        "type,contract_number,date,created_at\n"
+        "supply_energy_end,1234,2024-12-31,2024-12-31T09:00:00+00:00\n"
+        "supply_energy_start,1234,2024-12-01,2024-12-01T09:00:00+00:00\n"
+        "battery_optimization_end,1234,2024-01-01,2024-01-01T09:00:00+00:00\n"
+        "heatpump_optimization_start,1234,2025-03-03,2025-03-03T09:00:00+00:00\n"
+    )
+    ndjson_file = tmp_path / "more.ndjson"
+    ndjson_file.write_text(
+        '{"type": "supply_energy_start", "contract_number": "1234", "date": "2025-01-01", "created_at": "2025-01-01T09:00:00Z"}\n'
+        '{"type": "supply_energy_start", "contract_number": "9999", "date": "2025-01-01", "created_at": "2025-01-01T09:00:00Z"}\n'
+    )
+
+    stats = await backfill([engine], [csv_file, ndjson_file], audit=True)
+
+    assert stats == {"events": 6, "accepted": 2, "rejected": 4, "states": 1}
+    async with engine.connect() as conn:
+        states = (await conn.execute(select(ComponentState))).all()
+        audit = (await conn.execute(select(Event.reason, Event.contract_number))).all()
+    assert len(states) == 1
+    assert (states[0].start_date, states[0].end_date) == (date(2024, 12, 1), date(2024, 12, 31))
+    assert len(audit) == 6
+    reasons = {reason for reason, _ in audit}
+    assert AuditReason.start_after_end in reasons
+    assert AuditReason.end_without_start in reasons
+    assert AuditReason.component_not_configured in reasons
+    assert (AuditReason.contract_not_found, "9999") in audit
+
+
+@pytest.mark.asyncio
+async def test_backfilled_states_are_in_the_changes_feed(engine, tmp_path):
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    from app.api.services.timeline_services import get_timeline_changes
+    from app.db.session import ShardSessions
+
+    async with engine.begin() as conn:
+        for number in ("1234", "5678"):
+            await conn.execute(Contract.__table__.insert().values(
+                id=uuid.uuid4(), contract_number=number, components=["energy_supply"],
+            ))
+    csv_file = tmp_path / "events.csv"
+    csv_file.write_text(
+        "type,contract_number,date,created_at\n"
+        "supply_energy_start,1234,2024-12-01,2024-12-01T09:00:00+00:00\n"
+        "supply_energy_start,5678,2024-11-01,2024-11-01T09:00:00+00:00\n"
+    )
+    await backfill([engine], [csv_file])
+
+    sessions = ShardSessions([async_sessionmaker(bind=engine, expire_on_commit=False)])
+    try:
+        changes = await get_timeline_changes(sessions, "0", limit=10)
+    finally:
+        await sessions.close()
+    assert sorted(item.contract_number for item in changes.items) == ["1234", "5678"]
+    assert sorted(item.seq for item in changes.items) == [1, 2]
+    assert changes.next_cursor == "2"
+
+
+@pytest.mark.parametrize("layout", [
+    "2024-{:02d}-01T09:00:00Z",
+    "2024-{:02d}-01T09:00:00+02:00",
+    "2024-{:02d}-01T09:00:00.123456-05:30",
+    "2024-{:02d}-29T23:59:59.5",
+    "2024-{:02d}-01T23:30-0100",
+    "2024-{:02d}-01T23:30+01",
+])
+def test_bulk_timestamp_parsing_matches_fromisoformat(layout):
+    created = [layout.format(month) for month in range(1, 13)]
+    expected = [to_epoch_us(datetime.fromisoformat(value)) for value in created]
+    assert parse_created_us(created).tolist() == expected
+    # Mixed layouts are parsed per row; invalid values still raise
+    mixed = created + ["2024-12-01 09:00:00+01:00"]
+    assert parse_created_us(mixed).tolist() == expected + [to_epoch_us(datetime.fromisoformat(mixed[-1]))]
+    with pytest.raises(ValueError):
+        parse_created_us(created + [layout.format(13)])
+
+
+def test_load_events_reads_columns_in_chunks(tmp_path):
+    created = ["2024-12-01T09:00:00Z", "2024-12-02T09:00:00+02:00", "2024-12-03T09:00:00.5"]
+    csv_file = tmp_path / "events.csv"
+    csv_file.write_text("created_at,date,contract_number,type\n" + "".join(
+        f"{value},2024-12-0{i + 1},{i % 2},supply_energy_start\n" for i, value in enumerate(created)
+    ))
+    cols = load_events([csv_file], chunk_rows=2)
+    assert cols.created_us.tolist() == [to_epoch_us(datetime.fromisoformat(value)) for value in created]
+    assert cols.day.tolist() == [date(2024, 12, i + 1).toordinal() for i in range(len(created))]
+    assert [cols.contract_numbers[c] for c in cols.contract.tolist()] == ["0", "1", "0"]
+
+    csv_file.write_text("type,contract_number,date,created_at\nsupply_energy_pause,1,2024-12-01,2024-12-01T09:00:00Z\n")
+    with pytest.raises(ValueError, match="unsupported event type 'supply_energy_pause'"):
+        load_events([csv_file])
+
+
+@pytest.mark.asyncio
+async def test_backfill_rebuilds_materialized_timelines(engine, tmp_path, monkeypatch):
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    from app.api.services.timeline_services import materialize_timeline
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "ENABLE_MATERIALIZED_TIMELINES", True)
+    monkeypatch.setattr(settings, "DB_REPOSITORY", "core")
+    contract_id = uuid.uuid4()
+    async with engine.begin() as conn:
+        await conn.execute(Contract.__table__.insert().values(
+            id=contract_id, contract_number="1234", components=["energy_supply", "battery_optimization"],
+        ))
+        # What contract creation leaves behind
+        await conn.execute(TimelineDocument.__table__.insert().values(
+            contract_number="1234", contract_id=contract_id,
+            document=b'{"contract_number":"1234","components":{}}',
+        ))
+    csv_file = tmp_path / "events.csv"
+    csv_file.write_text(
+        "type,contract_number,date,created_at\n"
+        "battery_optimization_start,1234,2024-10-01,2024-10-01T09:00:00+00:00\n"
+        "supply_energy_start,1234,2024-12-01,2024-12-01T09:00:00+00:00\n"
+        "supply_energy_end,1234,2024-12-31,2024-12-31T09:00:00+00:00\n"
+    )
+    await backfill([engine], [csv_file])
+
+    async with engine.connect() as conn:
+        stored = await conn.scalar(select(TimelineDocument.document))
+    session = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with session() as db:
+        await materialize_timeline(db, "1234", contract_id)
+        rebuilt = await db.scalar(select(TimelineDocument.document))
+        await db.rollback()
+    assert stored == rebuilt
+    assert b'"energy_supply":{"start":"2024-12-01","end":"2024-12-31"}' in stored
@@ -0,0 +1,105 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.config import settings
+from app.db.migrations import upgrade
+from app.db.models.models import ComponentState, Contract
+from app.domain.enums import ComponentType
+from app.tools.compact_timestamps import convert_timestamps
+
+START = datetime(2024, 12, 1, 9, 0, 0, 123456, tzinfo=timezone.utc)
+
+
+@pytest_asyncio.fixture
+async def engine():
+    eng = create_async_engine(
+        "sqlite+aiosqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    await upgrade(eng)
+    yield eng
+    await eng.dispose()
+
+
+async def _insert_state(engine, number, start, end=None):
+    async with engine.begin() as conn:
+        contract_id = (await conn.execute(
+            Contract.__table__.insert().values(contract_number=number, components=["energy_supply"])
+            .returning(Contract.id)
+        )).scalar_one()
+        await conn.execute(ComponentState.__table__.insert().values(
+            contract_id=contract_id, component_type=ComponentType.energy_supply,
+            start_date=date(2024, 12, 1), start_event_created_at=start,
+            end_date=None if end is None else date(2024, 12, 31), end_event_created_at=end,
+        ))
+
+
+async def _stored(engine):
+    async with engine.connect() as conn:
+        return (await conn.execute(text(
+            "SELECT typeof(start_event_created_at), typeof(end_event_created_at) FROM component_state ORDER BY rowid"
+        ))).all()
+
+
+async def _decoded(engine):
+    async with engine.connect() as conn:
+        return (await conn.execute(
+            select(ComponentState.start_event_created_at, ComponentState.end_event_created_at)
+            .order_by(text("rowid"))
+        )).all()
+
+
+@pytest.mark.asyncio
+async def test_both_encodings_read_back_as_the_same_aware_datetime(engine, monkeypatch):
+    # Non-UTC input is normalized, so text and integer rows agree
+    await _insert_state(engine, "C-TEXT", START.astimezone(timezone(timedelta(hours=2))))
+    monkeypatch.setattr(settings, "COMPACT_EVENT_TIMESTAMPS", True)
+    await _insert_state(engine, "C-INT", START + timedelta(days=1), START + timedelta(days=30))
+
+    assert await _stored(engine) == [("text", "null"), ("integer", "integer")]
+    assert await _decoded(engine) == [
+        (START, None),
+        (START + timedelta(days=1), START + timedelta(days=30)),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_convert_timestamps_round_trip(engine, monkeypatch):
+    await _insert_state(engine, "C-1", START, START + timedelta(days=30))
+    await _insert_state(engine, "C-2", START + timedelta(seconds=1))
+    before = await _decoded(engine)
+
+    assert await convert_timestamps(engine, batch_size=1) == {
+        "start_event_created_at": 2, "end_event_created_at": 1,
+    }
+    assert await _stored(engine) == [("integer", "integer"), ("integer", "null")]
+    assert await _decoded(engine) == before
+    # Idempotent
+    assert await convert_timestamps(engine) == {"start_event_created_at": 0, "end_event_created_at": 0}
+
+    await convert_timestamps(engine, compact=False)
+    assert await _stored(engine) == [("text", "text"), ("text", "null")]
+    assert await _decoded(engine) == before
+
+
+@pytest.mark.asyncio
+async def test_event_flow_with_compact_timestamps(async_client, monkeypatch):
+    monkeypatch.setattr(settings, "COMPACT_EVENT_TIMESTAMPS", True)
+    await async_client.post("/contract", json={"contract_number": "C-COMPACT", "components": ["energy_supply"]})
+
+    async def post(type_, day, created_at):
+        res = await async_client.post("/event", json={
+            "type": type_, "contract_number": "C-COMPACT", "date": day, "created_at": created_at,
+        })
+        return res.json()["status"]
+
+    assert await post("supply_energy_start", "2024-12-01", "2024-12-01T09:00:00Z") == "accepted"
+    assert await post("supply_energy_start", "2024-11-01", "2024-12-01T10:00:00+02:00") == "rejected"
+    assert await post("supply_energy_end", "2024-12-31", "2024-12-31T09:00:00Z") == "accepted"
+
+    res = await async_client.get("/contract/C-COMPACT/contract_timeline")
+    assert res.json()["components"]["energy_supply"] == {"start": "2024-12-01", "end": "2024-12-31"}